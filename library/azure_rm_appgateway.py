@@ -423,10 +423,9 @@ id:
     sample: id
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from copy import deepcopy
-from ansible.module_utils.network.common.utils import dict_merge
+from ansible.module_utils.common.dict_comparison import diff_paths
 from ansible.module_utils.common.dict_transformations import (
     camel_dict_to_snake_dict, snake_dict_to_camel_dict,
     _camel_to_snake, _snake_to_camel,
@@ -446,6 +445,12 @@ class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
+# collections of the gateway compared, along with location and sku, to decide whether it must be updated
+COMPARED_COLLECTIONS = ['authentication_certificates', 'gateway_ip_configurations', 'redirect_configurations',
+                        'frontend_ip_configurations', 'frontend_ports', 'backend_address_pools', 'probes',
+                        'backend_http_settings_collection', 'request_routing_rules', 'http_listeners']
+
+
 ssl_policy_spec = dict(
     disabled_ssl_protocols=dict(type='list'),
     policy_type=dict(type='str', choices=['predefined', 'custom']),
@@ -767,21 +772,10 @@ class AzureRMApplicationGateways(AzureRMModuleBase):
                 self.to_do = Actions.Update
 
         if (self.to_do == Actions.Update):
-            if (self.parameters['location'] != old_response['location'] or
-                    self.parameters['sku']['name'] != old_response['sku']['name'] or
-                    self.parameters['sku']['tier'] != old_response['sku']['tier'] or
-                    self.parameters['sku']['capacity'] != old_response['sku']['capacity'] or
-                    not compare_arrays(old_response, self.parameters, 'authentication_certificates') or
-                    not compare_arrays(old_response, self.parameters, 'gateway_ip_configurations') or
-                    not compare_arrays(old_response, self.parameters, 'redirect_configurations') or
-                    not compare_arrays(old_response, self.parameters, 'frontend_ip_configurations') or
-                    not compare_arrays(old_response, self.parameters, 'frontend_ports') or
-                    not compare_arrays(old_response, self.parameters, 'backend_address_pools') or
-                    not compare_arrays(old_response, self.parameters, 'probes') or
-                    not compare_arrays(old_response, self.parameters, 'backend_http_settings_collection') or
-                    not compare_arrays(old_response, self.parameters, 'request_routing_rules') or
-                    not compare_arrays(old_response, self.parameters, 'http_listeners')):
-
+            changes = diff_paths(self.comparable_parameters(), old_response)
+            if changes:
+                if self.module._diff:
+                    self.results['diff'] = dict(prepared='\n'.join(changes))
                 self.to_do = Actions.Update
             else:
                 self.to_do = Actions.NoAction
@@ -811,8 +805,7 @@ class AzureRMApplicationGateways(AzureRMModuleBase):
             self.delete_applicationgateway()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_applicationgateway():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_applicationgateway, 'applicationgateway')
         else:
             self.log("Application Gateway instance unchanged")
             self.results['changed'] = False
@@ -823,6 +816,18 @@ class AzureRMApplicationGateways(AzureRMModuleBase):
 
         return self.results
 
+    def comparable_parameters(self):
+        '''
+        The part of the parameters compared to the existing Application Gateway to decide whether it must be updated.
+
+        :return: dict
+        '''
+        result = dict(location=self.parameters['location'],
+                      sku=dict((key, self.parameters['sku'][key]) for key in ('name', 'tier', 'capacity')))
+        for name in COMPARED_COLLECTIONS:
+            result[name] = self.parameters.get(name) or []
+        return result
+
     def create_update_applicationgateway(self):
         '''
         Creates or updates Application Gateway with the specified configuration.
@@ -970,23 +975,6 @@ def http_listener_id(subscription_id, resource_group_name, appgateway_name, name
     )
 
 
-def compare_arrays(old_params, new_params, param_name):
-    old = old_params.get(param_name) or []
-    new = new_params.get(param_name) or []
-
-    oldd = {}
-    for item in old:
-        name = item['name']
-        oldd[name] = item
-    newd = {}
-    for item in new:
-        name = item['name']
-        newd[name] = item
-
-    newd = dict_merge(oldd, newd)
-    return newd == oldd
-
-
 def main():
     """Main execution"""
     AzureRMApplicationGateways()
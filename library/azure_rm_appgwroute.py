@@ -88,7 +88,6 @@ id:
     sample: /subscriptions/subid/resourceGroups/rg1/providers/Microsoft.Network/routeTables/testrt/routes/route1
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -239,8 +238,7 @@ class AzureRMRoutes(AzureRMModuleBase):
             self.delete_route()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_route():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_route, 'route')
         else:
             self.log("Route instance unchanged")
             self.results['changed'] = False
@@ -105,7 +105,6 @@ id:
     sample: /subscriptions/subid/resourceGroups/rg1/providers/Microsoft.Network/routeTables/testrt
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -256,8 +255,7 @@ class AzureRMRouteTables(AzureRMModuleBase):
             self.delete_routetable()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_routetable():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_routetable, 'routetable')
         else:
             self.log("Route Table instance unchanged")
             self.results['changed'] = False
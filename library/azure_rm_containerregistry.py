@@ -368,7 +368,8 @@ class AzureRMContainerRegistry(AzureRMModuleBase):
         '''
         self.log("Deleting the container registry instance {0}".format(self.name))
         try:
-            self.containerregistry_client.registries.delete(self.resource_group, self.name).wait()
+            poller = self.containerregistry_client.registries.delete(self.resource_group, self.name)
+            self.get_poller_result(poller)
         except CloudError as e:
             self.log('Error attempting to delete the container registry instance.')
             self.fail("Error deleting the container registry instance: {0}".format(str(e)))
@@ -76,7 +76,6 @@ status:
     contains:
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -213,8 +212,7 @@ class AzureRMReplications(AzureRMModuleBase):
             self.delete_replication()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_replication():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_replication, 'replication')
         else:
             self.log("Replication instance unchanged")
             self.results['changed'] = False
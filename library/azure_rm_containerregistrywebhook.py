@@ -91,7 +91,6 @@ status:
     sample: enabled
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -255,8 +254,7 @@ class AzureRMWebhooks(AzureRMModuleBase):
             self.delete_webhook()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_webhook():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_webhook, 'webhook')
         else:
             self.log("Webhook instance unchanged")
             self.results['changed'] = False
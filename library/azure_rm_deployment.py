@@ -78,11 +78,14 @@ options:
   wait_for_deployment_completion:
     description:
       - Whether or not to block until the deployment has completed.
+      - When C(no), the task returns as soon as the deployment is accepted, with its id and correlation id. Use
+        M(azure_rm_deployment_status) to wait for one or more submitted deployments.
     type: bool
     default: 'yes'
   wait_for_deployment_polling_period:
     description:
-      - Time (in seconds) to wait between polls when waiting for deployment completion.
+      - Maximum time (in seconds) to wait between polls when waiting for deployment completion.
+      - Polling starts at a short interval and backs off up to this value.
     default: 10
 
 extends_documentation_fragment:
@@ -331,6 +334,22 @@ EXAMPLES = '''
         value: Password1!
       dnsNameForPublicIP:
         value: devopscleazure
+
+# Submit deployments without waiting for them, then wait for all of them at once
+- name: Submit Azure Deploys
+  azure_rm_deployment:
+    resource_group_name: "{{ item.resource_group }}"
+    deployment_name: "{{ item.name }}"
+    template_link: "{{ item.template_link }}"
+    parameters_link: "{{ item.parameters_link }}"
+    wait_for_deployment_completion: no
+  loop: "{{ environment_templates }}"
+  register: submitted
+
+- name: Wait for the Azure Deploys
+  azure_rm_deployment_status:
+    deployments: "{{ submitted.results | map(attribute='deployment') | list }}"
+    timeout: 3600
 '''
 
 RETURN = '''
@@ -347,6 +366,14 @@ deployment:
         description: The Azure ID of the deployment
         type: string
         returned: always
+      correlation_id:
+        description: Correlation id of the deployment, to find its operations in the activity log
+        type: string
+        returned: always
+      provisioning_state:
+        description: Provisioning state of the deployment; still running when not waiting for completion
+        type: string
+        returned: always
       instances:
         description: Provides the public IP addresses for each VM instance.
         type: list
@@ -359,13 +386,15 @@ deployment:
         description: Dictionary of outputs received from the deployment
         type: dict
         returned: always
+poll_stats:
+  description: Number of polls and elapsed seconds of each long running operation waited on.
+  type: list
+  returned: when the module waited on an operation
+  sample: [{"operation": "deployment myDeployment", "polls": 12, "elapsed": 183.4, "timed_out": false}]
 '''
 
-import time
-
 try:
     from azure.common.credentials import ServicePrincipalCredentials
-    import time
     import yaml
 except ImportError as exc:
     IMPORT_ERROR = "Error importing module prerequisites: %s" % exc
@@ -380,7 +409,8 @@ except ImportError:
     # This is handled in azure_rm_common
     pass
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, AZURE_DEPLOYMENT_FINISHED_STATES, failed_deployment_operations, \
+    response_headers, retry_after_seconds
 
 
 class AzureRMDeploymentManager(AzureRMModuleBase):
@@ -426,7 +456,8 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
 
         super(AzureRMDeploymentManager, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                        mutually_exclusive=mutually_exclusive,
-                                                       supports_check_mode=False)
+                                                       supports_check_mode=False,
+                                                       report_poll_stats=True)
 
     def exec_module(self, **kwargs):
 
@@ -440,20 +471,25 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
                     name=self.deployment_name,
                     group_name=self.resource_group_name,
                     id=None,
+                    correlation_id=None,
+                    provisioning_state=None,
                     outputs=None,
                     instances=None
                 )
             else:
+                finished = self._deployment_finished(deployment)
                 self.results['deployment'] = dict(
                     name=deployment.name,
                     group_name=self.resource_group_name,
                     id=deployment.id,
-                    outputs=deployment.properties.outputs,
-                    instances=self._get_instances(deployment)
+                    correlation_id=deployment.properties.correlation_id if deployment.properties else None,
+                    provisioning_state=deployment.properties.provisioning_state if deployment.properties else None,
+                    outputs=deployment.properties.outputs if finished else None,
+                    instances=self._get_instances(deployment) if finished else None
                 )
 
             self.results['changed'] = True
-            self.results['msg'] = 'deployment succeeded'
+            self.results['msg'] = 'deployment succeeded' if self.wait_for_deployment_completion else 'deployment submitted'
         else:
             try:
                 if self.get_resource_group(self.resource_group_name):
@@ -511,34 +547,46 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
                                                                  self.deployment_name,
                                                                  deploy_parameter)
 
-            deployment_result = None
             if self.wait_for_deployment_completion:
-                deployment_result = self.get_poller_result(result)
-                while deployment_result.properties is None or deployment_result.properties.provisioning_state not in ['Canceled', 'Failed', 'Deleted',
-                                                                                                                      'Succeeded']:
-                    time.sleep(self.wait_for_deployment_polling_period)
-                    deployment_result = self.rm_client.deployments.get(self.resource_group_name, self.deployment_name)
+                deployment_result = self.get_poller_result(result, description='deployment {0}'.format(self.deployment_name))
+                if not self._deployment_finished(deployment_result):
+                    deployment_result = self.poll_until(self._probe_deployment,
+                                                        'deployment {0} status'.format(self.deployment_name),
+                                                        max_delay=self.wait_for_deployment_polling_period)
+            else:
+                # the deployment has been accepted; hand back what is needed to track it
+                deployment_result = self.rm_client.deployments.get(self.resource_group_name, self.deployment_name)
         except CloudError as exc:
-            failed_deployment_operations = self._get_failed_deployment_operations(self.deployment_name)
+            failed_operations = self._get_failed_deployment_operations(self.deployment_name)
             self.log("Deployment failed %s: %s" % (exc.status_code, exc.message))
             self.fail("Deployment failed with status code: %s and message: %s" % (exc.status_code, exc.message),
-                      failed_deployment_operations=failed_deployment_operations)
+                      failed_deployment_operations=failed_operations)
 
         if self.wait_for_deployment_completion and deployment_result.properties.provisioning_state != 'Succeeded':
             self.log("provisioning state: %s" % deployment_result.properties.provisioning_state)
-            failed_deployment_operations = self._get_failed_deployment_operations(self.deployment_name)
+            failed_operations = self._get_failed_deployment_operations(self.deployment_name)
             self.fail('Deployment failed. Deployment id: %s' % deployment_result.id,
-                      failed_deployment_operations=failed_deployment_operations)
+                      failed_deployment_operations=failed_operations)
 
         return deployment_result
 
+    @staticmethod
+    def _deployment_finished(deployment):
+        return deployment.properties is not None and \
+            deployment.properties.provisioning_state in AZURE_DEPLOYMENT_FINISHED_STATES
+
+    def _probe_deployment(self):
+        response = self.rm_client.deployments.get(self.resource_group_name, self.deployment_name, raw=True)
+        deployment = response.output
+        return self._deployment_finished(deployment), deployment, retry_after_seconds(response_headers(response))
+
     def destroy_resource_group(self):
         """
         Destroy the targeted resource group
         """
         try:
             result = self.rm_client.resource_groups.delete(self.resource_group_name)
-            result.wait()  # Blocking wait till the delete is finished
+            self.get_poller_result(result, description='deletion of resource group {0}'.format(self.resource_group_name))
         except CloudError as e:
             if e.status_code == 404 or e.status_code == 204:
                 return
@@ -546,51 +594,17 @@ class AzureRMDeploymentManager(AzureRMModuleBase):
                 self.fail("Delete resource group and deploy failed with status code: %s and message: %s" %
                           (e.status_code, e.message))
 
-    def _get_failed_nested_operations(self, current_operations):
-        new_operations = []
-        for operation in current_operations:
-            if operation.properties.provisioning_state == 'Failed':
-                new_operations.append(operation)
-                if operation.properties.target_resource and \
-                   'Microsoft.Resources/deployments' in operation.properties.target_resource.id:
-                    nested_deployment = operation.properties.target_resource.resource_name
-                    try:
-                        nested_operations = self.rm_client.deployment_operations.list(self.resource_group_name,
-                                                                                      nested_deployment)
-                    except CloudError as exc:
-                        self.fail("List nested deployment operations failed with status code: %s and message: %s" %
-                                  (exc.status_code, exc.message))
-                    new_nested_operations = self._get_failed_nested_operations(nested_operations)
-                    new_operations += new_nested_operations
-        return new_operations
-
     def _get_failed_deployment_operations(self, deployment_name):
         results = []
         # time.sleep(15) # there is a race condition between when we ask for deployment status and when the
         #               # status is available.
 
         try:
-            operations = self.rm_client.deployment_operations.list(self.resource_group_name, deployment_name)
+            results = failed_deployment_operations(self.rm_client, self.resource_group_name, deployment_name)
         except CloudError as exc:
             self.fail("Get deployment failed with status code: %s and message: %s" %
                       (exc.status_code, exc.message))
-        try:
-            results = [
-                dict(
-                    id=op.id,
-                    operation_id=op.operation_id,
-                    status_code=op.properties.status_code,
-                    status_message=op.properties.status_message,
-                    target_resource=dict(
-                        id=op.properties.target_resource.id,
-                        resource_name=op.properties.target_resource.resource_name,
-                        resource_type=op.properties.target_resource.resource_type
-                    ) if op.properties.target_resource else None,
-                    provisioning_state=op.properties.provisioning_state,
-                )
-                for op in self._get_failed_nested_operations(operations)
-            ]
-        except:
+        except Exception:
             # If we fail here, the original error gets lost and user receives wrong error message/stacktrace
             pass
         self.log(dict(failed_deployment_operations=results), pretty_print=True)
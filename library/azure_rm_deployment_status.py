@@ -0,0 +1,239 @@
+#!/usr/bin/python
+#
+# Copyright (c) Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = '''
+---
+module: azure_rm_deployment_status
+
+version_added: "2.8"
+
+short_description: Get the status of Azure Resource Manager template deployments, optionally waiting for them.
+
+description:
+    - Get the status of one or more template deployments, such as those submitted by M(azure_rm_deployment) with
+      I(wait_for_deployment_completion=no), and optionally wait until all of them have finished.
+    - The deployments still running are polled together, with a backoff that starts short and grows up to
+      I(polling_period).
+    - The task fails if any deployment failed or was canceled. The failed operations of those deployments, including the
+      operations of their failed nested deployments, are returned.
+
+options:
+    deployments:
+        description:
+            - Deployments to check. Each item is a dict with either the C(id) of the deployment, or its
+              C(resource_group) (or C(group_name)) and C(name). The C(deployment) returned by M(azure_rm_deployment)
+              can be used as is.
+        type: list
+        required: true
+    wait:
+        description:
+            - Wait until every deployment has finished.
+        type: bool
+        default: yes
+    timeout:
+        description:
+            - Maximum time in seconds to wait. By default there is no limit.
+        type: int
+    polling_period:
+        description:
+            - Maximum time in seconds between polls.
+        type: int
+        default: 30
+    max_concurrency:
+        description:
+            - Maximum number of requests made at the same time.
+        type: int
+        default: 8
+
+extends_documentation_fragment:
+    - azure
+
+author:
+    - Ansible Project
+
+'''
+
+EXAMPLES = '''
+- name: Wait for deployments submitted earlier
+  azure_rm_deployment_status:
+    deployments: "{{ submitted.results | map(attribute='deployment') | list }}"
+    timeout: 3600
+
+- name: Check a deployment without waiting
+  azure_rm_deployment_status:
+    deployments:
+      - resource_group: myResourceGroup
+        name: network
+    wait: no
+'''
+
+RETURN = '''
+deployments:
+    description: Status of each deployment, in the order of I(deployments).
+    returned: always
+    type: complex
+    contains:
+        id:
+            description: The Azure ID of the deployment.
+            type: str
+            sample: /subscriptions/xxxx/resourceGroups/myResourceGroup/providers/Microsoft.Resources/deployments/network
+        name:
+            description: Name of the deployment.
+            type: str
+            sample: network
+        group_name:
+            description: Name of the resource group.
+            type: str
+            sample: myResourceGroup
+        correlation_id:
+            description: Correlation id of the deployment.
+            type: str
+            sample: 2ffd22a7-9ab6-4e4f-b1e8-6e7a9c0dbc36
+        provisioning_state:
+            description: Provisioning state of the deployment.
+            type: str
+            sample: Succeeded
+        outputs:
+            description: Outputs of the deployment, once it has finished.
+            type: dict
+        failed_deployment_operations:
+            description: Failed operations of the deployment and of its nested deployments.
+            type: list
+            returned: when the deployment failed
+poll_stats:
+    description: Number of polls and elapsed seconds of the wait on the deployments.
+    returned: always
+    type: list
+    sample: [{"operation": "deployments", "polls": 4, "elapsed": 95.2, "timed_out": false}]
+'''
+
+try:
+    from msrestazure.tools import parse_resource_id
+except ImportError:
+    # This is handled in azure_rm_common
+    pass
+
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, AzureRMPollingTimeout, AZURE_DEPLOYMENT_FINISHED_STATES, \
+    failed_deployment_operations, response_headers, retry_after_seconds, run_concurrently
+
+
+class AzureRMDeploymentStatus(AzureRMModuleBase):
+
+    def __init__(self):
+
+        self.module_arg_spec = dict(
+            deployments=dict(type='list', required=True),
+            wait=dict(type='bool', default=True),
+            timeout=dict(type='int'),
+            polling_period=dict(type='int', default=30),
+            max_concurrency=dict(type='int', default=8)
+        )
+
+        self.deployments = None
+        self.wait = None
+        self.timeout = None
+        self.polling_period = None
+        self.max_concurrency = None
+
+        self.results = dict(
+            changed=False,
+            deployments=[]
+        )
+
+        super(AzureRMDeploymentStatus, self).__init__(self.module_arg_spec,
+                                                      supports_check_mode=True,
+                                                      supports_tags=False,
+                                                      report_poll_stats=True)
+
+    def exec_module(self, **kwargs):
+
+        for key in self.module_arg_spec:
+            setattr(self, key, kwargs[key])
+
+        keys = [self.deployment_key(index, item) for index, item in enumerate(self.deployments)]
+        status = dict()
+
+        def probe():
+            pending = [key for key in keys if key not in status or not self.finished(status[key])]
+            retry_after = None
+            for key, (response, exc) in zip(pending, run_concurrently(self.get_deployment, pending, self.max_concurrency)):
+                if exc is not None:
+                    self.fail('Failed to get deployment {0} of resource group {1} - {2}'.format(key[1], key[0], str(exc)))
+                status[key] = response.output
+                # wait for the longest interval requested
+                seconds = retry_after_seconds(response_headers(response))
+                if seconds is not None:
+                    retry_after = max(retry_after, seconds) if retry_after is not None else seconds
+            return not self.wait or all(self.finished(deployment) for deployment in status.values()), None, retry_after
+
+        try:
+            self.poll_until(probe, 'deployments', timeout=self.timeout, max_delay=self.polling_period)
+        except AzureRMPollingTimeout as exc:
+            self.results['deployments'] = [self.deployment_to_dict(key, status[key]) for key in keys]
+            self.fail(str(exc), **self.results)
+
+        failed = [key for key in keys if status[key].properties and status[key].properties.provisioning_state in ('Failed', 'Canceled')]
+        failed_operations = dict(zip(failed, run_concurrently(lambda key: failed_deployment_operations(self.rm_client, key[0], key[1]),
+                                                              failed, self.max_concurrency)))
+
+        for key in keys:
+            result = self.deployment_to_dict(key, status[key])
+            if key in failed_operations:
+                # operations that cannot be listed are left out rather than hiding the failure itself
+                operations, dummy = failed_operations[key]
+                result['failed_deployment_operations'] = operations or []
+            self.results['deployments'].append(result)
+
+        if failed:
+            self.fail('{0} of {1} deployments did not succeed: {2}'.format(len(failed), len(keys), ', '.join(key[1] for key in failed)),
+                      **self.results)
+        return self.results
+
+    def deployment_key(self, index, item):
+        if not isinstance(item, dict):
+            self.fail('Parameter error: item {0} of deployments must be a dict'.format(index))
+        if item.get('id'):
+            parsed = parse_resource_id(item['id'])
+            return parsed.get('resource_group'), parsed.get('name')
+        resource_group = item.get('resource_group') or item.get('group_name')
+        if not resource_group or not item.get('name'):
+            self.fail('Parameter error: item {0} of deployments needs an id, or a resource_group and a name'.format(index))
+        return resource_group, item['name']
+
+    def get_deployment(self, key):
+        return self.rm_client.deployments.get(key[0], key[1], raw=True)
+
+    @staticmethod
+    def finished(deployment):
+        return deployment.properties is not None and \
+            deployment.properties.provisioning_state in AZURE_DEPLOYMENT_FINISHED_STATES
+
+    def deployment_to_dict(self, key, deployment):
+        finished = self.finished(deployment)
+        return dict(
+            id=deployment.id,
+            name=deployment.name,
+            group_name=key[0],
+            correlation_id=deployment.properties.correlation_id if deployment.properties else None,
+            provisioning_state=deployment.properties.provisioning_state if deployment.properties else None,
+            outputs=deployment.properties.outputs if finished else None
+        )
+
+
+def main():
+    AzureRMDeploymentStatus()
+
+
+if __name__ == '__main__':
+    main()
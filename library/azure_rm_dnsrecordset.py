@@ -35,10 +35,11 @@ options:
     relative_name:
         description:
             - relative name of the record set
-        required: true
+            - Required unless I(record_sets) is given.
     record_type:
         description:
             - the type of record set to create or delete
+            - Required with I(relative_name).
         choices:
             - A
             - AAAA
@@ -48,7 +49,6 @@ options:
             - SRV
             - TXT
             - PTR
-        required: true
     record_mode:
         description:
             - whether existing record values not sent to the module should be purged
@@ -87,6 +87,45 @@ options:
             entry:
                 description:
                     - primary data value for all record types.
+    record_sets:
+        description:
+            - Manage many record sets of the zone in a single task, instead of the record set given by I(relative_name).
+            - Existing record sets are fetched with a single paged list of the zone and compared in memory. Only
+              record sets that need to change are written, concurrently, and every write is guarded by the ETag
+              of the record set it was compared against.
+            - With I(state=present) the listed record sets are created or updated, with I(state=absent) they are deleted.
+            - I(record_mode) applies to every record set.
+        type: list
+        version_added: "2.8"
+        suboptions:
+            relative_name:
+                description:
+                    - relative name of the record set
+                required: true
+            record_type:
+                description:
+                    - the type of the record set, as in I(record_type)
+                required: true
+            time_to_live:
+                description:
+                    - time to live of the record set in seconds, defaults to I(time_to_live)
+            records:
+                description:
+                    - list of records of the record set, as in I(records)
+                    - Required with I(state=present).
+    purge_record_sets:
+        description:
+            - With I(record_sets) and I(state=present), delete the record sets of the zone that are not listed.
+            - The SOA record set and the NS record set of the zone apex are never deleted.
+        type: bool
+        default: no
+        version_added: "2.8"
+    max_concurrency:
+        description:
+            - Maximum number of I(record_sets) writes in flight at the same time.
+        type: int
+        default: 8
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -165,9 +204,54 @@ EXAMPLES = '''
     records:
     - entry: 'v=spf1 a -all'
 
+- name: make the zone contain exactly these record sets
+  azure_rm_dnsrecordset:
+    resource_group: Testing
+    zone_name: testing.com
+    purge_record_sets: yes
+    record_sets:
+      - relative_name: www
+        record_type: A
+        records:
+          - entry: 192.168.100.101
+      - relative_name: mail
+        record_type: MX
+        time_to_live: 7200
+        records:
+          - entry: mail.testing.com
+            preference: 10
+
 '''
 
 RETURN = '''
+changes:
+    description: Record sets created, updated or deleted, in I(record_sets) mode.
+    returned: when I(record_sets) is set
+    type: complex
+    contains:
+        relative_name:
+            description: Relative name of the record set.
+            returned: always
+            type: str
+            sample: www
+        record_type:
+            description: Type of the record set.
+            returned: always
+            type: str
+            sample: A
+        action:
+            description: Change made to the record set, one of C(create), C(update) or C(delete).
+            returned: always
+            type: str
+            sample: update
+        failed:
+            description: Whether the change failed, e.g. because the record set was modified concurrently.
+            returned: always
+            type: bool
+        msg:
+            description: Error message of a failed change.
+            returned: when failed
+            type: str
 '''
 
 import inspect
@@ -175,7 +259,7 @@ import sys
 
 from ansible.module_utils.basic import _load_params
 from ansible.module_utils.six import iteritems
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase, HAS_AZURE
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, HAS_AZURE, AZURE_MAX_CONCURRENCY
 
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -229,6 +313,9 @@ RECORDSET_VALUE_MAP = dict(
     # FUTURE: add missing record types from https://github.com/Azure/azure-sdk-for-python/blob/master/azure-mgmt-dns/azure/mgmt/dns/models/record_set.py
 ) if HAS_AZURE else {}
 
+# record sets maintained by Azure DNS itself, left alone when purging a zone
+PROTECTED_RECORD_SETS = [('@', 'SOA'), ('@', 'NS')]
+
 
 class AzureRMRecordSet(AzureRMModuleBase):
 
@@ -239,25 +326,40 @@ class AzureRMRecordSet(AzureRMModuleBase):
 
         self.module_arg_spec = dict(
             resource_group=dict(type='str', required=True),
-            relative_name=dict(type='str', required=True),
+            relative_name=dict(type='str'),
             zone_name=dict(type='str', required=True),
-            record_type=dict(choices=RECORD_ARGSPECS.keys(), required=True, type='str'),
+            record_type=dict(choices=RECORD_ARGSPECS.keys(), type='str'),
             record_mode=dict(choices=['append', 'purge'], default='purge'),
             state=dict(choices=['present', 'absent'], default='present', type='str'),
             time_to_live=dict(type='int', default=3600),
-            records=dict(type='list', elements='dict')
+            records=dict(type='list', elements='dict'),
+            record_sets=dict(
+                type='list',
+                elements='dict',
+                options=dict(
+                    relative_name=dict(type='str', required=True),
+                    record_type=dict(choices=RECORD_ARGSPECS.keys(), required=True, type='str'),
+                    time_to_live=dict(type='int'),
+                    records=dict(type='list', elements='dict')
+                )
+            ),
+            purge_record_sets=dict(type='bool', default=False),
+            max_concurrency=dict(type='int', default=AZURE_MAX_CONCURRENCY)
         )
 
-        required_if = [
-            ('state', 'present', ['records'])
-        ]
+        required_if = []
+        mutually_exclusive = [['relative_name', 'record_sets']]
+        required_one_of = [['relative_name', 'record_sets']]
+        required_together = [['relative_name', 'record_type']]
 
         self.results = dict(
             changed=False
         )
 
         # first-pass arg validation so we can get the record type- skip exec_module
-        super(AzureRMRecordSet, self).__init__(self.module_arg_spec, required_if=required_if, supports_check_mode=True, skip_exec=True)
+        super(AzureRMRecordSet, self).__init__(self.module_arg_spec, required_if=required_if, supports_check_mode=True, skip_exec=True,
+                                               mutually_exclusive=mutually_exclusive, required_one_of=required_one_of,
+                                               required_together=required_together)
 
         # look up the right subspec and metadata
         record_subspec = RECORD_ARGSPECS.get(self.module.params['record_type'])
@@ -271,12 +373,20 @@ class AzureRMRecordSet(AzureRMModuleBase):
             rvm['classobj'].__hash__ = gethash
 
         # rerun validation and actually run the module this time
-        super(AzureRMRecordSet, self).__init__(self.module_arg_spec, required_if=required_if, supports_check_mode=True)
+        super(AzureRMRecordSet, self).__init__(self.module_arg_spec, required_if=required_if, supports_check_mode=True,
+                                               mutually_exclusive=mutually_exclusive, required_one_of=required_one_of,
+                                               required_together=required_together)
 
     def exec_module(self, **kwargs):
         for key in self.module_arg_spec.keys():
             setattr(self, key, kwargs[key])
 
+        if self.record_sets is not None:
+            return self.reconcile_zone()
+
+        if self.state == 'present' and not self.records:
+            self.fail("state is present but all of the following are missing: records")
+
         # retrieve resource group to make sure it exists
         self.get_resource_group(self.resource_group)
         zone = self.dns_client.zones.get(self.resource_group, self.zone_name)
@@ -321,20 +431,7 @@ class AzureRMRecordSet(AzureRMModuleBase):
 
         if self.results['changed']:
             if self.state == 'present':
-                record_set_args = dict(
-                    ttl=self.time_to_live
-                )
-
-                if not self.record_type_metadata['is_list']:
-                    records_to_create_or_update = self.input_sdk_records[0]
-                elif self.record_mode == 'append' and record_set:  # append mode, merge with existing values before update
-                    records_to_create_or_update = set(self.input_sdk_records).union(set(server_records))
-                else:
-                    records_to_create_or_update = self.input_sdk_records
-
-                record_set_args[self.record_type_metadata['attrname']] = records_to_create_or_update
-
-                record_set = RecordSet(**record_set_args)
+                record_set = self.build_record_set(self.record_type_metadata, self.input_sdk_records, record_set, self.time_to_live)
 
                 rsout = self.dns_client.record_sets.create_or_update(self.resource_group, self.zone_name, self.relative_name, self.record_type, record_set)
 
@@ -352,8 +449,104 @@ class AzureRMRecordSet(AzureRMModuleBase):
             self.fail("Error deleting record set {0} - {1}".format(self.relative_name, str(exc)))
         return None
 
-    def create_sdk_records(self, input_records):
-        record_sdk_class = self.record_type_metadata['classobj']
+    def reconcile_zone(self):
+        '''
+        Bring the record sets listed in record_sets to their desired state with one list call for the whole zone,
+        then only the writes that are needed.
+        '''
+        try:
+            self.dns_client.zones.get(self.resource_group, self.zone_name)
+        except CloudError as exc:
+            self.fail('The zone {0} does not exist in the resource group {1} - {2}'.format(self.zone_name, self.resource_group, str(exc)))
+
+        try:
+            existing = dict()
+            for record_set in self.dns_client.record_sets.list_by_dns_zone(self.resource_group, self.zone_name):
+                existing[(record_set.name.lower(), record_set.type.split('/')[-1])] = record_set
+        except CloudError as exc:
+            self.fail('Error listing record sets of zone {0} - {1}'.format(self.zone_name, str(exc)))
+
+        changes = []
+        desired = set()
+        for index, item in enumerate(self.record_sets):
+            key = (item['relative_name'].lower(), item['record_type'])
+            if key in desired:
+                self.fail('Record set {0} of type {1} is listed more than once'.format(item['relative_name'], item['record_type']))
+            desired.add(key)
+            current = existing.get(key)
+            change = dict(relative_name=item['relative_name'], record_type=item['record_type'])
+
+            if self.state == 'absent':
+                if current:
+                    change.update(action='delete', etag=current.etag)
+                    changes.append(change)
+                continue
+
+            if not item['records']:
+                self.fail('Parameter error: records required for item {0} of record_sets'.format(index))
+            metadata = RECORDSET_VALUE_MAP[item['record_type']]
+            try:
+                sdk_records = self.create_sdk_records(normalize_records(item['record_type'], item['records']), metadata)
+            except ValueError as exc:
+                self.fail('Parameter error: item {0} of record_sets - {1}'.format(index, str(exc)))
+            time_to_live = item['time_to_live'] if item['time_to_live'] is not None else self.time_to_live
+
+            if current:
+                if not self.records_changed(sdk_records, getattr(current, metadata['attrname'])) and current.ttl == time_to_live:
+                    continue
+                change.update(action='update', etag=current.etag)
+            else:
+                change.update(action='create', etag=None)
+            change['record_set'] = self.build_record_set(metadata, sdk_records, current, time_to_live)
+            changes.append(change)
+
+        if self.state == 'present' and self.purge_record_sets:
+            for key in sorted(existing):
+                if key in desired or key in PROTECTED_RECORD_SETS or key[1] not in RECORD_ARGSPECS:
+                    continue
+                changes.append(dict(relative_name=existing[key].name, record_type=key[1], action='delete', etag=existing[key].etag))
+
+        return self.apply_changes(changes, self.apply_change, 'record set', self.max_concurrency,
+                                  lambda change, dummy: dict(relative_name=change['relative_name'], record_type=change['record_type'],
+                                                             action=change['action']))
+
+    def apply_change(self, change):
+        '''
+        Write one change computed by reconcile_zone. The write is refused by the service if the record set was
+        created or modified since it was listed.
+        '''
+        record_sets = self.dns_client.record_sets
+        if change['action'] == 'delete':
+            return record_sets.delete(self.resource_group, self.zone_name, change['relative_name'], change['record_type'],
+                                      if_match=change['etag'])
+        if change['action'] == 'create':
+            return record_sets.create_or_update(self.resource_group, self.zone_name, change['relative_name'], change['record_type'],
+                                                change['record_set'], if_none_match='*')
+        return record_sets.create_or_update(self.resource_group, self.zone_name, change['relative_name'], change['record_type'],
+                                            change['record_set'], if_match=change['etag'])
+
+    def build_record_set(self, record_type_metadata, input_sdk_records, record_set, time_to_live):
+        '''
+        Build the RecordSet to write for input records, given the existing record set or None.
+        '''
+        record_set_args = dict(
+            ttl=time_to_live
+        )
+
+        if not record_type_metadata['is_list']:
+            records_to_create_or_update = input_sdk_records[0]
+        elif self.record_mode == 'append' and record_set:  # append mode, merge with existing values before update
+            server_records = getattr(record_set, record_type_metadata['attrname']) or []
+            records_to_create_or_update = set(input_sdk_records).union(set(server_records))
+        else:
+            records_to_create_or_update = input_sdk_records
+
+        record_set_args[record_type_metadata['attrname']] = records_to_create_or_update
+
+        return RecordSet(**record_set_args)
+
+    def create_sdk_records(self, input_records, record_type_metadata=None):
+        record_sdk_class = (record_type_metadata or self.record_type_metadata)['classobj']
         record_argspec = inspect.getargspec(record_sdk_class.__init__)
         return [record_sdk_class(**dict([(k, v) for k, v in iteritems(x) if k in record_argspec.args])) for x in input_records]
 
@@ -372,6 +565,42 @@ class AzureRMRecordSet(AzureRMModuleBase):
         return input_set != server_set
 
 
+def normalize_records(record_type, records):
+    '''
+    Apply the RECORD_ARGSPECS entry of record_type to records given in record_sets, which the argument spec
+    cannot do since the shape of records depends on the type of each record set.
+
+    :param record_type: record type, e.g. A
+    :param records: list of record dicts
+    :return: list of dicts keyed by SDK argument names
+    :raises ValueError: when a required value is missing or has the wrong type
+    '''
+    spec = RECORD_ARGSPECS[record_type]
+    result = []
+    for record in records:
+        values = dict()
+        for name, arg in spec.items():
+            value = None
+            for key in [name] + arg.get('aliases', []):
+                if record.get(key) is not None:
+                    value = record[key]
+                    break
+            if value is None:
+                raise ValueError('{0} record {1} is missing {2}'.format(record_type, record, name))
+            try:
+                if arg['type'] == 'int':
+                    value = int(value)
+                elif arg['type'] == 'list':
+                    value = value if isinstance(value, list) else [value]
+                else:
+                    value = str(value)
+            except (TypeError, ValueError):
+                raise ValueError('{0} of {1} record {2} must be of type {3}'.format(name, record_type, record, arg['type']))
+            values[name] = value
+        result.append(values)
+    return result
+
+
 # Quick 'n dirty hash impl suitable for monkeypatching onto SDK model objects (so we can use set comparisons)
 def gethash(self):
     if not getattr(self, '_cachedhash', None):
@@ -27,7 +27,20 @@ options:
     key_name:
         description:
             - Name of the keyvault key.
-        required: true
+            - Required unless I(key_names) is used.
+    key_names:
+        description:
+            - Names of keyvault keys to manage in one task. The keys of the vault are listed once, then the missing
+              keys are created, or the existing keys deleted, up to I(max_concurrency) at a time.
+            - Mutually exclusive with I(key_name).
+        type: list
+        version_added: "2.8"
+    max_concurrency:
+        description:
+            - Maximum number of keys written at the same time with I(key_names).
+        type: int
+        default: 8
+        version_added: "2.8"
     byok_file:
         description:
             - BYOK file.
@@ -66,6 +79,13 @@ EXAMPLES = '''
         key_name: MyKey
         keyvault_uri: https://contoso.vault.azure.net/
         state: absent
+
+    - name: Create several keys
+      azure_rm_keyvaultkey:
+        key_names:
+            - DiskKey
+            - BackupKey
+        keyvault_uri: https://contoso.vault.azure.net/
 '''
 
 RETURN = '''
@@ -78,6 +98,29 @@ state:
           description: key resource path.
           type: str
           example: https://contoso.vault.azure.net/keys/hello/e924f053839f4431b35bc54393f98423
+changes:
+    description: Keys created or deleted, in I(key_names) mode.
+    returned: when I(key_names) is set
+    type: complex
+    contains:
+        name:
+            description: Name of the key.
+            returned: always
+            type: str
+            sample: DiskKey
+        action:
+            description: Change made to the key, C(create) or C(delete).
+            returned: always
+            type: str
+            sample: create
+        failed:
+            description: Whether the change failed.
+            returned: always
+            type: bool
+        msg:
+            description: Error message of a failed change.
+            returned: when failed
+            type: str
 '''
 
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
@@ -85,9 +128,8 @@ from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 try:
     import re
     import codecs
-    from azure.keyvault import KeyVaultClient, KeyVaultId, KeyVaultAuthentication
+    from azure.keyvault import KeyVaultId
     from azure.keyvault.models import KeyAttributes, JsonWebKey
-    from azure.common.credentials import ServicePrincipalCredentials
     from azure.keyvault.models.key_vault_error import KeyVaultErrorException
     from OpenSSL import crypto
 except ImportError:
@@ -101,7 +143,9 @@ class AzureRMKeyVaultKey(AzureRMModuleBase):
     def __init__(self):
 
         self.module_arg_spec = dict(
-            key_name=dict(type='str', required=True),
+            key_name=dict(type='str'),
+            key_names=dict(type='list'),
+            max_concurrency=dict(type='int', default=8),
             keyvault_uri=dict(type='str', required=True),
             pem_file=dict(type='str'),
             pem_password=dict(type='str'),
@@ -115,6 +159,8 @@ class AzureRMKeyVaultKey(AzureRMModuleBase):
         )
 
         self.key_name = None
+        self.key_names = None
+        self.max_concurrency = None
         self.keyvault_uri = None
         self.pem_file = None
         self.pem_password = None
@@ -125,10 +171,18 @@ class AzureRMKeyVaultKey(AzureRMModuleBase):
         required_if = [
             ('pem_password', 'present', ['pem_file'])
         ]
+        mutually_exclusive = [
+            ('key_name', 'key_names')
+        ]
+        required_one_of = [
+            ('key_name', 'key_names')
+        ]
 
         super(AzureRMKeyVaultKey, self).__init__(self.module_arg_spec,
                                                  supports_check_mode=True,
                                                  required_if=required_if,
+                                                 mutually_exclusive=mutually_exclusive,
+                                                 required_one_of=required_one_of,
                                                  supports_tags=True)
 
     def exec_module(self, **kwargs):
@@ -136,25 +190,10 @@ class AzureRMKeyVaultKey(AzureRMModuleBase):
         for key in list(self.module_arg_spec.keys()) + ['tags']:
             setattr(self, key, kwargs[key])
 
-        # Create KeyVaultClient
-        def auth_callback(server, resource, scope):
-            if self.credentials['client_id'] is None or self.credentials['secret'] is None:
-                self.fail('Please specify client_id, secret and tenant to access azure Key Vault.')
-
-            tenant = self.credentials.get('tenant')
-            if not self.credentials['tenant']:
-                tenant = "common"
-
-            authcredential = ServicePrincipalCredentials(
-                client_id=self.credentials['client_id'],
-                secret=self.credentials['secret'],
-                tenant=tenant,
-                resource="https://vault.azure.net")
+        self.client = self.get_keyvault_client()
 
-            token = authcredential.token
-            return token['token_type'], token['access_token']
-
-        self.client = KeyVaultClient(KeyVaultAuthentication(auth_callback))
+        if self.key_names is not None:
+            return self.reconcile_keys()
 
         results = dict()
         changed = False
@@ -194,6 +233,38 @@ class AzureRMKeyVaultKey(AzureRMModuleBase):
 
         return self.results
 
+    def reconcile_keys(self):
+        '''
+        Create the missing keys of key_names, or delete the existing ones, with one listing of the vault.
+        '''
+        try:
+            existing = set()
+            for item in self.client.get_keys(self.keyvault_uri):
+                existing.add(KeyVaultId.parse_key_id(item.kid).name.lower())
+        except KeyVaultErrorException as exc:
+            self.fail('Error listing the keys of {0} - {1}'.format(self.keyvault_uri, str(exc)))
+
+        changes = []
+        names = set()
+        for name in self.key_names:
+            if name.lower() in names:
+                self.fail('Parameter error: key {0} is listed more than once'.format(name))
+            names.add(name.lower())
+            if self.state == 'present' and name.lower() not in existing:
+                changes.append(dict(name=name, action='create'))
+            elif self.state == 'absent' and name.lower() in existing:
+                changes.append(dict(name=name, action='delete'))
+
+        return self.apply_changes(changes, self.apply_change, 'key', self.max_concurrency)
+
+    def apply_change(self, change):
+        '''
+        Write one change computed by reconcile_keys.
+        '''
+        if change['action'] == 'delete':
+            return self.delete_key(change['name'])
+        return self.create_key(change['name'], self.tags)
+
     def get_key(self, name, version=''):
         ''' Gets an existing key '''
         key_bundle = self.client.get_key(self.keyvault_uri, name, version)
@@ -27,10 +27,25 @@ options:
     secret_name:
         description:
             - Name of the keyvault secret.
-        required: true
+            - Required unless I(secrets) is used.
     secret_value:
         description:
             - Secret to be secured by keyvault.
+    secrets:
+        description:
+            - Manage many secrets in one task, as a dict of secret names to values, or as a list of dicts with C(name)
+              and C(value) keys. With state 'absent', a list of secret names is also accepted.
+            - Names and values must be strings or numbers; numbers are converted to strings, as Key Vault stores them.
+            - The secrets of the vault are listed once. Missing secrets are created, and secrets whose value or tags
+              differ are updated, up to I(max_concurrency) at a time.
+            - Mutually exclusive with I(secret_name).
+        version_added: "2.8"
+    max_concurrency:
+        description:
+            - Maximum number of secrets read or written at the same time with I(secrets).
+        type: int
+        default: 8
+        version_added: "2.8"
     state:
         description:
             - Assert the state of the subnet. Use 'present' to create or update a secret and
@@ -64,6 +79,13 @@ EXAMPLES = '''
         secret_name: MySecret
         keyvault_uri: https://contoso.vault.azure.net/
         state: absent
+
+    - name: Seed a vault, only writing the secrets that changed
+      azure_rm_keyvaultsecret:
+        keyvault_uri: https://contoso.vault.azure.net/
+        secrets:
+            DbPassword: "{{ db_password }}"
+            ApiKey: "{{ api_key }}"
 '''
 
 RETURN = '''
@@ -76,33 +98,110 @@ state:
           description: Secret resource path.
           type: str
           example: https://contoso.vault.azure.net/secrets/hello/e924f053839f4431b35bc54393f98423
+changes:
+    description: Secrets created, updated or deleted, in I(secrets) mode.
+    returned: when I(secrets) is set
+    type: complex
+    contains:
+        name:
+            description: Name of the secret.
+            returned: always
+            type: str
+            sample: DbPassword
+        action:
+            description: Change made to the secret, one of C(create), C(update) or C(delete).
+            returned: always
+            type: str
+            sample: update
+        failed:
+            description: Whether reading or writing the secret failed.
+            returned: always
+            type: bool
+        msg:
+            description: Error message of a failed change.
+            returned: when failed
+            type: str
 '''
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, run_concurrently
+from ansible.module_utils.six import binary_type, integer_types, string_types
+from ansible.module_utils._text import to_native
 
 try:
-    from azure.keyvault import KeyVaultClient, KeyVaultAuthentication, KeyVaultId
-    from azure.common.credentials import ServicePrincipalCredentials
+    from azure.keyvault import KeyVaultId
     from azure.keyvault.models.key_vault_error import KeyVaultErrorException
 except ImportError:
     # This is handled in azure_rm_common
     pass
 
 
+def normalize_secrets(secrets, state):
+    '''
+    Bring the accepted forms of the secrets option to one.
+
+    :param secrets: dict of names to values, or list of dicts with name and value, or, when state is absent, list of names
+    :param state: present or absent
+    :return: list of (name, value) tuples of strings, value None when state is absent and no value is given
+    :raises ValueError: when secrets is malformed
+    '''
+    if isinstance(secrets, dict):
+        items = sorted(secrets.items(), key=lambda item: to_native(item[0]))
+    elif isinstance(secrets, list):
+        items = []
+        for index, item in enumerate(secrets):
+            if isinstance(item, string_types) and state == 'absent':
+                items.append((item, None))
+            elif isinstance(item, dict) and item.get('name'):
+                items.append((item['name'], item.get('value')))
+            else:
+                raise ValueError('item {0} must be a dict with a name'.format(index))
+    else:
+        raise ValueError('must be a dict or a list')
+
+    result = []
+    names = set()
+    for name, value in items:
+        # Key Vault stores strings; YAML turns values like 12345 or yes into other scalars
+        if not is_scalar(name):
+            raise ValueError('the name of secret {0} must be a string or a number'.format(to_native(name)))
+        name = to_native(name)
+        if name.lower() in names:
+            raise ValueError('secret {0} is listed more than once'.format(name))
+        names.add(name.lower())
+        if value is None:
+            if state == 'present':
+                raise ValueError('secret {0} has no value'.format(name))
+        elif not is_scalar(value):
+            raise ValueError('the value of secret {0} must be a string or a number'.format(name))
+        else:
+            value = to_native(value)
+        result.append((name, value))
+    return result
+
+
+def is_scalar(value):
+    return isinstance(value, (string_types, binary_type, integer_types, float))
+
+
 class AzureRMKeyVaultSecret(AzureRMModuleBase):
     ''' Module that creates or deletes secrets in Azure KeyVault '''
 
     def __init__(self):
 
         self.module_arg_spec = dict(
-            secret_name=dict(type='str', required=True),
+            secret_name=dict(type='str'),
             secret_value=dict(type='str', no_log=True),
+            secrets=dict(type='raw', no_log=True),
+            max_concurrency=dict(type='int', default=8),
             keyvault_uri=dict(type='str', required=True),
             state=dict(type='str', default='present', choices=['present', 'absent'])
         )
 
-        required_if = [
-            ('state', 'present', ['secret_value'])
+        mutually_exclusive = [
+            ('secret_name', 'secrets')
+        ]
+        required_one_of = [
+            ('secret_name', 'secrets')
         ]
 
         self.results = dict(
@@ -112,6 +211,8 @@ class AzureRMKeyVaultSecret(AzureRMModuleBase):
 
         self.secret_name = None
         self.secret_value = None
+        self.secrets = None
+        self.max_concurrency = None
         self.keyvault_uri = None
         self.state = None
         self.data_creds = None
@@ -120,7 +221,8 @@ class AzureRMKeyVaultSecret(AzureRMModuleBase):
 
         super(AzureRMKeyVaultSecret, self).__init__(self.module_arg_spec,
                                                     supports_check_mode=True,
-                                                    required_if=required_if,
+                                                    mutually_exclusive=mutually_exclusive,
+                                                    required_one_of=required_one_of,
                                                     supports_tags=True)
 
     def exec_module(self, **kwargs):
@@ -128,25 +230,13 @@ class AzureRMKeyVaultSecret(AzureRMModuleBase):
         for key in list(self.module_arg_spec.keys()) + ['tags']:
             setattr(self, key, kwargs[key])
 
-        # Create KeyVault Client using KeyVault auth class and auth_callback
-        def auth_callback(server, resource, scope):
-            if self.credentials['client_id'] is None or self.credentials['secret'] is None:
-                self.fail('Please specify client_id, secret and tenant to access azure Key Vault.')
-
-            tenant = self.credentials.get('tenant')
-            if not self.credentials['tenant']:
-                tenant = "common"
-
-            authcredential = ServicePrincipalCredentials(
-                client_id=self.credentials['client_id'],
-                secret=self.credentials['secret'],
-                tenant=tenant,
-                resource="https://vault.azure.net")
+        if self.secret_name and self.state == 'present' and self.secret_value is None:
+            self.fail('Parameter error: secret_value is required to create secret {0}'.format(self.secret_name))
 
-            token = authcredential.token
-            return token['token_type'], token['access_token']
+        self.client = self.get_keyvault_client()
 
-        self.client = KeyVaultClient(KeyVaultAuthentication(auth_callback))
+        if self.secrets is not None:
+            return self.reconcile_secrets()
 
         results = dict()
         changed = False
@@ -185,6 +275,54 @@ class AzureRMKeyVaultSecret(AzureRMModuleBase):
 
         return self.results
 
+    def reconcile_secrets(self):
+        '''
+        Bring the secrets listed in secrets to their desired state with one listing of the vault. Only the values of
+        secrets that already exist are read, and only the secrets that differ are written.
+        '''
+        try:
+            desired = normalize_secrets(self.secrets, self.state)
+        except ValueError as exc:
+            self.fail('Parameter error: secrets {0}'.format(str(exc)))
+
+        try:
+            existing = dict()
+            for item in self.client.get_secrets(self.keyvault_uri):
+                existing[KeyVaultId.parse_secret_id(item.id).name.lower()] = item
+        except KeyVaultErrorException as exc:
+            self.fail('Error listing the secrets of {0} - {1}'.format(self.keyvault_uri, str(exc)))
+
+        changes = []
+        if self.state == 'absent':
+            changes = [dict(name=name, action='delete') for name, dummy in desired if name.lower() in existing]
+        else:
+            compared = [(name, value) for name, value in desired if name.lower() in existing]
+            current_values = run_concurrently(lambda item: self.client.get_secret(self.keyvault_uri, item[0], '').value,
+                                              compared, self.max_concurrency)
+            current_values = dict((name, outcome) for (name, dummy), outcome in zip(compared, current_values))
+            for name, value in desired:
+                if name.lower() not in existing:
+                    changes.append(dict(name=name, action='create', value=value, tags=self.tags))
+                    continue
+                current_value, exc = current_values[name]
+                if exc is not None:
+                    changes.append(dict(name=name, action='update', error=exc))
+                    continue
+                update_tags, tags = self.update_tags(existing[name.lower()].tags or dict())
+                if current_value != value or update_tags:
+                    changes.append(dict(name=name, action='update', value=value, tags=tags))
+
+        return self.apply_changes(changes, self.apply_change, 'secret', self.max_concurrency,
+                                  lambda change, dummy: dict(name=change['name'], action=change['action']))
+
+    def apply_change(self, change):
+        '''
+        Write one change computed by reconcile_secrets.
+        '''
+        if change['action'] == 'delete':
+            return self.delete_secret(change['name'])
+        return self.create_secret(change['name'], change['value'], change['tags'])
+
     def get_secret(self, name, version=''):
         ''' Gets an existing secret '''
         secret_bundle = self.client.get_secret(self.keyvault_uri, name, version)
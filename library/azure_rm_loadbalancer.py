@@ -332,6 +332,7 @@ changed:
 
 import random
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase, format_resource_id
+from ansible.module_utils.common.dict_comparison import diff_paths
 
 try:
     from msrestazure.tools import parse_resource_id
@@ -751,10 +752,11 @@ class AzureRMLoadBalancer(AzureRMModuleBase):
 
             if load_balancer:
                 new_dict = self.new_load_balancer.as_dict()
-                if (self.location != load_balancer['location'] or
-                        self.sku != load_balancer['sku']['name'] or
-                        not default_compare(new_dict, load_balancer, '')):
+                changes = diff_paths(new_dict, load_balancer)
+                if self.location != load_balancer['location'] or self.sku != load_balancer['sku']['name'] or changes:
                     changed = True
+                    if changes and self.module._diff:
+                        self.results['diff'] = dict(prepared='\n'.join(changes))
                 else:
                     changed = False
             else:
@@ -812,36 +814,6 @@ class AzureRMLoadBalancer(AzureRMModuleBase):
             self.fail("Error creating or updating load balancer {0} - {1}".format(self.name, str(exc)))
 
 
-def default_compare(new, old, path):
-    if isinstance(new, dict):
-        if not isinstance(old, dict):
-            return False
-        for k in new.keys():
-            if not default_compare(new.get(k), old.get(k, None), path + '/' + k):
-                return False
-        return True
-    elif isinstance(new, list):
-        if not isinstance(old, list) or len(new) != len(old):
-            return False
-        if isinstance(old[0], dict):
-            key = None
-            if 'id' in old[0] and 'id' in new[0]:
-                key = 'id'
-            elif 'name' in old[0] and 'name' in new[0]:
-                key = 'name'
-            new = sorted(new, key=lambda x: x.get(key, None))
-            old = sorted(old, key=lambda x: x.get(key, None))
-        else:
-            new = sorted(new)
-            old = sorted(old)
-        for i in range(len(new)):
-            if not default_compare(new[i], old[i], path + '/*'):
-                return False
-        return True
-    else:
-        return new == old
-
-
 def frontend_ip_configuration_id(subscription_id, resource_group_name, load_balancer_name, name):
     """Generate the id for a frontend ip configuration"""
     return '/subscriptions/{}/resourceGroups/{}/providers/Microsoft.Network/loadBalancers/{}/frontendIPConfigurations/{}'.format(
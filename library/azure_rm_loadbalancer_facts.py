@@ -158,21 +158,23 @@ class AzureRMLoadBalancerFacts(AzureRMModuleBase):
 
         if self.resource_group:
             try:
-                response = self.network_client.load_balancers.list(self.resource_group)
+                response = self.list_resources('Microsoft.Network/loadBalancers',
+                                               self.network_models.LoadBalancer,
+                                               lambda: self.network_client.load_balancers.list(self.resource_group),
+                                               resource_group=self.resource_group,
+                                               tags=self.tags)
             except AzureHttpError as exc:
                 self.fail('Failed to list items in resource group {} - {}'.format(self.resource_group, str(exc)))
         else:
             try:
-                response = self.network_client.load_balancers.list_all()
+                response = self.list_resources('Microsoft.Network/loadBalancers',
+                                               self.network_models.LoadBalancer,
+                                               self.network_client.load_balancers.list_all,
+                                               tags=self.tags)
             except AzureHttpError as exc:
                 self.fail('Failed to list all items - {}'.format(str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                results.append(self.serialize_obj(item, AZURE_OBJECT_CLASS))
-
-        return results
+        return [self.serialize_obj(item, AZURE_OBJECT_CLASS) for item in response]
 
 
 def main():
@@ -32,7 +32,7 @@ options:
     name:
         description:
             - Name of the managed disk.
-        required: true
+            - Required unless I(disks) is set.
     state:
         description:
             - Assert the state of the managed disk. Use C(present) to create or update a managed disk and 'absent' to delete a managed disk.
@@ -75,10 +75,30 @@ options:
         description:
             - Name of an existing virtual machine with which the disk is or will be associated, this VM should be in the same resource group.
             - To detach a disk from a vm, keep undefined.
+            - A free LUN is assigned to the disk when it is attached.
         version_added: 2.5
     tags:
         description:
             - Tags to assign to the managed disk.
+    disks:
+        description:
+            - Manage several disks of the resource group together, instead of the disk I(name).
+            - Each item is a dict with the C(name) of the disk. It can also set C(storage_account_type), C(create_option),
+              C(source_uri), C(source_resource_uri), C(os_type), C(disk_size_gb) and C(tags), which default to the options
+              of the same name (tags are merged with I(tags)), and the C(lun) to attach the disk at.
+            - The disks to create or update are written concurrently. They are then attached to I(managed_by), and
+              detached from the virtual machines they are attached to otherwise, with a single update of each virtual
+              machine. LUNs not given by C(lun) are the lowest free LUNs of I(managed_by).
+            - With I(state=absent), the disks are detached from their virtual machines, then deleted concurrently.
+            - Every disk is attempted; the task fails after reporting the changes that failed in C(changes).
+        type: list
+        version_added: "2.8"
+    max_concurrency:
+        description:
+            - Maximum number of disks, or virtual machines, updated at the same time with I(disks).
+        type: int
+        default: 8
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -110,6 +130,27 @@ EXAMPLES = '''
         resource_group: Testing
         disk_size_gb: 4
 
+    - name: Create disks and attach them to a VM with a single update
+      azure_rm_managed_disk:
+        resource_group: Testing
+        disks:
+          - name: data0
+          - name: data1
+            disk_size_gb: 256
+          - name: logs
+            lun: 10
+        storage_account_type: Premium_LRS
+        disk_size_gb: 128
+        managed_by: testvm001
+
+    - name: Detach and delete disks
+      azure_rm_managed_disk:
+        resource_group: Testing
+        disks:
+          - name: data0
+          - name: data1
+        state: absent
+
     - name: Delete managed disk
       azure_rm_manage_disk:
         name: mymanageddisk
@@ -131,12 +172,50 @@ changed:
     description: Whether or not the resource has changed
     returned: always
     type: bool
+disks:
+    description: Current state of each disk of I(disks), in the same order; C(None) for a disk that does not exist.
+    returned: when I(disks) is set
+    type: list
+changes:
+    description: Changes made to the disks of I(disks), in the order they were made.
+    returned: when I(disks) is set
+    type: complex
+    contains:
+        name:
+            description: Name of the disk.
+            returned: always
+            type: str
+            sample: data0
+        action:
+            description: Change made, one of C(create), C(update), C(detach), C(attach) or C(delete).
+            returned: always
+            type: str
+            sample: attach
+        managed_by:
+            description: Name of the virtual machine the disk is attached to or detached from.
+            returned: for C(attach) and C(detach)
+            type: str
+            sample: testvm001
+        lun:
+            description: LUN the disk is attached at.
+            returned: for C(attach), unless in check mode
+            type: int
+            sample: 2
+        failed:
+            description: Whether the change failed.
+            returned: always
+            type: bool
+        msg:
+            description: Error message of a failed change.
+            returned: when failed
+            type: str
 '''
 
+import itertools
 import re
 
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, run_concurrently
 try:
     from msrestazure.tools import parse_resource_id
     from msrestazure.azure_exceptions import CloudError
@@ -163,6 +242,16 @@ def managed_disk_to_dict(managed_disk):
     )
 
 
+# options of a disk that items of disks can set
+DISK_OPTIONS = ['storage_account_type', 'create_option', 'source_uri', 'source_resource_uri', 'os_type', 'disk_size_gb', 'tags']
+
+DISK_REQUIRED_IF = [
+    ('create_option', 'import', 'source_uri'),
+    ('create_option', 'copy', 'source_resource_uri'),
+    ('create_option', 'empty', 'disk_size_gb')
+]
+
+
 class AzureRMManagedDisk(AzureRMModuleBase):
     """Configuration class for an Azure RM Managed Disk resource"""
 
@@ -173,8 +262,7 @@ class AzureRMManagedDisk(AzureRMModuleBase):
                 required=True
             ),
             name=dict(
-                type='str',
-                required=True
+                type='str'
             ),
             state=dict(
                 type='str',
@@ -207,6 +295,13 @@ class AzureRMManagedDisk(AzureRMModuleBase):
             ),
             managed_by=dict(
                 type='str'
+            ),
+            disks=dict(
+                type='list'
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
             )
         )
         required_if = [
@@ -229,9 +324,13 @@ class AzureRMManagedDisk(AzureRMModuleBase):
         self.disk_size_gb = None
         self.tags = None
         self.managed_by = None
+        self.disks = None
+        self.max_concurrency = None
         super(AzureRMManagedDisk, self).__init__(
             derived_arg_spec=self.module_arg_spec,
             required_if=required_if,
+            required_one_of=[['name', 'disks']],
+            mutually_exclusive=[['name', 'disks']],
             supports_check_mode=True,
             supports_tags=True)
 
@@ -247,12 +346,15 @@ class AzureRMManagedDisk(AzureRMModuleBase):
         if not self.location:
             self.location = resource_group.location
 
+        if self.disks is not None:
+            return self.exec_disks()
+
         disk_instance = self.get_managed_disk()
         result = disk_instance
 
         # need create or update
         if self.state == 'present':
-            parameter = self.generate_managed_disk_property()
+            parameter = self.generate_managed_disk_property(dict((key, getattr(self, key)) for key in DISK_OPTIONS))
             if not disk_instance or self.is_different(disk_instance, parameter):
                 changed = True
                 if not self.check_mode:
@@ -281,71 +383,224 @@ class AzureRMManagedDisk(AzureRMModuleBase):
         self.results['state'] = result
         return self.results
 
-    def attach(self, vm_name, disk):
-        vm = self._get_vm(vm_name)
-        # find the lun
-        luns = ([d.lun for d in vm.storage_profile.data_disks]
-                if vm.storage_profile.data_disks else [])
-        lun = max(luns) + 1 if luns else 0
-
-        # prepare the data disk
-        params = self.compute_models.ManagedDiskParameters(id=disk.get('id'), storage_account_type=disk.get('storage_account_type'))
-        data_disk = self.compute_models.DataDisk(lun, self.compute_models.DiskCreateOptionTypes.attach, managed_disk=params)
-        vm.storage_profile.data_disks.append(data_disk)
-        self._update_vm(vm_name, vm)
+    def exec_disks(self):
+        """Manage the disks of the disks option together"""
+        specs = self.disk_specs()
+        names = [spec['name'] for spec in specs]
 
-    def detach(self, vm_name, disk):
-        vm = self._get_vm(vm_name)
-        leftovers = [d for d in vm.storage_profile.data_disks if d.name.lower() != disk.get('name').lower()]
-        if len(vm.storage_profile.data_disks) == len(leftovers):
-            self.fail("No disk with the name '{0}' was found".format(disk.get('name')))
-        vm.storage_profile.data_disks = leftovers
-        self._update_vm(vm_name, vm)
-
-    def _update_vm(self, name, params):
+        current = []
+        for name, (disk, exc) in zip(names, run_concurrently(self.fetch_managed_disk, names, self.max_concurrency)):
+            if exc is not None:
+                self.fail("Error getting the managed disk {0}: {1}".format(name, str(exc)))
+            current.append(disk)
+
+        writes = []
+        if self.state == 'present':
+            for spec, disk in zip(specs, current):
+                parameter = self.generate_managed_disk_property(spec)
+                if not disk or self.is_different(disk, parameter):
+                    writes.append(dict(name=spec['name'], action='update' if disk else 'create', parameter=parameter))
+
+        # disks attached to another virtual machine are detached from it, grouped by virtual machine; a virtual
+        # machine is identified by its resource group and name, the target being in the resource group of the disks
+        target = self.managed_by if self.state == 'present' else None
+        target_key = (self.resource_group.lower(), target.lower()) if target else None
+        detaches = dict()
+        attaches = []
+        for spec, disk in zip(specs, current):
+            attached_to = parse_resource_id(disk['managed_by']) if disk and disk.get('managed_by') else None
+            key = (attached_to.get('resource_group', self.resource_group), attached_to.get('name')) if attached_to else None
+            attached_key = (key[0].lower(), key[1].lower()) if key else None
+            if attached_key and attached_key != target_key:
+                detaches.setdefault(key, []).append(spec['name'])
+            if target_key and attached_key != target_key:
+                attaches.append(spec)
+        deletes = [spec['name'] for spec, disk in zip(specs, current) if disk and self.state == 'absent']
+
+        changes = [dict(name=write['name'], action=write['action']) for write in writes]
+        for (resource_group, vm_name), disk_names in sorted(detaches.items()):
+            changes.extend(dict(name=name, action='detach', managed_by=vm_name) for name in disk_names)
+        changes.extend(dict(name=spec['name'], action='attach', managed_by=target) for spec in attaches)
+        changes.extend(dict(name=name, action='delete') for name in deletes)
+
+        self.results['changed'] = len(changes) > 0
+        self.results['disks'] = current
+        if self.check_mode or not changes:
+            return self.report_changes(changes, [(None, None)] * len(changes), 'disk')
+
+        errors = dict()
+        written = dict()
+        for write, (disk, exc) in zip(writes, run_concurrently(lambda write: self.write_managed_disk(write['name'], write['parameter']),
+                                                               writes, self.max_concurrency)):
+            if exc is not None:
+                errors[(write['name'], write['action'])] = exc
+            else:
+                written[write['name']] = disk
+
+        detach_groups = sorted(detaches.items())
+        outcomes = run_concurrently(lambda group: self.update_vm_data_disks(group[0][0], group[0][1], detach=group[1]),
+                                    detach_groups, self.max_concurrency)
+        for (key, disk_names), (dummy, exc) in zip(detach_groups, outcomes):
+            for name in disk_names:
+                if exc is not None:
+                    errors[(name, 'detach')] = exc
+
+        luns = dict()
+        attach = []
+        attached_names = set(spec['name'] for spec in attaches)
+        failed_names = set(name for name, action in errors)
+        for spec, disk in zip(specs, current):
+            if spec['name'] not in attached_names:
+                continue
+            if spec['name'] in failed_names:
+                errors[(spec['name'], 'attach')] = Exception("Skipped attaching the disk, it could not be written or detached")
+                continue
+            attach.append((written.get(spec['name'], disk), spec['lun']))
+        if attach:
+            try:
+                luns = self.update_vm_data_disks(self.resource_group, target, attach=attach)
+            except Exception as exc:
+                for disk, dummy in attach:
+                    errors[(disk['name'], 'attach')] = exc
+
+        for name in list(deletes):
+            if (name, 'detach') in errors:
+                errors[(name, 'delete')] = Exception("Skipped deleting the disk, it could not be detached")
+                deletes.remove(name)
+        for name, (dummy, exc) in zip(deletes, run_concurrently(self.remove_managed_disk, deletes, self.max_concurrency)):
+            if exc is not None:
+                errors[(name, 'delete')] = exc
+
+        self.results['disks'] = []
+        for name, (disk, exc) in zip(names, run_concurrently(self.fetch_managed_disk, names, self.max_concurrency)):
+            self.results['disks'].append(disk)
+
+        def summarize(change, lun):
+            summary = dict(change)
+            if lun is not None:
+                summary['lun'] = lun
+            return summary
+
+        outcomes = []
+        for change in changes:
+            exc = errors.get((change['name'], change['action']))
+            lun = luns.get(change['name']) if change['action'] == 'attach' and exc is None else None
+            outcomes.append((lun, exc))
+        return self.report_changes(changes, outcomes, 'disk', summarize)
+
+    def disk_specs(self):
+        """Expand the items of disks with the options they default to"""
+        specs = []
+        for index, item in enumerate(self.disks):
+            if not isinstance(item, dict) or not item.get('name'):
+                self.fail("Parameter error: item {0} of disks must be a dict with a name".format(index))
+            unsupported = [key for key in item if key not in DISK_OPTIONS + ['name', 'lun']]
+            if unsupported:
+                self.fail("Parameter error: unsupported options {0} in item {1} of disks".format(', '.join(sorted(unsupported)), index))
+            spec = dict((key, item.get(key, getattr(self, key))) for key in DISK_OPTIONS)
+            if item.get('tags'):
+                spec['tags'] = dict(self.tags or dict())
+                spec['tags'].update(item['tags'])
+            for key, value, requirement in DISK_REQUIRED_IF:
+                if spec[key] == value and not spec[requirement]:
+                    self.fail("Parameter error: disk {0} has {1} {2} but no {3}".format(item['name'], key, value, requirement))
+            spec['name'] = item['name']
+            spec['lun'] = item.get('lun')
+            specs.append(spec)
+
+        names = [spec['name'].lower() for spec in specs]
+        if len(set(names)) != len(names):
+            self.fail("Parameter error: the names of disks must be unique")
+        luns = [spec['lun'] for spec in specs if spec['lun'] is not None]
+        if len(set(luns)) != len(luns):
+            self.fail("Parameter error: the luns of disks must be unique")
+        return specs
+
+    def attach(self, vm_name, disk):
         try:
-            poller = self.compute_client.virtual_machines.create_or_update(self.resource_group, name, params)
-            self.get_poller_result(poller)
+            self.update_vm_data_disks(self.resource_group, vm_name, attach=[(disk, None)])
         except Exception as exc:
-            self.fail("Error updating virtual machine {0} - {1}".format(name, str(exc)))
+            self.fail("Error updating virtual machine {0} - {1}".format(vm_name, str(exc)))
 
-    def _get_vm(self, name):
+    def detach(self, vm_name, disk):
         try:
-            return self.compute_client.virtual_machines.get(self.resource_group, name, expand='instanceview')
+            self.update_vm_data_disks(self.resource_group, vm_name, detach=[disk.get('name')])
         except Exception as exc:
-            self.fail("Error getting virtual machine {0} - {1}".format(name, str(exc)))
-
-    def generate_managed_disk_property(self):
+            self.fail("Error updating virtual machine {0} - {1}".format(vm_name, str(exc)))
+
+    def update_vm_data_disks(self, resource_group, vm_name, attach=None, detach=None):
+        """
+        Attach and detach managed disks with a single update of a virtual machine. Disks attached without a LUN get
+        the lowest free LUNs. Errors are raised, so this can run on a worker thread.
+
+        :param attach: list of (disk dict, LUN or None)
+        :param detach: list of disk names
+        :return: dict of the LUN of each attached disk, by name
+        """
+        vm = self.compute_client.virtual_machines.get(resource_group, vm_name)
+        data_disks = vm.storage_profile.data_disks or []
+        if detach:
+            detached = set(name.lower() for name in detach)
+            missing = detached - set(data_disk.name.lower() for data_disk in data_disks)
+            if missing:
+                raise Exception("No disk with the name '{0}' was found".format("', '".join(sorted(missing))))
+            data_disks = [data_disk for data_disk in data_disks if data_disk.name.lower() not in detached]
+
+        used = set(data_disk.lun for data_disk in data_disks)
+        luns = dict()
+        for disk, lun in attach or []:
+            if lun is not None:
+                if lun in used:
+                    raise Exception("LUN {0} of virtual machine {1} is already in use".format(lun, vm_name))
+                used.add(lun)
+                luns[disk.get('name')] = lun
+        free_luns = (lun for lun in itertools.count() if lun not in used)
+        for disk, lun in attach or []:
+            if lun is None:
+                luns[disk.get('name')] = next(free_luns)
+            params = self.compute_models.ManagedDiskParameters(id=disk.get('id'), storage_account_type=disk.get('storage_account_type'))
+            data_disks.append(self.compute_models.DataDisk(luns[disk.get('name')], self.compute_models.DiskCreateOptionTypes.attach,
+                                                           managed_disk=params))
+
+        vm.storage_profile.data_disks = data_disks
+        poller = self.compute_client.virtual_machines.create_or_update(resource_group, vm_name, vm)
+        self.get_poller_result(poller)
+        return luns
+
+    def generate_managed_disk_property(self, options):
         disk_params = {}
         creation_data = {}
         disk_params['location'] = self.location
-        disk_params['tags'] = self.tags
-        if self.storage_account_type:
-            storage_account_type = self.compute_models.DiskSku(self.storage_account_type)
+        disk_params['tags'] = options['tags']
+        if options['storage_account_type']:
+            storage_account_type = self.compute_models.DiskSku(options['storage_account_type'])
             disk_params['sku'] = storage_account_type
-        disk_params['disk_size_gb'] = self.disk_size_gb
+        disk_params['disk_size_gb'] = options['disk_size_gb']
         # TODO: Add support for EncryptionSettings
         creation_data['create_option'] = self.compute_models.DiskCreateOption.empty
-        if self.create_option == 'import':
+        if options['create_option'] == 'import':
             creation_data['create_option'] = self.compute_models.DiskCreateOption.import_enum
-            creation_data['source_uri'] = self.source_uri
-        elif self.create_option == 'copy':
+            creation_data['source_uri'] = options['source_uri']
+        elif options['create_option'] == 'copy':
             creation_data['create_option'] = self.compute_models.DiskCreateOption.copy
-            creation_data['source_resource_id'] = self.source_resource_uri
+            creation_data['source_resource_id'] = options['source_resource_uri']
         disk_params['creation_data'] = creation_data
         return disk_params
 
     def create_or_update_managed_disk(self, parameter):
         try:
-            poller = self.compute_client.disks.create_or_update(
-                self.resource_group,
-                self.name,
-                parameter)
-            aux = self.get_poller_result(poller)
-            return managed_disk_to_dict(aux)
+            return self.write_managed_disk(self.name, parameter)
         except CloudError as e:
             self.fail("Error creating the managed disk: {0}".format(str(e)))
 
+    def write_managed_disk(self, name, parameter):
+        poller = self.compute_client.disks.create_or_update(
+            self.resource_group,
+            name,
+            parameter)
+        aux = self.get_poller_result(poller)
+        return managed_disk_to_dict(aux)
+
     # This method accounts for the difference in structure between the
     # Azure retrieved disk and the parameters for the new disk to be created.
     def is_different(self, found_disk, new_disk):
@@ -364,13 +619,16 @@ class AzureRMManagedDisk(AzureRMModuleBase):
 
     def delete_managed_disk(self):
         try:
-            poller = self.compute_client.disks.delete(
-                self.resource_group,
-                self.name)
-            return self.get_poller_result(poller)
+            return self.remove_managed_disk(self.name)
         except CloudError as e:
             self.fail("Error deleting the managed disk: {0}".format(str(e)))
 
+    def remove_managed_disk(self, name):
+        poller = self.compute_client.disks.delete(
+            self.resource_group,
+            name)
+        return self.get_poller_result(poller)
+
     def get_managed_disk(self):
         try:
             resp = self.compute_client.disks.get(
@@ -380,6 +638,15 @@ class AzureRMManagedDisk(AzureRMModuleBase):
         except CloudError as e:
             self.log('Did not find managed disk')
 
+    def fetch_managed_disk(self, name):
+        """Get a disk of the resource group as a dict, None if it does not exist. Errors are raised."""
+        try:
+            return managed_disk_to_dict(self.compute_client.disks.get(self.resource_group, name))
+        except CloudError as exc:
+            if exc.status_code == 404:
+                return None
+            raise
+
 
 def main():
     """Main execution"""
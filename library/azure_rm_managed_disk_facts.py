@@ -167,15 +167,14 @@ class AzureRMManagedDiskFacts(AzureRMModuleBase):
     def list_items(self):
         """Get all managed disks"""
         try:
-            response = self.compute_client.disks.list()
+            response = self.list_resources('Microsoft.Compute/disks',
+                                           self.compute_models.Disk,
+                                           self.compute_client.disks.list,
+                                           tags=self.tags)
         except CloudError as exc:
             self.fail('Failed to list all items - {}'.format(str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                results.append(managed_disk_to_dict(item))
-        return results
+        return [managed_disk_to_dict(item) for item in response]
 
 
 def main():
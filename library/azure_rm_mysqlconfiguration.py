@@ -71,7 +71,6 @@ id:
             ent_scheduler"
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -191,8 +190,7 @@ class AzureRMConfigurations(AzureRMModuleBase):
             self.delete_configuration()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_configuration():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_configuration, 'configuration')
         else:
             self.log("Configuration instance unchanged")
             self.results['changed'] = False
@@ -91,7 +91,6 @@ name:
     sample: db1
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -221,8 +220,7 @@ class AzureRMDatabases(AzureRMModuleBase):
             self.delete_mysqldatabase()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_mysqldatabase():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_mysqldatabase, 'mysqldatabase')
         else:
             self.log("MySQL Database instance unchanged")
             self.results['changed'] = False
@@ -133,7 +133,6 @@ fully_qualified_domain_name:
     sample: mysqlsrv1b6dd89593.mysql.database.azure.com
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -292,8 +291,7 @@ class AzureRMServers(AzureRMModuleBase):
             self.delete_mysqlserver()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_mysqlserver():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_mysqlserver, 'mysqlserver')
         else:
             self.log("MySQL Server instance unchanged")
             self.results['changed'] = False
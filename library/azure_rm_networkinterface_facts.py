@@ -177,30 +177,27 @@ class AzureRMNetworkInterfaceFacts(AzureRMModuleBase):
     def list_resource_group(self):
         self.log('List for resource group')
         try:
-            response = self.network_client.network_interfaces.list(self.resource_group)
+            response = self.list_resources('Microsoft.Network/networkInterfaces',
+                                           self.network_models.NetworkInterface,
+                                           lambda: self.network_client.network_interfaces.list(self.resource_group),
+                                           resource_group=self.resource_group,
+                                           tags=self.tags)
         except Exception as exc:
             self.fail("Error listing by resource group {0} - {1}".format(self.resource_group, str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                nic = self.serialize_obj(item, AZURE_OBJECT_CLASS)
-                results.append(nic)
-        return results
+        return [self.serialize_obj(item, AZURE_OBJECT_CLASS) for item in response]
 
     def list_all(self):
         self.log('List all')
         try:
-            response = self.network_client.network_interfaces.list_all()
+            response = self.list_resources('Microsoft.Network/networkInterfaces',
+                                           self.network_models.NetworkInterface,
+                                           self.network_client.network_interfaces.list_all,
+                                           tags=self.tags)
         except Exception as exc:
             self.fail("Error listing all - {0}".format(str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                nic = self.serialize_obj(item, AZURE_OBJECT_CLASS)
-                results.append(nic)
-        return results
+        return [self.serialize_obj(item, AZURE_OBJECT_CLASS) for item in response]
 
 
 def main():
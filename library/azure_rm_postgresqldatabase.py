@@ -91,7 +91,6 @@ name:
     sample: db1
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -221,8 +220,7 @@ class AzureRMDatabases(AzureRMModuleBase):
             self.delete_postgresqldatabase()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_postgresqldatabase():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_postgresqldatabase, 'postgresqldatabase')
         else:
             self.log("PostgreSQL Database instance unchanged")
             self.results['changed'] = False
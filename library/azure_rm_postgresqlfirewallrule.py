@@ -33,7 +33,7 @@ options:
     name:
         description:
             - The name of the PostgreSQL firewall rule.
-        required: True
+            - Required unless I(rules) is set.
     start_ip_address:
         description:
             - The start IP address of the PostgreSQL firewall rule. Must be IPv4 format.
@@ -47,6 +47,35 @@ options:
         choices:
             - absent
             - present
+    rules:
+        description:
+            - Manage the firewall rules of the server as a set, instead of the rule I(name).
+            - Each item is a dict with a C(start_ip_address), and optionally an C(end_ip_address), which defaults to
+              C(start_ip_address), and a C(name). A rule without a name is satisfied by any existing rule with the
+              same range, and is otherwise created under a name derived from its range, e.g. C(10.0.0.1-10.0.0.9).
+            - The rules of the server are listed once and only the rules that differ are written, concurrently.
+            - With I(state=absent) the listed rules are deleted.
+        type: list
+        version_added: "2.8"
+    purge_rules:
+        description:
+            - With I(rules) and I(state=present), delete the rules of the server that are not listed.
+        type: bool
+        default: no
+        version_added: "2.8"
+    merge_ranges:
+        description:
+            - With I(rules), merge overlapping and adjacent ranges of the rules without a name before comparing them.
+            - The range C(0.0.0.0) - C(0.0.0.0), standing for Azure-internal addresses, is never merged.
+        type: bool
+        default: no
+        version_added: "2.8"
+    max_concurrency:
+        description:
+            - Maximum number of I(rules) writes in flight at the same time.
+        type: int
+        default: 8
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -64,6 +93,20 @@ EXAMPLES = '''
       name: rule1
       start_ip_address: 10.0.0.16
       end_ip_address: 10.0.0.18
+
+  - name: Allow a set of addresses, removing any other rule
+    azure_rm_postgresqlfirewallrule:
+      resource_group: TestGroup
+      server_name: testserver
+      rules:
+        - start_ip_address: 0.0.0.0
+        - start_ip_address: 10.0.0.17
+          end_ip_address: 10.0.0.20
+        - name: office
+          start_ip_address: 203.0.113.0
+          end_ip_address: 203.0.113.255
+      purge_rules: yes
+      merge_ranges: yes
 '''
 
 RETURN = '''
@@ -74,9 +117,41 @@ id:
     type: str
     sample: "/subscriptions/ffffffff-ffff-ffff-ffff-ffffffffffff/resourceGroups/TestGroup/providers/Microsoft.DBforPostgreSQL/servers/testserver/firewallRule
             s/rule1"
+changes:
+    description: Rules created, updated or deleted, in I(rules) mode.
+    returned: when I(rules) is set
+    type: complex
+    contains:
+        name:
+            description: Name of the rule.
+            returned: always
+            type: str
+            sample: 10.0.0.17-10.0.0.20
+        action:
+            description: Change made to the rule, one of C(create), C(update) or C(delete).
+            returned: always
+            type: str
+            sample: create
+        start_ip_address:
+            description: Start IP address of the rule.
+            returned: always
+            type: str
+            sample: 10.0.0.17
+        end_ip_address:
+            description: End IP address of the rule.
+            returned: always
+            type: str
+            sample: 10.0.0.20
+        failed:
+            description: Whether the change failed.
+            returned: always
+            type: bool
+        msg:
+            description: Error message of a failed change.
+            returned: when failed
+            type: str
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -107,8 +182,7 @@ class AzureRMFirewallRules(AzureRMModuleBase):
                 required=True
             ),
             name=dict(
-                type='str',
-                required=True
+                type='str'
             ),
             start_ip_address=dict(
                 type='str'
@@ -120,6 +194,21 @@ class AzureRMFirewallRules(AzureRMModuleBase):
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            rules=dict(
+                type='list'
+            ),
+            purge_rules=dict(
+                type='bool',
+                default=False
+            ),
+            merge_ranges=dict(
+                type='bool',
+                default=False
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
             )
         )
 
@@ -128,6 +217,10 @@ class AzureRMFirewallRules(AzureRMModuleBase):
         self.name = None
         self.start_ip_address = None
         self.end_ip_address = None
+        self.rules = None
+        self.purge_rules = None
+        self.merge_ranges = None
+        self.max_concurrency = None
 
         self.results = dict(changed=False)
         self.state = None
@@ -135,7 +228,9 @@ class AzureRMFirewallRules(AzureRMModuleBase):
 
         super(AzureRMFirewallRules, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                    supports_check_mode=True,
-                                                   supports_tags=False)
+                                                   supports_tags=False,
+                                                   required_one_of=[['name', 'rules']],
+                                                   mutually_exclusive=[['name', 'rules']])
 
     def exec_module(self, **kwargs):
         """Main module execution method"""
@@ -149,6 +244,10 @@ class AzureRMFirewallRules(AzureRMModuleBase):
 
         resource_group = self.get_resource_group(self.resource_group)
 
+        if self.rules is not None:
+            return self.reconcile_firewall_rules(self.postgresql_client.firewall_rules, self.server_name, self.rules, self.purge_rules,
+                                                 self.merge_ranges, self.max_concurrency)
+
         old_response = self.get_firewallrule()
 
         if not old_response:
@@ -192,8 +291,7 @@ class AzureRMFirewallRules(AzureRMModuleBase):
             self.delete_firewallrule()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_firewallrule():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_firewallrule, 'firewallrule')
         else:
             self.log("PostgreSQL firewall rule instance unchanged")
             self.results['changed'] = False
@@ -132,7 +132,6 @@ fully_qualified_domain_name:
     sample: postgresqlsrv1b6dd89593.postgresql.database.azure.com
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -291,8 +290,7 @@ class AzureRMServers(AzureRMModuleBase):
             self.delete_postgresqlserver()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_postgresqlserver():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_postgresqlserver, 'postgresqlserver')
         else:
             self.log("PostgreSQL Server instance unchanged")
             self.results['changed'] = False
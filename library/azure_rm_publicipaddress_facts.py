@@ -137,44 +137,40 @@ class AzureRMPublicIPFacts(AzureRMModuleBase):
             pass
 
         if item and self.has_tags(item.tags, self.tags):
-            pip = self.serialize_obj(item, AZURE_OBJECT_CLASS)
-            pip['name'] = item.name
-            pip['type'] = item.type
-            result = [pip]
+            result = [self.serialize_pip(item)]
 
         return result
 
     def list_resource_group(self):
         self.log('List items in resource groups')
         try:
-            response = self.network_client.public_ip_addresses.list(self.resource_group)
+            response = self.list_resources('Microsoft.Network/publicIPAddresses',
+                                           self.network_models.PublicIPAddress,
+                                           lambda: self.network_client.public_ip_addresses.list(self.resource_group),
+                                           resource_group=self.resource_group,
+                                           tags=self.tags)
         except AzureHttpError as exc:
             self.fail("Error listing items in resource groups {0} - {1}".format(self.resource_group, str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                pip = self.serialize_obj(item, AZURE_OBJECT_CLASS)
-                pip['name'] = item.name
-                pip['type'] = item.type
-                results.append(pip)
-        return results
+        return [self.serialize_pip(item) for item in response]
 
     def list_all(self):
         self.log('List all items')
         try:
-            response = self.network_client.public_ip_addresses.list_all()
+            response = self.list_resources('Microsoft.Network/publicIPAddresses',
+                                           self.network_models.PublicIPAddress,
+                                           self.network_client.public_ip_addresses.list_all,
+                                           tags=self.tags)
         except AzureHttpError as exc:
             self.fail("Error listing all items - {0}".format(str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                pip = self.serialize_obj(item, AZURE_OBJECT_CLASS)
-                pip['name'] = item.name
-                pip['type'] = item.type
-                results.append(pip)
-        return results
+        return [self.serialize_pip(item) for item in response]
+
+    def serialize_pip(self, item):
+        pip = self.serialize_obj(item, AZURE_OBJECT_CLASS)
+        pip['name'] = item.name
+        pip['type'] = item.type
+        return pip
 
 
 def main():
@@ -30,7 +30,7 @@ options:
   api_version:
     description:
       - Specific API version to be used.
-    required: yes
+      - Required unless every item of I(resources) specifies its own.
   provider:
     description:
       - Provider type.
@@ -76,6 +76,11 @@ options:
   idempotency:
     description:
       - If enabled, idempotency check will be done by using GET method first and then comparing with I(body)
+      - Only the values set in I(body) are compared. Lists of dicts whose items all have an C(id), or else a C(name), are matched
+        by that key regardless of order, and only the keys set on the items of I(body) are compared. An empty list or dict in I(body)
+        matches a value missing from the response. Other lists must be equal, in the same order.
+      - Before Ansible 2.8 a list in I(body) had to equal the list of the response exactly, so C(changed) can now be C(false) where it
+        used to be C(true), e.g. when the items of a list only set some of their properties.
     default: no
     type: bool
   state:
@@ -85,6 +90,20 @@ options:
     choices:
         - absent
         - present
+  resources:
+    description:
+      - List of resources to process in a single task, sharing one authenticated client.
+      - Each item accepts I(url), I(provider), I(resource_group), I(resource_type), I(resource_name), I(subresource), I(api_version),
+        I(body), I(method), I(status_code), I(idempotency) and I(state). Values not set on an item are taken from the module options.
+      - When set, results are returned per item in I(results) rather than in I(response).
+    type: list
+    version_added: "2.8"
+  max_concurrency:
+    description:
+      - Maximum number of I(resources) items processed at the same time.
+    type: int
+    default: 8
+    version_added: "2.8"
 
 extends_documentation_fragment:
   - azure
@@ -103,18 +122,58 @@ EXAMPLES = '''
       resource_name: "{{ scaleset_name }}"
       api_version: "2017-12-01"
       body: "{{ body }}"
+
+  - name: Create several network security groups in one task
+    azure_rm_resource:
+      resource_group: "{{ resource_group }}"
+      provider: network
+      resource_type: networksecuritygroups
+      api_version: "2018-02-01"
+      idempotency: yes
+      resources:
+        - resource_name: nsg-frontend
+          body:
+            location: eastus
+        - resource_name: nsg-backend
+          body:
+            location: eastus
 '''
 
 RETURN = '''
 response:
     description: Response specific to resource type.
-    returned: always
+    returned: when I(resources) is not set
     type: dict
+results:
+    description: Outcome of every item of I(resources), in the same order.
+    returned: when I(resources) is set
+    type: complex
+    contains:
+        url:
+            description: Resource URL.
+            type: str
+            sample: /subscriptions/xxxx/resourceGroups/myrg/providers/Microsoft.Network/networkSecurityGroups/nsg-frontend
+        changed:
+            description: Whether a request changing the resource was sent.
+            type: bool
+        response:
+            description: Response specific to resource type.
+            type: dict
+        failed:
+            description: Whether processing of the item failed.
+            type: bool
+        msg:
+            description: Error message of a failed item.
+            type: str
+        elapsed:
+            description: Time in seconds spent processing the item.
+            type: float
+            sample: 1.382
 '''
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase
-from ansible.module_utils.azure_rm_common_rest import GenericRestClient
-from ansible.module_utils.common.dict_transformations import dict_merge
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, AZURE_MAX_CONCURRENCY, run_concurrently
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient, DEFAULT_POOL_SIZE
+from ansible.module_utils.common.dict_comparison import diff_paths
 
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -126,6 +185,24 @@ except ImportError:
     # This is handled in azure_rm_common
     pass
 
+import time
+
+
+resource_spec = dict(
+    url=dict(type='str'),
+    provider=dict(type='str'),
+    resource_group=dict(type='str'),
+    resource_type=dict(type='str'),
+    resource_name=dict(type='str'),
+    subresource=dict(type='list'),
+    api_version=dict(type='str'),
+    method=dict(type='str', choices=["GET", "PUT", "POST", "HEAD", "PATCH", "DELETE", "MERGE"]),
+    body=dict(type='raw'),
+    status_code=dict(type='list'),
+    idempotency=dict(type='bool'),
+    state=dict(type='str', choices=['present', 'absent'])
+)
+
 
 class AzureRMResource(AzureRMModuleBase):
     def __init__(self):
@@ -152,8 +229,7 @@ class AzureRMResource(AzureRMModuleBase):
                 default=[]
             ),
             api_version=dict(
-                type='str',
-                required=True
+                type='str'
             ),
             method=dict(
                 type='str',
@@ -175,6 +251,15 @@ class AzureRMResource(AzureRMModuleBase):
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            resources=dict(
+                type='list',
+                elements='dict',
+                options=resource_spec
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=AZURE_MAX_CONCURRENCY
             )
         )
         # store the results of the module operation
@@ -197,6 +282,8 @@ class AzureRMResource(AzureRMModuleBase):
         self.idempotency = False
         self.state = None
         self.body = None
+        self.resources = None
+        self.max_concurrency = None
         super(AzureRMResource, self).__init__(self.module_arg_spec, supports_tags=False)
 
     def exec_module(self, **kwargs):
@@ -205,65 +292,127 @@ class AzureRMResource(AzureRMModuleBase):
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
-        if self.state == 'absent':
-            self.method = 'DELETE'
-            self.status_code.append(204)
-
-        if self.url is None:
-            orphan = None
-            rargs = dict()
-            rargs['subscription'] = self.subscription_id
-            rargs['resource_group'] = self.resource_group
-            if not (self.provider is None or self.provider.lower().startswith('.microsoft')):
-                rargs['namespace'] = "Microsoft." + self.provider
-            else:
-                rargs['namespace'] = self.provider
-
-            if self.resource_type is not None and self.resource_name is not None:
-                rargs['type'] = self.resource_type
-                rargs['name'] = self.resource_name
-                for i in range(len(self.subresource)):
-                    resource_ns = self.subresource[i].get('namespace', None)
-                    resource_type = self.subresource[i].get('type', None)
-                    resource_name = self.subresource[i].get('name', None)
-                    if resource_type is not None and resource_name is not None:
-                        rargs['child_namespace_' + str(i + 1)] = resource_ns
-                        rargs['child_type_' + str(i + 1)] = resource_type
-                        rargs['child_name_' + str(i + 1)] = resource_name
-                    else:
-                        orphan = resource_type
-            else:
-                orphan = self.resource_type
+        if self.resources is None:
+            if not self.api_version:
+                self.fail("Parameter error: api_version is required unless every item of resources specifies it.")
+            outcome = self.apply_resource(self.get_resource_spec(dict()))
+            self.results['response'] = outcome['response']
+            self.results['changed'] = outcome['changed']
+            if outcome['changes'] and self.module._diff:
+                self.results['diff'] = dict(prepared='\n'.join(outcome['changes']))
+            return self.results
+
+        self.mgmt_client.configure_connection(pool_size=max(self.max_concurrency, DEFAULT_POOL_SIZE))
+        specs = [self.get_resource_spec(item) for item in self.resources]
+        for index, spec in enumerate(specs):
+            if not spec['api_version']:
+                self.fail("Parameter error: api_version is required for item {0} of resources.".format(index))
+
+        self.results.pop('response')
+        self.results['results'] = [outcome for outcome, dummy in run_concurrently(self.apply_resource_timed, specs, self.max_concurrency)]
+        self.results['changed'] = any(outcome['changed'] for outcome in self.results['results'])
+        failed = [outcome for outcome in self.results['results'] if outcome['failed']]
+        if failed:
+            self.fail("Failed to process {0} of {1} resources".format(len(failed), len(specs)), **self.results)
 
-            self.url = resource_id(**rargs)
+        return self.results
+
+    def get_resource_spec(self, item):
+        '''
+        Build the settings of a single request, falling back to module options for values the item does not set.
+
+        :param item: dict of per-item settings
+        :return: dict
+        '''
+        spec = dict()
+        for key in resource_spec:
+            value = item.get(key)
+            spec[key] = value if value is not None else getattr(self, key)
+        spec['status_code'] = list(spec['status_code'])
+        spec['subresource'] = spec['subresource'] or []
+        return spec
+
+    def get_resource_url(self, spec):
+        if spec['url'] is not None:
+            return spec['url']
+
+        orphan = None
+        rargs = dict()
+        rargs['subscription'] = self.subscription_id
+        rargs['resource_group'] = spec['resource_group']
+        if not (spec['provider'] is None or spec['provider'].lower().startswith('.microsoft')):
+            rargs['namespace'] = "Microsoft." + spec['provider']
+        else:
+            rargs['namespace'] = spec['provider']
+
+        if spec['resource_type'] is not None and spec['resource_name'] is not None:
+            rargs['type'] = spec['resource_type']
+            rargs['name'] = spec['resource_name']
+            for i in range(len(spec['subresource'])):
+                resource_ns = spec['subresource'][i].get('namespace', None)
+                resource_type = spec['subresource'][i].get('type', None)
+                resource_name = spec['subresource'][i].get('name', None)
+                if resource_type is not None and resource_name is not None:
+                    rargs['child_namespace_' + str(i + 1)] = resource_ns
+                    rargs['child_type_' + str(i + 1)] = resource_type
+                    rargs['child_name_' + str(i + 1)] = resource_name
+                else:
+                    orphan = resource_type
+        else:
+            orphan = spec['resource_type']
+
+        url = resource_id(**rargs)
+
+        if orphan is not None:
+            url += '/' + orphan
+        return url
+
+    def apply_resource(self, spec):
+        '''
+        Send the request described by spec, preceded by an idempotency check when requested.
+
+        Called from worker threads in batch mode, so errors are raised rather than reported through fail().
+
+        :param spec: dict as returned by get_resource_spec
+        :return: dict with url, response, changed and the paths of the changes found by the idempotency check
+        '''
+        url = self.get_resource_url(spec)
+        method = spec['method']
+        status_code = spec['status_code']
+        if spec['state'] == 'absent':
+            method = 'DELETE'
+            status_code.append(204)
 
-            if orphan is not None:
-                self.url += '/' + orphan
         query_parameters = {}
-        query_parameters['api-version'] = self.api_version
+        query_parameters['api-version'] = spec['api_version']
 
         header_parameters = {}
         header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         needs_update = True
         response = None
+        changes = None
 
-        if self.idempotency:
-            original = self.mgmt_client.query(self.url, "GET", query_parameters, None, None, [200, 404])
+        if spec['idempotency']:
+            original = self.mgmt_client.query(url, "GET", query_parameters, None, None, [200, 404], stream=True)
 
             if original.status_code == 404:
-                if self.state == 'absent':
+                original.close()
+                if spec['state'] == 'absent':
                     needs_update = False
             else:
                 try:
-                    response = json.loads(original.text)
-                    needs_update = (dict_merge(response, self.body) != response)
+                    response = self.mgmt_client.read_json(original)
+                    # list order is significant in arbitrary resource bodies; see the idempotency option for how
+                    # this differs from the former dict_merge(response, body) != response
+                    changes = diff_paths(spec['body'], response, sort_scalar_lists=False)
+                    needs_update = len(changes) > 0
                 except:
                     pass
 
         if needs_update:
-            response = self.mgmt_client.query(self.url, self.method, query_parameters, header_parameters, self.body, self.status_code)
-            if self.state == 'present':
+            response = self.mgmt_client.query(url, method, query_parameters, header_parameters, spec['body'], status_code)
+            if spec['state'] == 'present':
                 try:
                     response = json.loads(response.text)
                 except:
@@ -271,10 +420,19 @@ class AzureRMResource(AzureRMModuleBase):
             else:
                 response = None
 
-        self.results['response'] = response
-        self.results['changed'] = needs_update
-
-        return self.results
+        return dict(url=url, response=response, changed=needs_update, changes=changes)
+
+    def apply_resource_timed(self, spec):
+        start = time.time()
+        try:
+            spec['url'] = self.get_resource_url(spec)
+            outcome = self.apply_resource(spec)
+            outcome.pop('changes')
+            outcome['failed'] = False
+        except Exception as exc:
+            outcome = dict(url=spec['url'], response=None, changed=False, failed=True, msg=str(exc))
+        outcome['elapsed'] = round(time.time() - start, 3)
+        return outcome
 
 
 def main():
@@ -57,6 +57,34 @@ options:
       name:
         description:
           - Subresource name
+  return_items:
+    description:
+      - Follow C(nextLink) of a list response and return the entries of every page in C(items), instead of
+        the first page in C(response).
+    type: bool
+    default: no
+    version_added: "2.8"
+  max_items:
+    description:
+      - Maximum number of items to return from a list response, at least 1.
+      - Paging stops as soon as this many items have been collected.
+      - Only used with I(return_items=yes).
+    type: int
+    version_added: "2.8"
+  fields:
+    description:
+      - Return only these fields of every item.
+      - Nested fields are selected with a dotted path, e.g. C(properties.provisioningState).
+      - Only used with I(return_items=yes).
+    type: list
+    version_added: "2.8"
+  prefetch_pages:
+    description:
+      - Fetch the next page of a list response in the background while the current one is processed.
+      - Only used with I(return_items=yes).
+    type: bool
+    default: no
+    version_added: "2.8"
 
 extends_documentation_fragment:
   - azure
@@ -74,13 +102,33 @@ EXAMPLES = '''
       resource_type: virtualmachinescalesets
       resource_name: "{{ scaleset_name }}"
       api_version: "2017-12-01"
+
+  - name: Get name and provisioning state of up to 100 network interfaces in the subscription
+    azure_rm_resource_facts:
+      provider: network
+      resource_type: networkInterfaces
+      api_version: "2018-08-01"
+      return_items: yes
+      max_items: 100
+      fields:
+        - name
+        - properties.provisioningState
 '''
 
 RETURN = '''
 response:
-    description: Response specific to resource type.
-    returned: always
-    type: dict
+    description:
+        - Response specific to resource type, in a list of one element.
+        - For list operations, the first page, with its C(value) and C(nextLink).
+    returned: when I(return_items=no)
+    type: list
+items:
+    description:
+        - For list operations, the entries of every page, following C(nextLink).
+        - For other operations, the response in a list of one element.
+    returned: when I(return_items=yes)
+    type: list
+    version_added: "2.8"
 '''
 
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
@@ -90,7 +138,6 @@ try:
     from msrestazure.azure_exceptions import CloudError
     from msrest.service_client import ServiceClient
     from msrestazure.tools import resource_id, is_valid_resource_id
-    import json
 
 except ImportError:
     # This is handled in azure_rm_common
@@ -129,6 +176,20 @@ class AzureRMResourceFacts(AzureRMModuleBase):
             api_version=dict(
                 type='str',
                 required=True
+            ),
+            return_items=dict(
+                type='bool',
+                default=False
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            fields=dict(
+                type='list'
+            ),
+            prefetch_pages=dict(
+                type='bool',
+                default=False
             )
         )
         # store the results of the module operation
@@ -143,11 +204,17 @@ class AzureRMResourceFacts(AzureRMModuleBase):
         self.resource_type = None
         self.resource_name = None
         self.subresource = []
+        self.return_items = False
+        self.max_items = None
+        self.fields = None
+        self.prefetch_pages = False
         super(AzureRMResourceFacts, self).__init__(self.module_arg_spec, supports_tags=False)
 
     def exec_module(self, **kwargs):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
+        if self.max_items is not None and self.max_items < 1:
+            self.fail("Parameter error: max_items must be at least 1")
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
 
@@ -190,19 +257,61 @@ class AzureRMResourceFacts(AzureRMModuleBase):
         header_parameters = {}
         header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
-        response = self.mgmt_client.query(self.url, "GET", query_parameters, header_parameters, None, [200, 404])
+        if not self.return_items:
+            response = self.mgmt_client.query(self.url, "GET", query_parameters, header_parameters, None, [200, 404], stream=True)
+
+            try:
+                response = self.mgmt_client.read_json(response)
+                if response is list:
+                    self.results['response'] = response
+                else:
+                    self.results['response'] = [response]
+            except:
+                self.results['response'] = []
 
+            return self.results
+
+        del self.results['response']
+        self.results['items'] = []
+        items = self.mgmt_client.iter_items(self.url, query_parameters, header_parameters, [200, 404], self.prefetch_pages)
         try:
-            response = json.loads(response.text)
-            if response is list:
-                self.results['response'] = response
-            else:
-                self.results['response'] = [response]
-        except:
-            self.results['response'] = []
+            for item in items:
+                self.results['items'].append(self.project(item) if self.fields else item)
+                if self.max_items is not None and len(self.results['items']) >= self.max_items:
+                    break
+        except ValueError:
+            # body is not JSON
+            pass
+        finally:
+            items.close()
 
         return self.results
 
+    def project(self, item):
+        '''
+        Keep only the requested fields of an item, preserving the nesting of dotted paths.
+
+        :param item: dict
+        :return: dict
+        '''
+        if not isinstance(item, dict):
+            return item
+        result = dict()
+        for field in self.fields:
+            path = field.split('.')
+            value = item
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+                if value is None:
+                    break
+            if value is None:
+                continue
+            target = result
+            for key in path[:-1]:
+                target = target.setdefault(key, dict())
+            target[path[-1]] = value
+        return result
+
 
 def main():
     AzureRMResourceFacts()
@@ -374,58 +374,92 @@ def validate_rule(self, rule, rule_type=None):
     check_plural('destination_port_range', 'destination_port_ranges')
 
 
+# rule fields compared by their string value, and list fields compared regardless of order
+RULE_SCALAR_FIELDS = ['source_port_range', 'destination_port_range', 'source_address_prefix', 'destination_address_prefix']
+RULE_LIST_FIELDS = ['source_address_prefixes', 'destination_address_prefixes', 'source_port_ranges', 'destination_port_ranges']
+
+# up to this many rule changes are applied through the security_rules endpoints, one rule at a time;
+# larger changes are sent as a single update of the whole security group
+RULE_UPDATE_THRESHOLD = 5
+
+
+def normalize_rule(rule):
+    '''
+    Reduce a rule dict to a hashable value, equal for two rules exactly when they are equivalent.
+
+    :param rule: rule dict
+    :return: tuple
+    '''
+    return (
+        rule['name'],
+        rule.get('description', None),
+        rule['protocol'],
+        rule['access'],
+        rule['priority'],
+        rule['direction'],
+        tuple(str(rule[field]) for field in RULE_SCALAR_FIELDS),
+        tuple(frozenset(rule.get(field) or []) for field in RULE_LIST_FIELDS)
+    )
+
+
+def diff_rules(old_list, new_list, purge_list):
+    '''
+    Compare the rules of a security group to the requested rules in linear time.
+
+    :param old_list: list of existing rule dicts
+    :param new_list: list of requested rule dicts
+    :param purge_list: whether existing rules that are not requested are removed
+    :return: tuple (added, removed, updated, rules) of the names of added, removed and updated rules and the
+             resulting list of rule dicts
+    '''
+    old_rules = dict((to_native(rule['name']), rule) for rule in old_list or [])
+    rules = list(new_list or [])
+    new_names = set(to_native(rule['name']) for rule in rules)
+
+    added = []
+    updated = []
+    for rule in rules:
+        name = to_native(rule['name'])
+        old_rule = old_rules.get(name)
+        if old_rule is None:
+            added.append(name)
+        elif normalize_rule(old_rule) != normalize_rule(rule):
+            updated.append(name)
+
+    removed = []
+    for old_rule in old_list or []:
+        name = to_native(old_rule['name'])
+        if name in new_names:
+            continue
+        if purge_list:
+            removed.append(name)
+        else:  # keep this rule
+            rules.append(old_rule)
+    return added, removed, updated, rules
+
+
+def priority_conflicts(old_list, rules, removed):
+    '''
+    Check whether creating or updating rules one at a time would collide with the priority of another
+    existing rule, e.g. when two rules swap priorities. Such changes must be applied in a single update.
+
+    :param old_list: list of existing rule dicts
+    :param rules: list of rule dicts to create or update
+    :param removed: list of names of rules deleted before rules are written
+    :return: bool
+    '''
+    taken = dict(((rule['direction'], rule['priority']), to_native(rule['name'])) for rule in old_list or []
+                 if to_native(rule['name']) not in removed)
+    for rule in rules:
+        owner = taken.get((rule['direction'], rule['priority']))
+        if owner is not None and owner != to_native(rule['name']):
+            return True
+    return False
+
+
 def compare_rules_change(old_list, new_list, purge_list):
-    old_list = old_list or []
-    new_list = new_list or []
-    changed = False
-
-    for old_rule in old_list:
-        matched = next((x for x in new_list if x['name'] == old_rule['name']), [])
-        if matched:  # if the new one is in the old list, check whether it is updated
-            changed = changed or compare_rules(old_rule, matched)
-        elif not purge_list:  # keep this rule
-            new_list.append(old_rule)
-        else:  # one rule is removed
-            changed = True
-    # Compare new list and old list is the same? here only compare names
-    if not changed:
-        new_names = [to_native(x['name']) for x in new_list]
-        old_names = [to_native(x['name']) for x in old_list]
-        changed = (set(new_names) != set(old_names))
-    return changed, new_list
-
-
-def compare_rules(old_rule, rule):
-    changed = False
-    if old_rule['name'] != rule['name']:
-        changed = True
-    if rule.get('description', None) != old_rule['description']:
-        changed = True
-    if rule['protocol'] != old_rule['protocol']:
-        changed = True
-    if str(rule['source_port_range']) != str(old_rule['source_port_range']):
-        changed = True
-    if str(rule['destination_port_range']) != str(old_rule['destination_port_range']):
-        changed = True
-    if rule['access'] != old_rule['access']:
-        changed = True
-    if rule['priority'] != old_rule['priority']:
-        changed = True
-    if rule['direction'] != old_rule['direction']:
-        changed = True
-    if str(rule['source_address_prefix']) != str(old_rule['source_address_prefix']):
-        changed = True
-    if str(rule['destination_address_prefix']) != str(old_rule['destination_address_prefix']):
-        changed = True
-    if set(rule.get('source_address_prefixes') or []) != set(old_rule.get('source_address_prefixes') or []):
-        changed = True
-    if set(rule.get('destination_address_prefixes') or []) != set(old_rule.get('destination_address_prefixes') or []):
-        changed = True
-    if set(rule.get('source_port_ranges') or []) != set(old_rule.get('source_port_ranges') or []):
-        changed = True
-    if set(rule.get('destination_port_ranges') or []) != set(old_rule.get('destination_port_ranges') or []):
-        changed = True
-    return changed
+    added, removed, updated, rules = diff_rules(old_list, new_list, purge_list)
+    return bool(added or removed or updated), rules
 
 
 def create_rule_instance(self, rule):
@@ -617,19 +651,28 @@ class AzureRMSecurityGroup(AzureRMModuleBase):
             if update_tags:
                 changed = True
 
-            rule_changed, new_rule = compare_rules_change(results['rules'], self.rules, self.purge_rules)
-            if rule_changed:
+            old_rules = results['rules']
+            added, removed, updated, new_rule = diff_rules(old_rules, self.rules, self.purge_rules)
+            rule_changes = len(added) + len(removed) + len(updated)
+            if rule_changes:
                 changed = True
                 results['rules'] = new_rule
-            rule_changed, new_rule = compare_rules_change(results['default_rules'], self.default_rules, self.purge_default_rules)
-            if rule_changed:
+            default_rule_changed, new_rule = compare_rules_change(results['default_rules'], self.default_rules, self.purge_default_rules)
+            if default_rule_changed:
                 changed = True
                 results['default_rules'] = new_rule
 
             self.results['changed'] = changed
             self.results['state'] = results
             if not self.check_mode and changed:
-                self.results['state'] = self.create_or_update(results)
+                rules = dict((to_native(rule['name']), rule) for rule in results['rules'])
+                changed_rules = [rules[name] for name in added + updated]
+                if not update_tags and not default_rule_changed and rule_changes <= RULE_UPDATE_THRESHOLD and \
+                        not priority_conflicts(old_rules, changed_rules, removed):
+                    # only a few rules differ; leave the rest of the group untouched
+                    self.results['state'] = self.update_rules(changed_rules, removed)
+                else:
+                    self.results['state'] = self.create_or_update(results)
 
         elif self.state == 'present' and changed:
             # create the security group
@@ -690,6 +733,33 @@ class AzureRMSecurityGroup(AzureRMModuleBase):
             self.fail("Error creating/updating security group {0} - {1}".format(self.name, str(exc)))
         return create_network_security_group_dict(result)
 
+    def update_rules(self, rules, removed):
+        '''
+        Create or update rules and delete rules one by one through the security_rules endpoints.
+
+        :param rules: list of rule dicts to create or update
+        :param removed: list of names of rules to delete
+        :return: dict of the updated security group
+        '''
+        security_rules = self.network_client.security_rules
+        try:
+            # deletes go first so that the priorities they free can be taken by the rules written next
+            for name in removed:
+                poller = security_rules.delete(resource_group_name=self.resource_group,
+                                               network_security_group_name=self.name,
+                                               security_rule_name=name)
+                self.get_poller_result(poller)
+            for rule in rules:
+                poller = security_rules.create_or_update(resource_group_name=self.resource_group,
+                                                         network_security_group_name=self.name,
+                                                         security_rule_name=rule['name'],
+                                                         security_rule_parameters=create_rule_instance(self, rule))
+                self.get_poller_result(poller)
+            nsg = self.network_client.network_security_groups.get(self.resource_group, self.name)
+        except CloudError as exc:
+            self.fail("Error updating rules of security group {0} - {1}".format(self.name, str(exc)))
+        return create_network_security_group_dict(nsg)
+
     def delete(self):
         try:
             poller = self.network_client.network_security_groups.delete(resource_group_name=self.resource_group, network_security_group_name=self.name)
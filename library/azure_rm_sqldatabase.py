@@ -193,7 +193,6 @@ status:
     sample: Online
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -405,8 +404,7 @@ class AzureRMDatabases(AzureRMModuleBase):
             self.delete_sqldatabase()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_sqldatabase():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_sqldatabase, 'sqldatabase')
         else:
             self.log("SQL Database instance unchanged")
             self.results['changed'] = False
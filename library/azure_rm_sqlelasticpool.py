@@ -94,7 +94,6 @@ state:
     sample: Ready
 '''
 
-import time
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 
 try:
@@ -246,8 +245,7 @@ class AzureRMElasticPools(AzureRMModuleBase):
             self.delete_elasticpool()
             # make sure instance is actually deleted, for some Azure resources, instance is hanging around
             # for some time after deletion -- this should be really fixed in Azure
-            while self.get_elasticpool():
-                time.sleep(20)
+            self.wait_until_deleted(self.get_elasticpool, 'elasticpool')
         else:
             self.log("ElasticPool instance unchanged")
             self.results['changed'] = False
@@ -160,28 +160,27 @@ class AzureRMStorageAccountFacts(AzureRMModuleBase):
     def list_resource_group(self):
         self.log('List items')
         try:
-            response = self.storage_client.storage_accounts.list_by_resource_group(self.resource_group)
+            response = self.list_resources('Microsoft.Storage/storageAccounts',
+                                           self.storage_models.StorageAccount,
+                                           lambda: self.storage_client.storage_accounts.list_by_resource_group(self.resource_group),
+                                           resource_group=self.resource_group,
+                                           tags=self.tags)
         except Exception as exc:
             self.fail("Error listing for resource group {0} - {1}".format(self.resource_group, str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                results.append(self.serialize_obj(item, AZURE_OBJECT_CLASS))
-        return results
+        return [self.serialize_obj(item, AZURE_OBJECT_CLASS) for item in response]
 
     def list_all(self):
         self.log('List all items')
         try:
-            response = self.storage_client.storage_accounts.list_by_resource_group(self.resource_group)
+            response = self.list_resources('Microsoft.Storage/storageAccounts',
+                                           self.storage_models.StorageAccount,
+                                           self.storage_client.storage_accounts.list,
+                                           tags=self.tags)
         except Exception as exc:
             self.fail("Error listing all items - {0}".format(str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                results.append(self.serialize_obj(item, AZURE_OBJECT_CLASS))
-        return results
+        return [self.serialize_obj(item, AZURE_OBJECT_CLASS) for item in response]
 
 
 def main():
@@ -33,6 +33,7 @@ options:
     blob:
         description:
             - Name of a blob object within the container.
+            - When I(src) is a directory, the virtual directory of the container the files are synchronized to.
         aliases:
             - blob_name
     blob_type:
@@ -67,6 +68,8 @@ options:
     content_md5:
         description:
             - Set the blob md5 hash value.
+            - When uploading, the MD5 of I(src) is computed and stored with the blob; if this is set, it must match.
+            - When downloading, the downloaded file is checked against the MD5 stored with the blob, if any.
     dest:
         description:
             - Destination file path. Use with state 'present' to download a blob.
@@ -87,8 +90,19 @@ options:
     src:
         description:
             - Source file path. Use with state 'present' to upload a blob.
+            - If I(src) is a directory, it is synchronized to the container, under I(blob) if given. The files of
+              I(src) whose size or MD5 differ from those of their blob are uploaded, up to I(max_connections) at a
+              time, whether or not I(force) is set. The MD5s of local files are kept in a manifest under
+              C(~/.azure/ansible_blob_manifest) and only computed again when a file's size or modification time change.
+            - Only block blobs can be synchronized.
         aliases:
             - source
+    delete_orphans:
+        description:
+            - When I(src) is a directory, delete the blobs under I(blob) that have no matching file in I(src).
+        type: bool
+        default: no
+        version_added: "2.8"
     state:
         description:
             - Assert the state of a container or blob.
@@ -111,6 +125,27 @@ options:
         choices:
             - container
             - blob
+    block_size:
+        description:
+            - Size in MB of the chunks a blob is uploaded or downloaded in.
+            - At most 100 for block blobs. Page blobs are written at most 4 MB at a time.
+        type: int
+        default: 4
+        version_added: "2.8"
+    max_connections:
+        description:
+            - Maximum number of chunks transferred at the same time.
+        type: int
+        default: 4
+        version_added: "2.8"
+    resume:
+        description:
+            - Resume an interrupted upload or download of the same file and blob, skipping the chunks already transferred.
+            - Transferred chunks are recorded in a journal under C(~/.azure/ansible_blob_journal), removed once the
+              transfer completes.
+        type: bool
+        default: yes
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -147,6 +182,25 @@ EXAMPLES = '''
     container: foo
     blob: graylog.png
     dest: ~/tmp/images/graylog.png
+
+- name: Upload a disk image as a page blob, 8 chunks of 4 MB at a time
+  azure_rm_storageblob:
+    resource_group: Testing
+    storage_account_name: clh0002
+    container: vhds
+    blob: disk.vhd
+    blob_type: page
+    src: ./disk.vhd
+    max_connections: 8
+
+- name: Publish a static site, removing the blobs of deleted pages
+  azure_rm_storageblob:
+    resource_group: Testing
+    storage_account_name: clh0002
+    container: $web
+    src: ./public/
+    delete_orphans: yes
+    max_connections: 16
 '''
 
 RETURN = '''
@@ -178,18 +232,126 @@ container:
         "name": "foo",
         "tags": {}
     }
+sync:
+    description: Outcome of the synchronization of a directory.
+    returned: when src is a directory
+    type: complex
+    contains:
+        uploaded:
+            description: Number of files uploaded.
+            type: int
+            sample: 12
+        tagged:
+            description: Number of blobs matching their file whose tags were updated.
+            type: int
+            sample: 0
+        unchanged:
+            description: Number of files already matching their blob.
+            type: int
+            sample: 19988
+        deleted:
+            description: Number of orphaned blobs deleted.
+            type: int
+            sample: 1
+        bytes_transferred:
+            description: Total size of the uploaded files.
+            type: int
+            sample: 1048576
+        failed:
+            description: Files or blobs that could not be uploaded or deleted, with the error.
+            type: list
+            sample: [{"name": "index.html", "msg": "..."}]
 '''
 
 import os
+import base64
+import hashlib
+import mimetypes
 
 try:
-    from azure.storage.blob.models import ContentSettings
+    from azure.storage.blob.models import ContentSettings, BlobBlock, Include
     from azure.common import AzureMissingResourceHttpError, AzureHttpError
 except ImportError:
     # This is handled in azure_rm_common
     pass
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, AzureRMFileCache, run_concurrently
+
+MB = 1024 * 1024
+# service limits for the size of a single block and of a single page write
+MAX_BLOCK_SIZE = 100 * MB
+MAX_PAGE_WRITE_SIZE = 4 * MB
+PAGE_SIZE = 512
+# the service only validates the MD5 of ranges up to this size on download
+MAX_VALIDATED_RANGE = 4 * MB
+
+TRANSFER_JOURNAL_DIR = '~/.azure/ansible_blob_journal'
+SYNC_MANIFEST_DIR = '~/.azure/ansible_blob_manifest'
+
+
+class TransferJournal(AzureRMFileCache):
+    '''
+    Chunks of an upload or download already done, kept on disk so an interrupted transfer can be resumed.
+    The recorded chunks only count while the identity of the transfer (file size and time, blob ETag,
+    chunk size, ...) is unchanged.
+    '''
+
+    def __init__(self, identity):
+        name = hashlib.sha256(repr(sorted(identity.items())).encode('utf-8')).hexdigest()
+        super(TransferJournal, self).__init__(os.path.join(TRANSFER_JOURNAL_DIR, name + '.json'))
+        self.identity = identity
+
+    def load(self):
+        data = self.read()
+        if data.get('identity') != self.identity:
+            return dict()
+        return data.get('done') or dict()
+
+    def record(self, done):
+        def update(data):
+            if data.get('identity') != self.identity:
+                data.clear()
+                data['identity'] = self.identity
+            data.setdefault('done', dict()).update(done)
+        self.update(update)
+
+    def remove(self):
+        for path in (self.path, self.path + '.lock'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def is_zero(data):
+    return data.count(b'\0') == len(data)
+
+
+def md5_base64(digest):
+    return base64.b64encode(digest.digest()).decode('utf-8')
+
+
+def file_md5(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as source:
+        for data in iter(lambda: source.read(MB), b''):
+            digest.update(data)
+    return md5_base64(digest)
+
+
+def local_files(root):
+    '''
+    Walk a directory.
+
+    :return: dict of path relative to root, with '/' separators, to os.stat_result
+    '''
+    result = dict()
+    for directory, dummy, file_names in os.walk(root):
+        for file_name in file_names:
+            path = os.path.join(directory, file_name)
+            if os.path.isfile(path):
+                result[os.path.relpath(path, root).replace(os.sep, '/')] = os.stat(path)
+    return result
 
 
 class AzureRMStorageBlob(AzureRMModuleBase):
@@ -213,6 +375,10 @@ class AzureRMStorageBlob(AzureRMModuleBase):
             content_disposition=dict(type='str'),
             cache_control=dict(type='str'),
             content_md5=dict(type='str'),
+            block_size=dict(type='int', default=4),
+            max_connections=dict(type='int', default=4),
+            resume=dict(type='bool', default=True),
+            delete_orphans=dict(type='bool', default=False),
         )
 
         mutually_exclusive = [('src', 'dest')]
@@ -232,6 +398,11 @@ class AzureRMStorageBlob(AzureRMModuleBase):
         self.state = None
         self.tags = None
         self.public_access = None
+        self.block_size = None
+        self.max_connections = None
+        self.resume = None
+        self.delete_orphans = None
+        self.sync_mode = False
         self.results = dict(
             changed=False,
             actions=[],
@@ -251,25 +422,36 @@ class AzureRMStorageBlob(AzureRMModuleBase):
 
         self.results['check_mode'] = self.check_mode
 
+        if self.block_size < 1 or self.block_size * MB > MAX_BLOCK_SIZE:
+            self.fail("Parameter error: block_size must be between 1 and {0}.".format(MAX_BLOCK_SIZE // MB))
+        if self.max_connections < 1:
+            self.fail("Parameter error: max_connections must be at least 1.")
+
         # add file path validation
+        self.sync_mode = self.state == 'present' and self.src is not None and os.path.isdir(self.src)
+        if self.sync_mode and self.blob_type != 'block':
+            self.fail("Parameter error: only block blobs can be synchronized from a directory.")
 
         self.blob_client = self.get_blob_client(self.resource_group, self.storage_account_name, self.blob_type)
         self.container_obj = self.get_container()
 
-        if self.blob is not None:
+        if self.blob is not None and not self.sync_mode:
             self.blob_obj = self.get_blob()
 
         if self.state == 'present':
             if not self.container_obj:
                 # create the container
                 self.create_container()
-            elif self.container_obj and not self.blob:
+            elif self.container_obj and not self.blob and not self.sync_mode:
                 # update container attributes
                 update_tags, self.container_obj['tags'] = self.update_tags(self.container_obj.get('tags'))
                 if update_tags:
                     self.update_container_tags(self.container_obj['tags'])
 
-            if self.blob:
+            if self.sync_mode:
+                # upload the changed files of a directory
+                self.sync_directory()
+            elif self.blob:
                 # create, update or download blob
                 if self.src and self.src_is_valid():
                     if self.blob_obj and not self.force:
@@ -352,7 +534,7 @@ class AzureRMStorageBlob(AzureRMModuleBase):
         self.log('Create container %s' % self.container)
 
         tags = None
-        if not self.blob and self.tags:
+        if not self.blob and not self.sync_mode and self.tags:
             # when a blob is present, then tags are assigned at the blob level
             tags = self.tags
 
@@ -380,8 +562,10 @@ class AzureRMStorageBlob(AzureRMModuleBase):
             )
         if not self.check_mode:
             try:
-                self.blob_client.create_blob_from_path(self.container, self.blob, self.src,
-                                                       metadata=self.tags, content_settings=content_settings)
+                if self.blob_type == 'page':
+                    self.upload_page_blob(content_settings)
+                else:
+                    self.upload_block_blob(content_settings)
             except AzureHttpError as exc:
                 self.fail("Error creating blob {0} - {1}".format(self.blob, str(exc)))
 
@@ -391,10 +575,278 @@ class AzureRMStorageBlob(AzureRMModuleBase):
         self.results['container'] = self.container_obj
         self.results['blob'] = self.blob_obj
 
+    def transfer_journal(self, direction, path, **identity):
+        identity.update(direction=direction,
+                        account=self.storage_account_name,
+                        container=self.container,
+                        blob=self.blob,
+                        path=os.path.abspath(path),
+                        block_size=self.block_size)
+        journal = TransferJournal(identity)
+        return journal, (journal.load() if self.resume else dict())
+
+    def transfer_chunks(self, transfer, chunks, journal):
+        '''
+        Run transfer on chunks, max_connections at a time, recording every batch that completes in the journal.
+
+        :param transfer: callable taking a chunk and returning its journal entry as a (key, value) tuple
+        :param chunks: iterable of chunks; it is consumed one batch at a time, so it may read data lazily
+        :param journal: TransferJournal
+        :raises: the first error of a chunk, once the chunks of its batch have completed
+        '''
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) == self.max_connections:
+                self.transfer_batch(transfer, batch, journal)
+                batch = []
+        self.transfer_batch(transfer, batch, journal)
+
+    def transfer_batch(self, transfer, batch, journal):
+        outcomes = run_concurrently(transfer, batch, self.max_connections)
+        journal.record(dict(entry for entry, exc in outcomes if exc is None))
+        for dummy, exc in outcomes:
+            if exc is not None:
+                raise exc
+
+    def read_chunks(self, size, digest, done):
+        '''
+        Read src sequentially in chunks of size bytes, feeding digest.
+
+        :return: generator of (index, offset, data) for the chunks whose index is not in done
+        '''
+        with open(self.src, 'rb') as src:
+            index = 0
+            while True:
+                offset = src.tell()
+                data = src.read(size)
+                if not data:
+                    return
+                digest.update(data)
+                if str(index) not in done:
+                    yield index, offset, data
+                index += 1
+
+    def verified_content_settings(self, content_settings, digest):
+        md5 = md5_base64(digest)
+        if self.content_md5 and self.content_md5 != md5:
+            self.fail("The MD5 of {0} is {1}, not content_md5 {2}".format(self.src, md5, self.content_md5))
+        content_settings = content_settings or ContentSettings()
+        content_settings.content_md5 = md5
+        return content_settings
+
+    def upload_block_blob(self, content_settings):
+        '''
+        Upload src as blocks, then commit them. Blocks left uncommitted by an interrupted upload of the same
+        file are reused.
+        '''
+        src_stat = os.stat(self.src)
+        journal, done = self.transfer_journal('upload', self.src, size=src_stat.st_size, mtime=src_stat.st_mtime, type='block')
+        if done:
+            try:
+                uncommitted = set(block.id for block in
+                                  self.blob_client.get_block_list(self.container, self.blob, block_list_type='uncommitted').uncommitted_blocks)
+            except AzureMissingResourceHttpError:
+                uncommitted = set()
+            done = dict((index, block_id) for index, block_id in done.items() if block_id in uncommitted)
+
+        def block_id(index):
+            # ids must all have the same length
+            return '{0:08d}'.format(index)
+
+        def put_block(chunk):
+            index, offset, data = chunk
+            self.blob_client.put_block(self.container, self.blob, data, block_id(index), validate_content=True)
+            return str(index), block_id(index)
+
+        digest = hashlib.md5()
+        self.transfer_chunks(put_block, self.read_chunks(self.block_size * MB, digest, done), journal)
+
+        block_count = (src_stat.st_size + self.block_size * MB - 1) // (self.block_size * MB)
+        content_settings = self.verified_content_settings(content_settings, digest)
+        self.blob_client.put_block_list(self.container, self.blob, [BlobBlock(id=block_id(index)) for index in range(block_count)],
+                                        content_settings=content_settings, metadata=self.tags)
+        journal.remove()
+
+    def upload_page_blob(self, content_settings):
+        '''
+        Upload src as a page blob, skipping ranges that only hold zeros.
+        '''
+        src_stat = os.stat(self.src)
+        if src_stat.st_size % PAGE_SIZE:
+            self.fail("The size of {0} must be a multiple of {1} bytes to upload it as a page blob.".format(self.src, PAGE_SIZE))
+        journal, done = self.transfer_journal('upload', self.src, size=src_stat.st_size, mtime=src_stat.st_mtime, type='page')
+        if done:
+            try:
+                blob = self.blob_client.get_blob_properties(self.container, self.blob)
+                if blob.properties.content_length != src_stat.st_size:
+                    done = dict()
+            except AzureMissingResourceHttpError:
+                done = dict()
+        if not done:
+            self.blob_client.create_blob(self.container, self.blob, src_stat.st_size, metadata=self.tags)
+
+        def update_page(chunk):
+            index, offset, data = chunk
+            if not is_zero(data):
+                self.blob_client.update_page(self.container, self.blob, data, offset, offset + len(data) - 1, validate_content=True)
+            return str(index), True
+
+        digest = hashlib.md5()
+        self.transfer_chunks(update_page, self.read_chunks(min(self.block_size * MB, MAX_PAGE_WRITE_SIZE), digest, done), journal)
+
+        content_settings = self.verified_content_settings(content_settings, digest)
+        self.blob_client.set_blob_properties(self.container, self.blob, content_settings=content_settings)
+        journal.remove()
+
+    def download_to_path(self):
+        '''
+        Download the blob in ranges to a partial file next to dest, check its MD5 and move it to dest. For page blobs
+        only the ranges holding data are fetched.
+        '''
+        blob = self.blob_client.get_blob_properties(self.container, self.blob)
+        size = blob.properties.content_length
+        partial = self.dest + '.partial'
+        journal, done = self.transfer_journal('download', self.dest, size=size, etag=blob.properties.etag)
+        if not os.path.isfile(partial) or os.path.getsize(partial) != size:
+            done = dict()
+        if not done:
+            with open(partial, 'wb') as partial_file:
+                partial_file.truncate(size)
+
+        chunk_size = self.block_size * MB
+        if blob.properties.blob_type == 'PageBlob' and self.blob_type == 'page':
+            chunk_size = min(chunk_size, MAX_PAGE_WRITE_SIZE)
+            ranges = [(page_range.start, page_range.end) for page_range in
+                      self.blob_client.get_page_ranges(self.container, self.blob, if_match=blob.properties.etag)]
+        else:
+            ranges = [(0, size - 1)] if size else []
+        chunks = [(start, min(start + chunk_size, end + 1) - 1) for range_start, end in ranges
+                  for start in range(range_start, end + 1, chunk_size) if str(start) not in done]
+
+        def get_range(chunk):
+            start, end = chunk
+            data = self.blob_client.get_blob_to_bytes(self.container, self.blob, start_range=start, end_range=end,
+                                                      validate_content=end - start < MAX_VALIDATED_RANGE,
+                                                      max_connections=1, if_match=blob.properties.etag).content
+            with open(partial, 'r+b') as partial_file:
+                partial_file.seek(start)
+                partial_file.write(data)
+            return str(start), True
+
+        self.transfer_chunks(get_range, chunks, journal)
+
+        expected_md5 = blob.properties.content_settings.content_md5
+        if expected_md5:
+            digest = hashlib.md5()
+            with open(partial, 'rb') as partial_file:
+                for data in iter(lambda: partial_file.read(MB), b''):
+                    digest.update(data)
+            if md5_base64(digest) != expected_md5:
+                journal.remove()
+                os.remove(partial)
+                raise Exception("MD5 of the downloaded data is {0}, not {1} as recorded for the blob".format(md5_base64(digest), expected_md5))
+        os.rename(partial, self.dest)
+        journal.remove()
+
+    def sync_directory(self):
+        '''
+        Upload the files of src whose size or MD5 differ from those of their blob, and optionally delete the blobs
+        without a file. The container is listed once, and files and blobs are processed max_connections at a time.
+        '''
+        prefix = self.blob.strip('/') + '/' if self.blob and self.blob.strip('/') else ''
+        files = local_files(self.src)
+
+        remote = dict()
+        try:
+            include = Include(metadata=True) if self.tags is not None else None
+            for blob in self.blob_client.list_blobs(self.container, prefix=prefix or None, include=include):
+                remote[blob.name] = blob
+        except AzureHttpError as exc:
+            self.fail("Error listing blobs in {0} - {1}".format(self.container, str(exc)))
+
+        manifest = AzureRMFileCache(os.path.join(SYNC_MANIFEST_DIR,
+                                                 hashlib.sha256(os.path.abspath(self.src).encode('utf-8')).hexdigest() + '.json'))
+        known_md5 = manifest.read()
+
+        def local_md5(name):
+            stat = files[name]
+            known = known_md5.get(name)
+            if known and known[0] == stat.st_size and known[1] == stat.st_mtime:
+                return known[2]
+            return file_md5(os.path.join(self.src, name))
+
+        def sync_file(name):
+            stat = files[name]
+            blob = remote.get(prefix + name)
+            md5 = None
+            if blob is not None and blob.properties.content_length == stat.st_size:
+                md5 = local_md5(name)
+                if md5 == blob.properties.content_settings.content_md5:
+                    update_tags, tags = self.update_tags(blob.metadata or dict())
+                    if not update_tags:
+                        return 'unchanged', md5
+                    if not self.check_mode:
+                        self.blob_client.set_blob_metadata(self.container, prefix + name, metadata=tags)
+                    return 'tagged', md5
+            md5 = md5 or local_md5(name)
+            if not self.check_mode:
+                content_settings = ContentSettings(
+                    content_type=self.content_type or mimetypes.guess_type(name)[0],
+                    content_encoding=self.content_encoding,
+                    content_language=self.content_language,
+                    content_disposition=self.content_disposition,
+                    cache_control=self.cache_control,
+                    content_md5=md5
+                )
+                self.blob_client.create_blob_from_path(self.container, prefix + name, os.path.join(self.src, name),
+                                                       content_settings=content_settings, metadata=self.tags,
+                                                       max_connections=1)
+            return 'uploaded', md5
+
+        def delete_orphan(blob_name):
+            if not self.check_mode:
+                self.blob_client.delete_blob(self.container, blob_name)
+
+        result = dict(uploaded=0, tagged=0, unchanged=0, deleted=0, bytes_transferred=0, failed=[])
+        names = sorted(files)
+        for name, (outcome, exc) in zip(names, run_concurrently(sync_file, names, self.max_connections)):
+            if exc is not None:
+                result['failed'].append(dict(name=name, msg=str(exc)))
+                continue
+            action, md5 = outcome
+            stat = files[name]
+            known_md5[name] = [stat.st_size, stat.st_mtime, md5]
+            result[action] += 1
+            if action == 'uploaded':
+                result['bytes_transferred'] += stat.st_size
+
+        if self.delete_orphans:
+            orphans = sorted(blob_name for blob_name in remote if blob_name[len(prefix):] not in files)
+            for blob_name, (dummy, exc) in zip(orphans, run_concurrently(delete_orphan, orphans, self.max_connections)):
+                if exc is not None:
+                    result['failed'].append(dict(name=blob_name, msg=str(exc)))
+                else:
+                    result['deleted'] += 1
+
+        def update_manifest(data):
+            data.clear()
+            data.update((name, known_md5[name]) for name in files if name in known_md5)
+        manifest.update(update_manifest)
+
+        self.results['sync'] = result
+        if result['uploaded'] or result['tagged'] or result['deleted']:
+            self.results['changed'] = True
+            self.results['actions'].append('synchronized {0} to {1}:{2}'.format(self.src, self.container, prefix))
+        self.results['container'] = self.container_obj
+        if result['failed']:
+            self.fail("Failed to synchronize {0} of the files and blobs of {1}".format(len(result['failed']), self.src),
+                      **self.results)
+
     def download_blob(self):
         if not self.check_mode:
             try:
-                self.blob_client.get_blob_to_path(self.container, self.blob, self.dest)
+                self.download_to_path()
             except Exception as exc:
                 self.fail("Failed to download blob {0}:{1} to {2} - {3}".format(self.container,
                                                                                 self.blob,
@@ -513,7 +965,7 @@ class AzureRMStorageBlob(AzureRMModuleBase):
                 content_language=self.content_language,
                 content_disposition=self.content_disposition,
                 cache_control=self.cache_control,
-                content_md5=self.content_md5
+                content_md5=self.content_md5 or self.blob_obj['content_settings']['content_md5']
             )
             if self.blob_obj['content_settings'] != settings:
                 return True
@@ -527,7 +979,8 @@ class AzureRMStorageBlob(AzureRMModuleBase):
             content_language=self.content_language,
             content_disposition=self.content_disposition,
             cache_control=self.cache_control,
-            content_md5=self.content_md5
+            # keep the MD5 computed on upload
+            content_md5=self.content_md5 or self.blob_obj['content_settings']['content_md5']
         )
         if not self.check_mode:
             try:
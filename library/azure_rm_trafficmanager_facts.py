@@ -208,6 +208,7 @@ from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 try:
     from msrestazure.azure_exceptions import CloudError
     from azure.common import AzureHttpError
+    from azure.mgmt.trafficmanager.models import Profile
 except:
     # handled in azure_rm_common
     pass
@@ -301,31 +302,29 @@ class AzureRMTrafficManagerFacts(AzureRMModuleBase):
         self.log('List all Azure Traffic Managers within a resource group')
 
         try:
-            response = self.traffic_manager_management_client.profiles.list_by_resource_group(
-                self.resource_group)
+            response = self.list_resources('Microsoft.Network/trafficManagerProfiles',
+                                           Profile,
+                                           lambda: self.traffic_manager_management_client.profiles.list_by_resource_group(
+                                               self.resource_group),
+                                           resource_group=self.resource_group,
+                                           tags=self.tags)
         except AzureHttpError as exc:
             self.fail('Failed to list all items - {0}'.format(str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                results.append(self.serialize_tm(item))
-
-        return results
+        return [self.serialize_tm(item) for item in response]
 
     def list_all(self):
         """Get all Azure Traffic Managers within a subscription"""
         self.log('List all Traffic Manager profiles within a subscription')
         try:
-            response = self.traffic_manager_management_client.profiles.list_by_subscription()
+            response = self.list_resources('Microsoft.Network/trafficManagerProfiles',
+                                           Profile,
+                                           self.traffic_manager_management_client.profiles.list_by_subscription,
+                                           tags=self.tags)
         except Exception as exc:
             self.fail("Error listing all items - {0}".format(str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                results.append(self.serialize_tm(item))
-        return results
+        return [self.serialize_tm(item) for item in response]
 
     def serialize_tm(self, tm):
         '''
@@ -42,7 +42,8 @@ options:
     name:
         description:
             - Name of the virtual machine.
-        required: true
+            - With I(count), a template for the names of the virtual machines, see I(count).
+            - Required unless I(vms) is set.
     custom_data:
         description:
             - Data which is made available to the virtual machine and used by e.g., cloud-init.
@@ -299,6 +300,35 @@ options:
         type: bool
         default: false
         version_added: "2.7"
+    count:
+        description:
+            - Create a fleet of I(count) virtual machines sharing the other options.
+            - I(name) is formatted with the index of each virtual machine, from 1 to I(count), e.g. C(web{0:02d}) gives
+              C(web01), C(web02)... Without a C({0}) placeholder the index is appended to I(name).
+            - The image, size, availability set, virtual network and subnet are resolved once for the fleet. The
+              virtual machines missing from the resource group are then created concurrently, at most
+              I(max_concurrency) at a time, each with its own default NIC, public IP and security group. Virtual
+              machines that already exist are left as they are.
+            - A fleet requires I(managed_disk_type) and managed data disks, I(state=present), and cannot set
+              I(os_disk_name), I(storage_account_name), I(storage_blob_name), I(short_hostname) or
+              I(network_interface_names).
+            - The creation of every virtual machine is attempted; the failed ones are reported in C(changes).
+        type: int
+        version_added: "2.8"
+    vms:
+        description:
+            - Create a fleet of virtual machines like I(count), but from a list with one dict per virtual machine.
+            - Each dict needs a C(name) and can set C(short_hostname), C(network_interface_names), C(custom_data) and
+              C(tags); the tags are merged with I(tags).
+            - Mutually exclusive with I(count).
+        type: list
+        version_added: "2.8"
+    max_concurrency:
+        description:
+            - Maximum number of virtual machines of a fleet created at the same time, see I(count).
+        type: int
+        default: 8
+        version_added: "2.8"
 
 extends_documentation_fragment:
     - azure
@@ -484,6 +514,45 @@ EXAMPLES = '''
     name: testvm002
     restarted: yes
 
+- name: Create a fleet of 20 VMs, web01 to web20
+  azure_rm_virtualmachine:
+    resource_group: Testing
+    name: "web{0:02d}"
+    count: 20
+    vm_size: Standard_D2s_v3
+    managed_disk_type: Premium_LRS
+    admin_username: "{{ username }}"
+    ssh_password_enabled: false
+    ssh_public_keys:
+      - path: /home/{{ username }}/.ssh/authorized_keys
+        key_data: "{{ ssh_key }}"
+    image:
+      offer: UbuntuServer
+      publisher: Canonical
+      sku: 18.04-LTS
+      version: latest
+    max_concurrency: 10
+
+- name: Create a fleet from a list of VMs
+  azure_rm_virtualmachine:
+    resource_group: Testing
+    vms:
+      - name: db-primary
+        tags:
+          role: primary
+      - name: db-replica
+        tags:
+          role: replica
+    vm_size: Standard_D4s_v3
+    managed_disk_type: Premium_LRS
+    admin_username: "{{ username }}"
+    admin_password: "{{ password }}"
+    image:
+      offer: CentOS
+      publisher: OpenLogic
+      sku: '7.5'
+      version: latest
+
 - name: remove vm and all resources except public ips
   azure_rm_virtualmachine:
     resource_group: Testing
@@ -515,6 +584,34 @@ deleted_public_ips:
     returned: 'on delete'
     type: list
     example: ["testvm1001"]
+changes:
+    description: Virtual machines of a fleet created, or to be created in check mode.
+    returned: when I(count) or I(vms) is set
+    type: complex
+    contains:
+        name:
+            description: Name of the virtual machine.
+            returned: always
+            type: str
+            sample: web01
+        action:
+            description: Change made to the virtual machine, always C(create).
+            returned: always
+            type: str
+            sample: create
+        id:
+            description: Resource ID of the virtual machine.
+            returned: when created
+            type: str
+            sample: /subscriptions/xxxx/resourceGroups/Testing/providers/Microsoft.Compute/virtualMachines/web01
+        failed:
+            description: Whether creating the virtual machine or its NIC failed.
+            returned: always
+            type: bool
+        msg:
+            description: Error message of a failed creation.
+            returned: when failed
+            type: str
 azure_vm:
     description: Facts about the current state of the object. Note that facts are not part of the registered output but available directly.
     returned: always
@@ -671,13 +768,19 @@ except ImportError:
     pass
 
 from ansible.module_utils.basic import to_native, to_bytes
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase, azure_id_to_dict, normalize_location_name, format_resource_id
+from ansible.module_utils.azure_rm_common import (AzureRMModuleBase, azure_id_to_dict, normalize_location_name, format_resource_id,
+                                                  run_concurrently)
 
 
 AZURE_OBJECT_CLASS = 'VirtualMachine'
 
 AZURE_ENUM_MODULES = ['azure.mgmt.compute.models']
 
+# options a fleet cannot share between its virtual machines
+FLEET_EXCLUSIVE_OPTIONS = ['os_disk_name', 'storage_account_name', 'storage_blob_name', 'short_hostname', 'network_interface_names']
+
+FLEET_VM_OPTIONS = ['name', 'short_hostname', 'network_interface_names', 'custom_data', 'tags']
+
 
 def extract_names_from_blob_uri(blob_uri, storage_suffix):
     # HACK: ditch this once python SDK supports get by URI
@@ -689,13 +792,19 @@ def extract_names_from_blob_uri(blob_uri, storage_suffix):
     return extracted_names
 
 
+def fleet_vm_name(template, index):
+    if '{' in template:
+        return template.format(index)
+    return '{0}{1}'.format(template, index)
+
+
 class AzureRMVirtualMachine(AzureRMModuleBase):
 
     def __init__(self):
 
         self.module_arg_spec = dict(
             resource_group=dict(type='str', required=True),
-            name=dict(type='str', required=True),
+            name=dict(type='str'),
             custom_data=dict(type='str'),
             state=dict(choices=['present', 'absent'], default='present', type='str'),
             location=dict(type='str'),
@@ -729,7 +838,10 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
             started=dict(type='bool', default=True),
             data_disks=dict(type='list'),
             plan=dict(type='dict'),
-            accept_terms=dict(type='bool', default=False)
+            accept_terms=dict(type='bool', default=False),
+            count=dict(type='int'),
+            vms=dict(type='list'),
+            max_concurrency=dict(type='int', default=8)
         )
 
         self.resource_group = None
@@ -769,6 +881,9 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
         self.data_disks = None
         self.plan = None
         self.accept_terms = None
+        self.count = None
+        self.vms = None
+        self.max_concurrency = None
 
         self.results = dict(
             changed=False,
@@ -778,7 +893,9 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
         )
 
         super(AzureRMVirtualMachine, self).__init__(derived_arg_spec=self.module_arg_spec,
-                                                    supports_check_mode=True)
+                                                    supports_check_mode=True,
+                                                    required_one_of=[['name', 'vms']],
+                                                    mutually_exclusive=[['count', 'vms']])
 
     def exec_module(self, **kwargs):
 
@@ -807,6 +924,9 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
 
         self.location = normalize_location_name(self.location)
 
+        if self.count is not None or self.vms:
+            return self.exec_fleet()
+
         if self.state == 'present':
             # Verify parameters and resolve any defaults
 
@@ -829,31 +949,7 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
                     if not key.get('path') or not key.get('key_data'):
                         self.fail(msg)
 
-            if self.image and isinstance(self.image, dict):
-                if all(key in self.image for key in ('publisher', 'offer', 'sku', 'version')):
-                    marketplace_image = self.get_marketplace_image_version()
-                    if self.image['version'] == 'latest':
-                        self.image['version'] = marketplace_image.name
-                        self.log("Using image version {0}".format(self.image['version']))
-
-                    image_reference = self.compute_models.ImageReference(
-                        publisher=self.image['publisher'],
-                        offer=self.image['offer'],
-                        sku=self.image['sku'],
-                        version=self.image['version']
-                    )
-                elif self.image.get('name'):
-                    custom_image = True
-                    image_reference = self.get_custom_image_reference(
-                        self.image.get('name'),
-                        self.image.get('resource_group'))
-                else:
-                    self.fail("parameter error: expecting image to contain [publisher, offer, sku, version] or [name, resource_group]")
-            elif self.image and isinstance(self.image, str):
-                custom_image = True
-                image_reference = self.get_custom_image_reference(self.image)
-            elif self.image:
-                self.fail("parameter error: expecting image to be a string or dict not {0}".format(type(self.image).__name__))
+            image_reference, custom_image = self.resolve_image_reference()
 
             if self.plan:
                 if not self.plan.get('name') or not self.plan.get('product') or not self.plan.get('publisher'):
@@ -994,12 +1090,7 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
                     if not image_reference:
                         self.fail("Parameter error: an image is required when creating a virtual machine.")
 
-                    availability_set_resource = None
-                    if self.availability_set:
-                        parsed_availability_set = parse_resource_id(self.availability_set)
-                        availability_set = self.get_availability_set(parsed_availability_set.get('resource_group', self.resource_group),
-                                                                     parsed_availability_set.get('name'))
-                        availability_set_resource = self.compute_models.SubResource(availability_set.id)
+                    availability_set_resource = self.get_availability_set_resource()
 
                     # Get defaults
                     if not self.network_interface_names:
@@ -1037,56 +1128,10 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
                         vhd = self.compute_models.VirtualHardDisk(uri=requested_vhd_uri)
                         managed_disk = None
 
-                    plan = None
-                    if self.plan:
-                        plan = self.compute_models.Plan(name=self.plan.get('name'), product=self.plan.get('product'),
-                                                        publisher=self.plan.get('publisher'),
-                                                        promotion_code=self.plan.get('promotion_code'))
-
-                    vm_resource = self.compute_models.VirtualMachine(
-                        self.location,
-                        tags=self.tags,
-                        os_profile=self.compute_models.OSProfile(
-                            admin_username=self.admin_username,
-                            computer_name=self.short_hostname,
-                        ),
-                        hardware_profile=self.compute_models.HardwareProfile(
-                            vm_size=self.vm_size
-                        ),
-                        storage_profile=self.compute_models.StorageProfile(
-                            os_disk=self.compute_models.OSDisk(
-                                name=self.os_disk_name if self.os_disk_name else self.storage_blob_name,
-                                vhd=vhd,
-                                managed_disk=managed_disk,
-                                create_option=self.compute_models.DiskCreateOptionTypes.from_image,
-                                caching=self.os_disk_caching,
-                                disk_size_gb=self.os_disk_size_gb
-                            ),
-                            image_reference=image_reference,
-                        ),
-                        network_profile=self.compute_models.NetworkProfile(
-                            network_interfaces=nics
-                        ),
-                        availability_set=availability_set_resource,
-                        plan=plan
-                    )
-
-                    if self.admin_password:
-                        vm_resource.os_profile.admin_password = self.admin_password
-
-                    if self.custom_data:
-                        # Azure SDK (erroneously?) wants native string type for this
-                        vm_resource.os_profile.custom_data = to_native(base64.b64encode(to_bytes(self.custom_data)))
-
-                    if self.os_type == 'Linux':
-                        vm_resource.os_profile.linux_configuration = self.compute_models.LinuxConfiguration(
-                            disable_password_authentication=disable_ssh_password
-                        )
-                    if self.ssh_public_keys:
-                        ssh_config = self.compute_models.SshConfiguration()
-                        ssh_config.public_keys = \
-                            [self.compute_models.SshPublicKey(path=key['path'], key_data=key['key_data']) for key in self.ssh_public_keys]
-                        vm_resource.os_profile.linux_configuration.ssh = ssh_config
+                    vm_resource = self.build_vm_resource(self.short_hostname,
+                                                         self.os_disk_name if self.os_disk_name else self.storage_blob_name,
+                                                         vhd, managed_disk, image_reference, nics, availability_set_resource,
+                                                         self.tags, self.custom_data)
 
                     # data disk
                     if self.data_disks:
@@ -1148,21 +1193,7 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
 
                     # Before creating VM accept terms of plan if `accept_terms` is True
                     if self.accept_terms is True:
-                        if not all([self.plan.get('name'), self.plan.get('product'), self.plan.get('publisher')]):
-                            self.fail("parameter error: plan must be specified and include name, product, and publisher")
-                        try:
-                            plan_name = self.plan.get('name')
-                            plan_product = self.plan.get('product')
-                            plan_publisher = self.plan.get('publisher')
-                            term = self.marketplace_client.marketplace_agreements.get(
-                                publisher_id=plan_publisher, offer_id=plan_product, plan_id=plan_name)
-                            term.accepted = True
-                            agreement = self.marketplace_client.marketplace_agreements.create(
-                                publisher_id=plan_publisher, offer_id=plan_product, plan_id=plan_name, parameters=term)
-                        except Exception as exc:
-                            self.fail(("Error accepting terms for virtual machine {0} with plan {1}. " +
-                                       "Only service admin/account admin users can purchase images " +
-                                       "from the marketplace. - {2}").format(self.name, self.plan, str(exc)))
+                        self.accept_plan_terms()
 
                     self.log("Create virtual machine with parameters:")
                     self.create_or_update_vm(vm_resource)
@@ -1312,6 +1343,299 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
 
         return self.results
 
+    def exec_fleet(self):
+        '''
+        Create the virtual machines of a fleet that do not exist yet. What the fleet shares is resolved once, then each
+        virtual machine is created along with its default NIC on a worker thread, max_concurrency at a time.
+        '''
+        if self.state != 'present':
+            self.fail("Parameter error: count and vms require state 'present'")
+        for option in FLEET_EXCLUSIVE_OPTIONS:
+            if getattr(self, option):
+                self.fail("Parameter error: {0} cannot be set for a fleet of virtual machines".format(option))
+        if not self.managed_disk_type:
+            self.fail("Parameter error: managed_disk_type is required for a fleet of virtual machines")
+        for data_disk in self.data_disks or []:
+            if not data_disk.get('managed_disk_type'):
+                self.fail("Parameter error: data disks of a fleet of virtual machines require managed_disk_type")
+
+        specs = self.fleet_specs()
+
+        if self.vm_size and not self.vm_size_is_valid():
+            self.fail("Parameter error: vm_size {0} is not valid for your subscription and location.".format(
+                self.vm_size
+            ))
+
+        if self.ssh_public_keys:
+            msg = "Parameter error: expecting ssh_public_keys to be a list of type dict where " \
+                "each dict contains keys: path, key_data."
+            for key in self.ssh_public_keys:
+                if not isinstance(key, dict) or not key.get('path') or not key.get('key_data'):
+                    self.fail(msg)
+
+        image_reference, dummy = self.resolve_image_reference()
+
+        if self.plan:
+            if not self.plan.get('name') or not self.plan.get('product') or not self.plan.get('publisher'):
+                self.fail("parameter error: plan must include name, product, and publisher")
+
+        existing = run_concurrently(lambda spec: self.compute_client.virtual_machines.get(self.resource_group, spec['name']),
+                                    specs, self.max_concurrency)
+        changes = []
+        for spec, (vm, exc) in zip(specs, existing):
+            if isinstance(exc, CloudError):
+                self.log("CHANGED: virtual machine {0} does not exist but state is 'present'.".format(spec['name']))
+                changes.append(spec)
+            elif exc is not None:
+                self.fail("Error fetching virtual machine {0} - {1}".format(spec['name'], str(exc)))
+
+        del self.results['actions']
+        availability_set_resource = None
+        subnet_id = None
+        if changes and not self.check_mode:
+            if not self.admin_username:
+                self.fail("Parameter error: admin_username required when creating a virtual machine.")
+            if self.os_type == 'Linux' and not self.ssh_password_enabled and not self.ssh_public_keys:
+                self.fail("Parameter error: ssh_public_keys required when disabling SSH password.")
+            if not image_reference:
+                self.fail("Parameter error: an image is required when creating a virtual machine.")
+
+            availability_set_resource = self.get_availability_set_resource()
+            if not all(spec['network_interface_names'] for spec in changes):
+                subnet_id = self.get_default_subnet_id()
+            if self.accept_terms is True:
+                self.accept_plan_terms()
+
+        def summarize(spec, vm_id):
+            summary = dict(name=spec['name'], action='create')
+            if vm_id:
+                summary['id'] = vm_id
+            return summary
+
+        return self.apply_changes(changes,
+                                  lambda spec: self.create_fleet_vm(spec, image_reference, availability_set_resource, subnet_id),
+                                  'virtual machine', self.max_concurrency, summarize)
+
+    def fleet_specs(self):
+        '''
+        Expand count or vms to one dict per virtual machine of the fleet.
+
+        :return: list of dicts with name, short_hostname, network_interface_names (ids), custom_data and tags
+        '''
+        if self.count is not None:
+            if not self.name:
+                self.fail("Parameter error: name is required with count")
+            if self.count < 1:
+                self.fail("Parameter error: count must be at least 1")
+            try:
+                items = [dict(name=fleet_vm_name(self.name, index)) for index in range(1, self.count + 1)]
+            except (IndexError, KeyError, ValueError) as exc:
+                self.fail("Parameter error: invalid name template {0} - {1}".format(self.name, str(exc)))
+        else:
+            items = self.vms
+
+        specs = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not item.get('name'):
+                self.fail("Parameter error: item {0} of vms must be a dict with a name".format(index))
+            unsupported = [key for key in item if key not in FLEET_VM_OPTIONS]
+            if unsupported:
+                self.fail("Parameter error: unsupported options {0} in item {1} of vms".format(', '.join(sorted(unsupported)), index))
+            tags = self.tags
+            if item.get('tags'):
+                tags = dict(self.tags or dict())
+                tags.update(item['tags'])
+            specs.append(dict(
+                name=item['name'],
+                short_hostname=item.get('short_hostname') or item['name'],
+                network_interface_names=[self.parse_network_interface(nic) for nic in item.get('network_interface_names') or []],
+                custom_data=item.get('custom_data', self.custom_data),
+                tags=tags
+            ))
+
+        names = [spec['name'].lower() for spec in specs]
+        if len(set(names)) != len(names):
+            self.fail("Parameter error: the names of a fleet of virtual machines must be unique")
+        return specs
+
+    def create_fleet_vm(self, spec, image_reference, availability_set_resource, subnet_id):
+        '''
+        Create one virtual machine of a fleet, and its default NIC unless it has network_interface_names. Runs on a
+        worker thread, so errors are raised, not failed.
+
+        :return: id of the virtual machine
+        '''
+        network_interfaces = spec['network_interface_names'] or [self.create_fleet_nic(spec['name'], subnet_id).id]
+        nics = [self.compute_models.NetworkInterfaceReference(id=id, primary=(i == 0))
+                for i, id in enumerate(network_interfaces)]
+        managed_disk = self.compute_models.ManagedDiskParameters(storage_account_type=self.managed_disk_type)
+        vm_resource = self.build_vm_resource(spec['short_hostname'], spec['name'], None, managed_disk, image_reference, nics,
+                                             availability_set_resource, spec['tags'], spec['custom_data'])
+        if self.data_disks:
+            vm_resource.storage_profile.data_disks = [
+                self.compute_models.DataDisk(
+                    lun=data_disk['lun'],
+                    name=spec['name'] + "-datadisk-" + str(count),
+                    caching=data_disk.get('caching', 'ReadOnly'),
+                    create_option=self.compute_models.DiskCreateOptionTypes.empty,
+                    disk_size_gb=data_disk['disk_size_gb'],
+                    managed_disk=self.compute_models.ManagedDiskParameters(storage_account_type=data_disk['managed_disk_type']),
+                ) for count, data_disk in enumerate(self.data_disks)]
+
+        self.log("Create virtual machine {0}".format(spec['name']))
+        poller = self.compute_client.virtual_machines.create_or_update(self.resource_group, spec['name'], vm_resource)
+        return self.get_poller_result(poller).id
+
+    def create_fleet_nic(self, name, subnet_id):
+        '''
+        Like create_default_nic, for a virtual machine of a fleet: the public IP and the security group are created
+        at the same time, and errors are raised, not failed.
+
+        :return: NIC object
+        '''
+        network_interface_name = name + '01'
+        try:
+            return self.network_client.network_interfaces.get(self.resource_group, network_interface_name)
+        except CloudError:
+            pass
+
+        get_pip = None
+        if self.public_ip_allocation_method != 'Disabled':
+            get_pip = self.get_or_begin_create(self.network_client.public_ip_addresses, network_interface_name,
+                                               self.network_models.PublicIPAddress(
+                                                   location=self.location,
+                                                   public_ip_allocation_method=self.public_ip_allocation_method))
+        get_group = self.get_or_begin_create(self.network_client.network_security_groups, network_interface_name,
+                                             self.default_securitygroup_parameters(self.location, self.os_type, self.open_ports))
+
+        group = get_group()
+        parameters = self.network_models.NetworkInterface(
+            location=self.location,
+            ip_configurations=[
+                self.network_models.NetworkInterfaceIPConfiguration(
+                    private_ip_allocation_method='Dynamic',
+                )
+            ]
+        )
+        parameters.ip_configurations[0].subnet = self.network_models.Subnet(id=subnet_id)
+        parameters.ip_configurations[0].name = 'default'
+        parameters.network_security_group = self.network_models.NetworkSecurityGroup(id=group.id,
+                                                                                     location=group.location,
+                                                                                     resource_guid=group.resource_guid)
+        if get_pip:
+            pip_info = get_pip()
+            parameters.ip_configurations[0].public_ip_address = self.network_models.PublicIPAddress(id=pip_info.id,
+                                                                                                    location=pip_info.location,
+                                                                                                    resource_guid=pip_info.resource_guid)
+
+        self.log("Creating NIC {0}".format(network_interface_name))
+        poller = self.network_client.network_interfaces.create_or_update(self.resource_group, network_interface_name, parameters)
+        return self.get_poller_result(poller)
+
+    def get_or_begin_create(self, operations, name, parameters):
+        '''
+        Get a resource of the resource group, or start creating it if it does not exist. Errors are raised.
+
+        :param operations: SDK operations of the resource type, e.g. network_client.public_ip_addresses
+        :return: callable returning the resource, once created
+        '''
+        try:
+            resource = operations.get(self.resource_group, name)
+            return lambda: resource
+        except CloudError:
+            pass
+        self.log("Creating {0}".format(name))
+        poller = operations.create_or_update(self.resource_group, name, parameters)
+        return lambda: self.get_poller_result(poller)
+
+    def resolve_image_reference(self):
+        '''
+        Resolve the image option to an image reference.
+
+        :return: tuple of the ImageReference object, or None without an image, and whether it is a custom image
+        '''
+        if self.image and isinstance(self.image, dict):
+            if all(key in self.image for key in ('publisher', 'offer', 'sku', 'version')):
+                marketplace_image_version = self.get_marketplace_image_version()
+                if self.image['version'] == 'latest':
+                    self.image['version'] = marketplace_image_version
+                    self.log("Using image version {0}".format(self.image['version']))
+
+                return self.compute_models.ImageReference(
+                    publisher=self.image['publisher'],
+                    offer=self.image['offer'],
+                    sku=self.image['sku'],
+                    version=self.image['version']
+                ), False
+            elif self.image.get('name'):
+                return self.get_custom_image_reference(self.image.get('name'), self.image.get('resource_group')), True
+            else:
+                self.fail("parameter error: expecting image to contain [publisher, offer, sku, version] or [name, resource_group]")
+        elif self.image and isinstance(self.image, str):
+            return self.get_custom_image_reference(self.image), True
+        elif self.image:
+            self.fail("parameter error: expecting image to be a string or dict not {0}".format(type(self.image).__name__))
+        return None, False
+
+    def build_vm_resource(self, computer_name, os_disk_name, vhd, managed_disk, image_reference, nics, availability_set_resource,
+                          tags, custom_data):
+        '''
+        Build the parameters of a new virtual machine, without data disks.
+
+        :return: VirtualMachine object
+        '''
+        plan = None
+        if self.plan:
+            plan = self.compute_models.Plan(name=self.plan.get('name'), product=self.plan.get('product'),
+                                            publisher=self.plan.get('publisher'),
+                                            promotion_code=self.plan.get('promotion_code'))
+
+        vm_resource = self.compute_models.VirtualMachine(
+            self.location,
+            tags=tags,
+            os_profile=self.compute_models.OSProfile(
+                admin_username=self.admin_username,
+                computer_name=computer_name,
+            ),
+            hardware_profile=self.compute_models.HardwareProfile(
+                vm_size=self.vm_size
+            ),
+            storage_profile=self.compute_models.StorageProfile(
+                os_disk=self.compute_models.OSDisk(
+                    name=os_disk_name,
+                    vhd=vhd,
+                    managed_disk=managed_disk,
+                    create_option=self.compute_models.DiskCreateOptionTypes.from_image,
+                    caching=self.os_disk_caching,
+                    disk_size_gb=self.os_disk_size_gb
+                ),
+                image_reference=image_reference,
+            ),
+            network_profile=self.compute_models.NetworkProfile(
+                network_interfaces=nics
+            ),
+            availability_set=availability_set_resource,
+            plan=plan
+        )
+
+        if self.admin_password:
+            vm_resource.os_profile.admin_password = self.admin_password
+
+        if custom_data:
+            # Azure SDK (erroneously?) wants native string type for this
+            vm_resource.os_profile.custom_data = to_native(base64.b64encode(to_bytes(custom_data)))
+
+        if self.os_type == 'Linux':
+            vm_resource.os_profile.linux_configuration = self.compute_models.LinuxConfiguration(
+                disable_password_authentication=not self.ssh_password_enabled
+            )
+        if self.ssh_public_keys:
+            ssh_config = self.compute_models.SshConfiguration()
+            ssh_config.public_keys = \
+                [self.compute_models.SshPublicKey(path=key['path'], key_data=key['key_data']) for key in self.ssh_public_keys]
+            vm_resource.os_profile.linux_configuration.ssh = ssh_config
+        return vm_resource
+
     def get_vm(self):
         '''
         Get the VM with expanded instanceView
@@ -1419,6 +1743,7 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
         managed_disk_ids = []
         nic_names = []
         pip_names = []
+        nic_pip_names = []
 
         if self.remove_on_absent.intersection(set(['all', 'virtual_storage'])):
             # store the attached vhd info so we can nuke it after the VM is gone
@@ -1452,41 +1777,67 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
             self.results['deleted_network_interfaces'] = nic_names
             if self.remove_on_absent.intersection(set(['all', 'public_ips'])):
                 # also store each nic's attached public IPs and delete after the NIC is gone
-                for nic_dict in nic_names:
-                    nic = self.get_network_interface(nic_dict['resource_group'], nic_dict['name'])
+                network_interfaces = self.network_client.network_interfaces
+                nics = run_concurrently(lambda nic_dict: network_interfaces.get(nic_dict['resource_group'], nic_dict['name']),
+                                        nic_names)
+                for nic_dict, (nic, exc) in zip(nic_names, nics):
+                    if exc:
+                        self.fail("Error fetching network interface {0} - {1}".format(nic_dict['name'], str(exc)))
+                    nic_pips = []
                     for ipc in nic.ip_configurations:
                         if ipc.public_ip_address:
                             pip_dict = azure_id_to_dict(ipc.public_ip_address.id)
-                            pip_names.append(dict(name=pip_dict['publicIPAddresses'], resource_group=pip_dict['resourceGroups']))
+                            nic_pips.append(dict(name=pip_dict['publicIPAddresses'], resource_group=pip_dict['resourceGroups']))
+                    pip_names.extend(nic_pips)
+                    nic_pip_names.append(nic_pips)
                 self.log('Public IPs to  delete are {0}'.format(str(pip_names)))
                 self.results['deleted_public_ips'] = pip_names
 
         self.log("Deleting virtual machine {0}".format(self.name))
-        self.results['actions'].append("Deleted virtual machine {0}".format(self.name))
         try:
             poller = self.compute_client.virtual_machines.delete(self.resource_group, self.name)
             # wait for the poller to finish
             self.get_poller_result(poller)
         except Exception as exc:
             self.fail("Error deleting virtual machine {0} - {1}".format(self.name, str(exc)))
+        self.results['actions'].append("Deleted virtual machine {0}".format(self.name))
 
-        # TODO: parallelize nic, vhd, and public ip deletions with begin_deleting
-        # TODO: best-effort to keep deleting other linked resources if we encounter an error
+        # Linked resources are removed best-effort: every independent deletion is started before any is
+        # awaited, public IPs follow as soon as the NICs holding them are gone, and errors are reported together.
+        pending = []
+        errors = []
         if self.remove_on_absent.intersection(set(['all', 'virtual_storage'])):
-            self.log('Deleting VHDs')
-            self.delete_vm_storage(vhd_uris)
             self.log('Deleting managed disks')
-            self.delete_managed_disks(managed_disk_ids)
+            for mdi in managed_disk_ids:
+                self.begin_delete(pending, errors, mdi, "managed disk {0}".format(mdi),
+                                  self.rm_client.resources.delete_by_id, mdi, '2017-03-30')
 
+        nic_pending = []
         if self.remove_on_absent.intersection(set(['all', 'network_interfaces'])):
             self.log('Deleting network interfaces')
             for nic_dict in nic_names:
-                self.delete_nic(nic_dict['resource_group'], nic_dict['name'])
+                self.begin_delete(nic_pending, errors, (nic_dict['resource_group'], nic_dict['name']),
+                                  "network interface {0}".format(nic_dict['name']),
+                                  self.network_client.network_interfaces.delete, nic_dict['resource_group'], nic_dict['name'])
+
+        if self.remove_on_absent.intersection(set(['all', 'virtual_storage'])):
+            self.log('Deleting VHDs')
+            self.delete_vm_storage(vhd_uris, errors)
 
+        nics_deleted = self.wait_for_deletions(nic_pending, errors)
         if self.remove_on_absent.intersection(set(['all', 'public_ips'])):
             self.log('Deleting public IPs')
-            for pip_dict in pip_names:
-                self.delete_pip(pip_dict['resource_group'], pip_dict['name'])
+            for nic_dict, nic_pips in zip(nic_names, nic_pip_names):
+                if (nic_dict['resource_group'], nic_dict['name']) not in nics_deleted:
+                    errors.append("Skipped deleting public IPs of network interface {0}".format(nic_dict['name']))
+                    continue
+                for pip_dict in nic_pips:
+                    self.begin_delete(pending, errors, (pip_dict['resource_group'], pip_dict['name']), "public IP {0}".format(pip_dict['name']),
+                                      self.network_client.public_ip_addresses.delete, pip_dict['resource_group'], pip_dict['name'])
+
+        self.wait_for_deletions(pending, errors)
+        if errors:
+            self.fail("Error deleting resources of virtual machine {0} - {1}".format(self.name, '; '.join(errors)))
         return True
 
     def get_network_interface(self, resource_group, name):
@@ -1496,73 +1847,88 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
         except Exception as exc:
             self.fail("Error fetching network interface {0} - {1}".format(name, str(exc)))
 
-    def delete_nic(self, resource_group, name):
-        self.log("Deleting network interface {0}".format(name))
-        self.results['actions'].append("Deleted network interface {0}".format(name))
-        try:
-            poller = self.network_client.network_interfaces.delete(resource_group, name)
-        except Exception as exc:
-            self.fail("Error deleting network interface {0} - {1}".format(name, str(exc)))
-        self.get_poller_result(poller)
-        # Delete doesn't return anything. If we get this far, assume success
-        return True
+    def begin_delete(self, pending, errors, key, description, delete_method, *args):
+        '''
+        Start a long running delete without waiting for it.
 
-    def delete_pip(self, resource_group, name):
-        self.results['actions'].append("Deleted public IP {0}".format(name))
+        :param pending: list collecting (key, description, poller) of started deletions
+        :param errors: list collecting error messages
+        :param key: identifies the resource in the result of wait_for_deletions, e.g. (resource group, name)
+        :param description: resource description used in actions and errors
+        :param delete_method: SDK method returning a poller
+        '''
+        self.log("Deleting {0}".format(description))
         try:
-            poller = self.network_client.public_ip_addresses.delete(resource_group, name)
-            self.get_poller_result(poller)
+            pending.append((key, description, delete_method(*args)))
         except Exception as exc:
-            self.fail("Error deleting {0} - {1}".format(name, str(exc)))
-        # Delete returns nada. If we get here, assume that all is well.
-        return True
+            errors.append("Error deleting {0} - {1}".format(description, str(exc)))
 
-    def delete_managed_disks(self, managed_disk_ids):
-        for mdi in managed_disk_ids:
+    def wait_for_deletions(self, pending, errors):
+        '''
+        Wait for deletions started by begin_delete, recording each one in the actions once it has succeeded.
+        The pollers run in the background, so the total wait is that of the slowest deletion.
+
+        :return: set of keys of the resources deleted
+        '''
+        deleted = set()
+        for key, description, poller in pending:
             try:
-                poller = self.rm_client.resources.delete_by_id(mdi, '2017-03-30')
                 self.get_poller_result(poller)
             except Exception as exc:
-                self.fail("Error deleting managed disk {0} - {1}".format(mdi, str(exc)))
+                errors.append("Error deleting {0} - {1}".format(description, str(exc)))
+                continue
+            self.results['actions'].append("Deleted {0}".format(description))
+            deleted.add(key)
+        return deleted
 
-    def delete_vm_storage(self, vhd_uris):
+    def delete_vm_storage(self, vhd_uris, errors):
         # FUTURE: figure out a cloud_env indepdendent way to delete these
+        blob_clients = dict()
         for uri in vhd_uris:
             self.log("Extracting info from blob uri '{0}'".format(uri))
             try:
                 blob_parts = extract_names_from_blob_uri(uri, self._cloud_environment.suffixes.storage_endpoint)
             except Exception as exc:
-                self.fail("Error parsing blob URI {0}".format(str(exc)))
+                errors.append("Error parsing blob URI {0}".format(str(exc)))
+                continue
             storage_account_name = blob_parts['accountname']
             container_name = blob_parts['containername']
             blob_name = blob_parts['blobname']
 
-            blob_client = self.get_blob_client(self.resource_group, storage_account_name)
+            if storage_account_name not in blob_clients:
+                try:
+                    blob_clients[storage_account_name] = self.create_blob_client(self.resource_group, storage_account_name)
+                except Exception as exc:
+                    # the blobs of this account are left behind, the rest of the teardown goes on
+                    errors.append(str(exc))
+                    blob_clients[storage_account_name] = None
+            blob_client = blob_clients[storage_account_name]
+            if blob_client is None:
+                continue
 
             self.log("Delete blob {0}:{1}".format(container_name, blob_name))
-            self.results['actions'].append("Deleted blob {0}:{1}".format(container_name, blob_name))
             try:
                 blob_client.delete_blob(container_name, blob_name)
             except Exception as exc:
-                self.fail("Error deleting blob {0}:{1} - {2}".format(container_name, blob_name, str(exc)))
+                errors.append("Error deleting blob {0}:{1} - {2}".format(container_name, blob_name, str(exc)))
+                continue
+            self.results['actions'].append("Deleted blob {0}:{1}".format(container_name, blob_name))
 
     def get_marketplace_image_version(self):
-        try:
-            versions = self.compute_client.virtual_machine_images.list(self.location,
-                                                                       self.image['publisher'],
-                                                                       self.image['offer'],
-                                                                       self.image['sku'])
-        except Exception as exc:
-            self.fail("Error fetching image {0} {1} {2} - {3}".format(self.image['publisher'],
-                                                                      self.image['offer'],
-                                                                      self.image['sku'],
-                                                                      str(exc)))
-        if versions and len(versions) > 0:
+        '''
+        Check the image version is available in the location. Versions are served from the catalog cache when
+        it is enabled, and listed again when the version is missing from the cached list.
+
+        :return: name of the image version, the latest version for 'latest'
+        '''
+        versions = self.list_marketplace_image_versions()
+        if self.catalog_cache_enabled and self.image['version'] != 'latest' and self.image['version'] not in versions:
+            versions = self.list_marketplace_image_versions(refresh=True)
+        if versions:
             if self.image['version'] == 'latest':
-                return versions[len(versions) - 1]
-            for version in versions:
-                if version.name == self.image['version']:
-                    return version
+                return versions[-1]
+            if self.image['version'] in versions:
+                return self.image['version']
 
         self.fail("Error could not find image {0} {1} {2} {3}".format(self.image['publisher'],
                                                                       self.image['offer'],
@@ -1570,23 +1936,57 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
                                                                       self.image['version']))
         return None
 
-    def get_custom_image_reference(self, name, resource_group=None):
+    def list_marketplace_image_versions(self, refresh=False):
         try:
-            if resource_group:
-                vm_images = self.compute_client.images.list_by_resource_group(resource_group)
-            else:
-                vm_images = self.compute_client.images.list()
+            return self.list_image_version_names(self.location, self.image['publisher'], self.image['offer'], self.image['sku'],
+                                                 refresh=refresh)
         except Exception as exc:
-            self.fail("Error fetching custom images from subscription - {0}".format(str(exc)))
+            self.fail("Error fetching image {0} {1} {2} - {3}".format(self.image['publisher'],
+                                                                      self.image['offer'],
+                                                                      self.image['sku'],
+                                                                      str(exc)))
 
-        for vm_image in vm_images:
-            if vm_image.name == name:
-                self.log("Using custom image id {0}".format(vm_image.id))
-                return self.compute_models.ImageReference(id=vm_image.id)
+    def get_custom_image_reference(self, name, resource_group=None):
+        image_id = None
+        for refresh in (False, True):
+            try:
+                image_id = self.get_custom_image_index(resource_group, refresh=refresh).get(name)
+            except Exception as exc:
+                self.fail("Error fetching custom images from subscription - {0}".format(str(exc)))
+            if image_id:
+                self.log("Using custom image id {0}".format(image_id))
+                return self.compute_models.ImageReference(id=image_id)
+            if not self.catalog_cache_enabled:
+                break
 
         self.fail("Error could not find image with name {0}".format(name))
         return None
 
+    def accept_plan_terms(self):
+        if not self.plan or not all([self.plan.get('name'), self.plan.get('product'), self.plan.get('publisher')]):
+            self.fail("parameter error: plan must be specified and include name, product, and publisher")
+        try:
+            plan_name = self.plan.get('name')
+            plan_product = self.plan.get('product')
+            plan_publisher = self.plan.get('publisher')
+            term = self.marketplace_client.marketplace_agreements.get(
+                publisher_id=plan_publisher, offer_id=plan_product, plan_id=plan_name)
+            term.accepted = True
+            self.marketplace_client.marketplace_agreements.create(
+                publisher_id=plan_publisher, offer_id=plan_product, plan_id=plan_name, parameters=term)
+        except Exception as exc:
+            self.fail(("Error accepting terms for virtual machine {0} with plan {1}. " +
+                       "Only service admin/account admin users can purchase images " +
+                       "from the marketplace. - {2}").format(self.name, self.plan, str(exc)))
+
+    def get_availability_set_resource(self):
+        if not self.availability_set:
+            return None
+        parsed_availability_set = parse_resource_id(self.availability_set)
+        availability_set = self.get_availability_set(parsed_availability_set.get('resource_group', self.resource_group),
+                                                     parsed_availability_set.get('name'))
+        return self.compute_models.SubResource(availability_set.id)
+
     def get_availability_set(self, resource_group, name):
         try:
             return self.compute_client.availability_sets.get(resource_group, name)
@@ -1615,13 +2015,12 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
         :return: boolean
         '''
         try:
-            sizes = self.compute_client.virtual_machine_sizes.list(self.location)
+            if self.vm_size in self.list_vm_size_names(self.location):
+                return True
+            # sizes may have been added since they were cached
+            return self.catalog_cache_enabled and self.vm_size in self.list_vm_size_names(self.location, refresh=True)
         except Exception as exc:
             self.fail("Error retrieving available machine sizes - {0}".format(str(exc)))
-        for size in sizes:
-            if size.name == self.vm_size:
-                return True
-        return False
 
     def create_default_storage_account(self):
         '''
@@ -1704,6 +2103,52 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
 
         self.log("NIC {0} does not exist.".format(network_interface_name))
 
+        subnet_id = self.get_default_subnet_id()
+
+        pip = None
+        if self.public_ip_allocation_method != 'Disabled':
+            self.results['actions'].append('Created default public IP {0}'.format(self.name + '01'))
+            pip_info = self.create_default_pip(self.resource_group, self.location, self.name + '01', self.public_ip_allocation_method)
+            pip = self.network_models.PublicIPAddress(id=pip_info.id, location=pip_info.location, resource_guid=pip_info.resource_guid)
+
+        self.results['actions'].append('Created default security group {0}'.format(self.name + '01'))
+        group = self.create_default_securitygroup(self.resource_group, self.location, self.name + '01', self.os_type,
+                                                  self.open_ports)
+
+        parameters = self.network_models.NetworkInterface(
+            location=self.location,
+            ip_configurations=[
+                self.network_models.NetworkInterfaceIPConfiguration(
+                    private_ip_allocation_method='Dynamic',
+                )
+            ]
+        )
+        parameters.ip_configurations[0].subnet = self.network_models.Subnet(id=subnet_id)
+        parameters.ip_configurations[0].name = 'default'
+        parameters.network_security_group = self.network_models.NetworkSecurityGroup(id=group.id,
+                                                                                     location=group.location,
+                                                                                     resource_guid=group.resource_guid)
+        parameters.ip_configurations[0].public_ip_address = pip
+
+        self.log("Creating NIC {0}".format(network_interface_name))
+        self.log(self.serialize_obj(parameters, 'NetworkInterface'), pretty_print=True)
+        self.results['actions'].append("Created NIC {0}".format(network_interface_name))
+        try:
+            poller = self.network_client.network_interfaces.create_or_update(self.resource_group,
+                                                                             network_interface_name,
+                                                                             parameters)
+            new_nic = self.get_poller_result(poller)
+        except Exception as exc:
+            self.fail("Error creating network interface {0} - {1}".format(network_interface_name, str(exc)))
+        return new_nic
+
+    def get_default_subnet_id(self):
+        '''
+        Find the subnet default NICs are attached to: subnet_name of virtual_network_name, or else the first subnet
+        of the first virtual network of the resource group.
+
+        :return: subnet id
+        '''
         virtual_network_resource_group = None
         if self.virtual_network_resource_group:
             virtual_network_resource_group = self.virtual_network_resource_group
@@ -1762,43 +2207,7 @@ class AzureRMVirtualMachine(AzureRMModuleBase):
 
             if not subnet_id:
                 self.fail(no_subnets_msg)
-
-        pip = None
-        if self.public_ip_allocation_method != 'Disabled':
-            self.results['actions'].append('Created default public IP {0}'.format(self.name + '01'))
-            pip_info = self.create_default_pip(self.resource_group, self.location, self.name + '01', self.public_ip_allocation_method)
-            pip = self.network_models.PublicIPAddress(id=pip_info.id, location=pip_info.location, resource_guid=pip_info.resource_guid)
-
-        self.results['actions'].append('Created default security group {0}'.format(self.name + '01'))
-        group = self.create_default_securitygroup(self.resource_group, self.location, self.name + '01', self.os_type,
-                                                  self.open_ports)
-
-        parameters = self.network_models.NetworkInterface(
-            location=self.location,
-            ip_configurations=[
-                self.network_models.NetworkInterfaceIPConfiguration(
-                    private_ip_allocation_method='Dynamic',
-                )
-            ]
-        )
-        parameters.ip_configurations[0].subnet = self.network_models.Subnet(id=subnet_id)
-        parameters.ip_configurations[0].name = 'default'
-        parameters.network_security_group = self.network_models.NetworkSecurityGroup(id=group.id,
-                                                                                     location=group.location,
-                                                                                     resource_guid=group.resource_guid)
-        parameters.ip_configurations[0].public_ip_address = pip
-
-        self.log("Creating NIC {0}".format(network_interface_name))
-        self.log(self.serialize_obj(parameters, 'NetworkInterface'), pretty_print=True)
-        self.results['actions'].append("Created NIC {0}".format(network_interface_name))
-        try:
-            poller = self.network_client.network_interfaces.create_or_update(self.resource_group,
-                                                                             network_interface_name,
-                                                                             parameters)
-            new_nic = self.get_poller_result(poller)
-        except Exception as exc:
-            self.fail("Error creating network interface {0} - {1}".format(network_interface_name, str(exc)))
-        return new_nic
+        return subnet_id
 
     def parse_network_interface(self, nic):
         nic = self.parse_resource_to_dict(nic)
@@ -194,7 +194,7 @@ except:
     # This is handled in azure_rm_common
     pass
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase, azure_id_to_dict
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, azure_id_to_dict, run_concurrently
 from ansible.module_utils.common.dict_transformations import camel_dict_to_snake_dict
 from ansible.module_utils.six.moves.urllib.parse import urlparse
 import re
@@ -205,6 +205,10 @@ AZURE_OBJECT_CLASS = 'VirtualMachine'
 AZURE_ENUM_MODULES = ['azure.mgmt.compute.models']
 
 
+def resource_group_of(vm_id):
+    return re.sub('\\/.*', '', re.sub('.*resourceGroups\\/', '', vm_id))
+
+
 class AzureRMVirtualMachineFacts(AzureRMModuleBase):
 
     def __init__(self):
@@ -248,7 +252,7 @@ class AzureRMVirtualMachineFacts(AzureRMModuleBase):
         result = []
 
         try:
-            item = self.compute_client.virtual_machines.get(self.resource_group, self.name)
+            item = self.compute_client.virtual_machines.get(self.resource_group, self.name, expand='instanceview')
         except CloudError as err:
             self.module.warn("Error getting virtual machine {0} - {1}".format(self.name, str(err)))
 
@@ -260,49 +264,48 @@ class AzureRMVirtualMachineFacts(AzureRMModuleBase):
     def list_items(self):
         self.log('List all items')
         try:
-            items = self.compute_client.virtual_machines.list(self.resource_group)
+            vms = self.list_resources('Microsoft.Compute/virtualMachines',
+                                      self.compute_models.VirtualMachine,
+                                      lambda: self.compute_client.virtual_machines.list(self.resource_group),
+                                      resource_group=self.resource_group,
+                                      tags=self.tags)
         except CloudError as exc:
             self.fail("Failed to list all items - {0}".format(str(exc)))
 
+        # the list response already carries the full model, only the instance view is missing; without a resource group
+        # the VMs come from the whole subscription
+        virtual_machines = self.compute_client.virtual_machines
+        instance_views = run_concurrently(lambda vm: virtual_machines.instance_view(resource_group_of(vm.id), vm.name), vms)
+
         results = []
-        for item in items:
-            if self.has_tags(item.tags, self.tags):
-                results.append(self.serialize_vm(self.get_vm(item.name)))
+        for vm, (instance_view, exc) in zip(vms, instance_views):
+            if exc:
+                self.fail("Error getting virtual machine {0} instance view - {1}".format(vm.name, str(exc)))
+            vm.instance_view = instance_view
+            results.append(self.serialize_vm(vm))
         return results
 
-    def get_vm(self, name):
-        '''
-        Get the VM with expanded instanceView
-
-        :return: VirtualMachine object
-        '''
-        try:
-            vm = self.compute_client.virtual_machines.get(self.resource_group, name, expand='instanceview')
-            return vm
-        except Exception as exc:
-            self.fail("Error getting virtual machine {0} - {1}".format(self.name, str(exc)))
-
     def serialize_vm(self, vm):
         '''
         Convert a VirtualMachine object to dict.
 
-        :param vm: VirtualMachine object
+        :param vm: VirtualMachine object, its instance view is fetched unless already expanded
         :return: dict
         '''
 
         result = self.serialize_obj(vm, AZURE_OBJECT_CLASS, enum_modules=AZURE_ENUM_MODULES)
-        resource_group = re.sub('\\/.*', '', re.sub('.*resourceGroups\\/', '', result['id']))
-        instance = None
+        resource_group = resource_group_of(result['id'])
+        instance = vm.instance_view
         power_state = None
 
-        try:
-            instance = self.compute_client.virtual_machines.instance_view(resource_group, vm.name)
-            instance = self.serialize_obj(instance, AZURE_OBJECT_CLASS, enum_modules=AZURE_ENUM_MODULES)
-        except Exception as exc:
-            self.fail("Error getting virtual machine {0} instance view - {1}".format(vm.name, str(exc)))
+        if instance is None:
+            try:
+                instance = self.compute_client.virtual_machines.instance_view(resource_group, vm.name)
+            except Exception as exc:
+                self.fail("Error getting virtual machine {0} instance view - {1}".format(vm.name, str(exc)))
 
-        for index in range(len(instance['statuses'])):
-            code = instance['statuses'][index]['code'].split('/')
+        for status in instance.statuses or []:
+            code = status.code.split('/')
             if code[0] == 'PowerState':
                 power_state = code[1]
 
@@ -495,9 +495,9 @@ class AzureRMVirtualMachineScaleSet(AzureRMModuleBase):
 
             if self.image and isinstance(self.image, dict):
                 if all(key in self.image for key in ('publisher', 'offer', 'sku', 'version')):
-                    marketplace_image = self.get_marketplace_image_version()
+                    marketplace_image_version = self.get_marketplace_image_version()
                     if self.image['version'] == 'latest':
-                        self.image['version'] = marketplace_image.name
+                        self.image['version'] = marketplace_image_version
                         self.log("Using image version {0}".format(self.image['version']))
 
                     image_reference = self.compute_models.ImageReference(
@@ -821,43 +821,52 @@ class AzureRMVirtualMachineScaleSet(AzureRMModuleBase):
         return True
 
     def get_marketplace_image_version(self):
-        try:
-            versions = self.compute_client.virtual_machine_images.list(self.location,
-                                                                       self.image['publisher'],
-                                                                       self.image['offer'],
-                                                                       self.image['sku'])
-        except CloudError as exc:
-            self.fail("Error fetching image {0} {1} {2} - {3}".format(self.image['publisher'],
-                                                                      self.image['offer'],
-                                                                      self.image['sku'],
-                                                                      str(exc)))
-        if versions and len(versions) > 0:
+        '''
+        Check the image version is available in the location. Versions are served from the catalog cache when
+        it is enabled, and listed again when the version is missing from the cached list.
+
+        :return: name of the image version, the latest version for 'latest'
+        '''
+        versions = self.list_marketplace_image_versions()
+        if self.catalog_cache_enabled and self.image['version'] != 'latest' and self.image['version'] not in versions:
+            versions = self.list_marketplace_image_versions(refresh=True)
+        if versions:
             if self.image['version'] == 'latest':
-                return versions[len(versions) - 1]
-            for version in versions:
-                if version.name == self.image['version']:
-                    return version
+                return versions[-1]
+            if self.image['version'] in versions:
+                return self.image['version']
 
         self.fail("Error could not find image {0} {1} {2} {3}".format(self.image['publisher'],
                                                                       self.image['offer'],
                                                                       self.image['sku'],
                                                                       self.image['version']))
+        return None
 
-    def get_custom_image_reference(self, name, resource_group=None):
+    def list_marketplace_image_versions(self, refresh=False):
         try:
-            if resource_group:
-                vm_images = self.compute_client.images.list_by_resource_group(resource_group)
-            else:
-                vm_images = self.compute_client.images.list()
-        except Exception as exc:
-            self.fail("Error fetching custom images from subscription - {0}".format(str(exc)))
-
-        for vm_image in vm_images:
-            if vm_image.name == name:
-                self.log("Using custom image id {0}".format(vm_image.id))
-                return self.compute_models.ImageReference(id=vm_image.id)
+            return self.list_image_version_names(self.location, self.image['publisher'], self.image['offer'], self.image['sku'],
+                                                 refresh=refresh)
+        except CloudError as exc:
+            self.fail("Error fetching image {0} {1} {2} - {3}".format(self.image['publisher'],
+                                                                      self.image['offer'],
+                                                                      self.image['sku'],
+                                                                      str(exc)))
+
+    def get_custom_image_reference(self, name, resource_group=None):
+        image_id = None
+        for refresh in (False, True):
+            try:
+                image_id = self.get_custom_image_index(resource_group, refresh=refresh).get(name)
+            except Exception as exc:
+                self.fail("Error fetching custom images from subscription - {0}".format(str(exc)))
+            if image_id:
+                self.log("Using custom image id {0}".format(image_id))
+                return self.compute_models.ImageReference(id=image_id)
+            if not self.catalog_cache_enabled:
+                break
 
         self.fail("Error could not find image with name {0}".format(name))
+        return None
 
     def create_or_update_vmss(self, params):
         try:
@@ -873,13 +882,12 @@ class AzureRMVirtualMachineScaleSet(AzureRMModuleBase):
         :return: boolean
         '''
         try:
-            sizes = self.compute_client.virtual_machine_sizes.list(self.location)
+            if self.vm_size in self.list_vm_size_names(self.location):
+                return True
+            # sizes may have been added since they were cached
+            return self.catalog_cache_enabled and self.vm_size in self.list_vm_size_names(self.location, refresh=True)
         except CloudError as exc:
             self.fail("Error retrieving available machine sizes - {0}".format(str(exc)))
-        for size in sizes:
-            if size.name == self.vm_size:
-                return True
-        return False
 
     def parse_nsg(self):
         nsg = self.security_group
@@ -149,28 +149,27 @@ class AzureRMNetworkInterfaceFacts(AzureRMModuleBase):
     def list_resource_group(self):
         self.log('List items for resource group')
         try:
-            response = self.network_client.virtual_networks.list(self.resource_group)
+            response = self.list_resources('Microsoft.Network/virtualNetworks',
+                                           self.network_models.VirtualNetwork,
+                                           lambda: self.network_client.virtual_networks.list(self.resource_group),
+                                           resource_group=self.resource_group,
+                                           tags=self.tags)
         except CloudError as exc:
             self.fail("Failed to list for resource group {0} - {1}".format(self.resource_group, str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                results.append(self.serialize_obj(item, AZURE_OBJECT_CLASS))
-        return results
+        return [self.serialize_obj(item, AZURE_OBJECT_CLASS) for item in response]
 
     def list_items(self):
         self.log('List all for items')
         try:
-            response = self.network_client.virtual_networks.list_all()
+            response = self.list_resources('Microsoft.Network/virtualNetworks',
+                                           self.network_models.VirtualNetwork,
+                                           self.network_client.virtual_networks.list_all,
+                                           tags=self.tags)
         except CloudError as exc:
             self.fail("Failed to list all items - {0}".format(str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                results.append(self.serialize_obj(item, AZURE_OBJECT_CLASS))
-        return results
+        return [self.serialize_obj(item, AZURE_OBJECT_CLASS) for item in response]
 
 
 def main():
@@ -34,8 +34,23 @@ options:
     return_publish_profile:
         description:
             - Indicate wheather to return publishing profile of the web app.
+            - The publishing credentials are only fetched when this is set.
         default: False
         type: bool
+    return_ftp_publish_url:
+        description:
+            - Indicate whether to return the FTP publishing url of the web app. Getting it means downloading the
+              publish profile of every web app, so turn it off when the url is not needed.
+        default: True
+        type: bool
+        version_added: "2.8"
+    max_concurrency:
+        description:
+            - Maximum number of requests made at the same time to get the configuration, app settings and
+              publishing details of the web apps.
+        default: 8
+        type: int
+        version_added: "2.8"
     tags:
         description:
             - Limit results by providing a list of tags. Format tags as 'key' or 'key:value'.
@@ -128,6 +143,7 @@ webapps:
             type: str
         ftp_publish_url:
             description: Publishing url of the web app when depeloyment type is FTP.
+            returned: when I(return_ftp_publish_url) is True.
             type: str
             sample: ftp://xxxx.ftp.azurewebsites.windows.net
         state:
@@ -146,19 +162,49 @@ webapps:
             type: dict
             sample: { tag1: abc }
 '''
+import re
+import xml.etree.ElementTree as ET
+
 try:
     from msrestazure.azure_exceptions import CloudError
-    from msrestazure.azure_operation import AzureOperationPoller
     from azure.common import AzureMissingResourceHttpError, AzureHttpError
+    from azure.mgmt.web.models import Site
 except:
     # This is handled in azure_rm_common
     pass
 
-from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase, run_concurrently
 
 AZURE_OBJECT_CLASS = 'WebApp'
 
 
+def resource_group_of(webapp_id):
+    return re.sub('\\/.*', '', re.sub('.*resourceGroups\\/', '', webapp_id))
+
+
+class FtpPublishUrlTarget(object):
+    '''
+    ElementTree parser target picking the url of the FTP profile out of a publish profile document, so the
+    document can be parsed chunk by chunk as it is received, without building a tree.
+    '''
+
+    def __init__(self):
+        self.url = None
+
+    def start(self, tag, attrib):
+        if tag == 'publishProfile' and attrib.get('publishMethod') == 'FTP':
+            self.url = attrib.get('publishUrl')
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return self.url
+
+
 class AzureRMWebAppFacts(AzureRMModuleBase):
 
     def __init__(self):
@@ -167,7 +213,9 @@ class AzureRMWebAppFacts(AzureRMModuleBase):
             name=dict(type='str'),
             resource_group=dict(type='str'),
             tags=dict(type='list'),
-            return_publish_profile=dict(type=bool, default=False)
+            return_publish_profile=dict(type=bool, default=False),
+            return_ftp_publish_url=dict(type='bool', default=True),
+            max_concurrency=dict(type='int', default=8)
         )
 
         self.results = dict(
@@ -179,6 +227,8 @@ class AzureRMWebAppFacts(AzureRMModuleBase):
         self.resource_group = None
         self.tags = None
         self.return_publish_profile = False
+        self.return_ftp_publish_url = True
+        self.max_concurrency = None
 
         self.framework_names = ['net_framework', 'java', 'php', 'node', 'python', 'dotnetcore', 'ruby']
 
@@ -211,122 +261,94 @@ class AzureRMWebAppFacts(AzureRMModuleBase):
             pass
 
         if item and self.has_tags(item.tags, self.tags):
-            curated_result = self.get_curated_webapp(self.resource_group, self.name, item)
-            result = [curated_result]
+            result = self.get_curated_webapps([(self.resource_group, self.name, item)])
 
         return result
 
     def list_by_resource_group(self):
         self.log('List web apps in resource groups {0}'.format(self.resource_group))
         try:
-            response = list(self.web_client.web_apps.list_by_resource_group(self.resource_group))
+            response = self.list_resources('Microsoft.Web/sites',
+                                           Site,
+                                           lambda: self.web_client.web_apps.list_by_resource_group(self.resource_group),
+                                           resource_group=self.resource_group,
+                                           tags=self.tags)
         except CloudError as exc:
             request_id = exc.request_id if exc.request_id else ''
             self.fail("Error listing web apps in resource groups {0}, request id: {1} - {2}".format(self.resource_group, request_id, str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                curated_output = self.get_curated_webapp(self.resource_group, item.name, item)
-                results.append(curated_output)
-        return results
+        return self.get_curated_webapps([(self.resource_group, item.name, item) for item in response])
 
     def list_all(self):
         self.log('List web apps in current subscription')
         try:
-            response = list(self.web_client.web_apps.list())
+            response = self.list_resources('Microsoft.Web/sites',
+                                           Site,
+                                           self.web_client.web_apps.list,
+                                           tags=self.tags)
         except CloudError as exc:
             request_id = exc.request_id if exc.request_id else ''
             self.fail("Error listing web apps, request id {0} - {1}".format(request_id, str(exc)))
 
-        results = []
-        for item in response:
-            if self.has_tags(item.tags, self.tags):
-                curated_output = self.get_curated_webapp(item.resource_group, item.name, item)
-                results.append(curated_output)
-        return results
+        return self.get_curated_webapps([(resource_group_of(item.id), item.name, item) for item in response])
+
+    # The methods below run on worker threads, see get_curated_webapps: they raise instead of failing.
 
     def list_webapp_configuration(self, resource_group, name):
         self.log('Get web app {0} configuration'.format(name))
-
-        response = []
-
-        try:
-            response = self.web_client.web_apps.get_configuration(resource_group_name=resource_group, name=name)
-        except CloudError as ex:
-            request_id = ex.request_id if ex.request_id else ''
-            self.fail('Error getting web app {0} configuration, request id {1} - {2}'.format(name, request_id, str(ex)))
-
-        return response.as_dict()
+        return self.web_client.web_apps.get_configuration(resource_group_name=resource_group, name=name).as_dict()
 
     def list_webapp_appsettings(self, resource_group, name):
         self.log('Get web app {0} app settings'.format(name))
-
-        response = []
-
-        try:
-            response = self.web_client.web_apps.list_application_settings(resource_group_name=resource_group, name=name)
-        except CloudError as ex:
-            request_id = ex.request_id if ex.request_id else ''
-            self.fail('Error getting web app {0} app settings, request id {1} - {2}'.format(name, request_id, str(ex)))
-
-        return response.as_dict()
+        return self.web_client.web_apps.list_application_settings(resource_group_name=resource_group, name=name).as_dict()
 
     def get_publish_credentials(self, resource_group, name):
         self.log('Get web app {0} publish credentials'.format(name))
-        try:
-            poller = self.web_client.web_apps.list_publishing_credentials(resource_group, name)
-            if isinstance(poller, AzureOperationPoller):
-                response = self.get_poller_result(poller)
-        except CloudError as ex:
-            request_id = ex.request_id if ex.request_id else ''
-            self.fail('Error getting web app {0} publishing credentials - {1}'.format(request_id, str(ex)))
-        return response
+        poller = self.web_client.web_apps.list_publishing_credentials(resource_group, name)
+        if hasattr(poller, 'done'):
+            return self.get_poller_result(poller, description='web app {0} publishing credentials'.format(name))
+        return poller
 
     def get_webapp_ftp_publish_url(self, resource_group, name):
-        import xmltodict
-
         self.log('Get web app {0} app publish profile'.format(name))
 
-        url = None
-        try:
-            content = self.web_client.web_apps.list_publishing_profile_xml_with_secrets(resource_group_name=resource_group, name=name)
-            if not content:
-                return url
-
-            full_xml = ''
-            for f in content:
-                full_xml += f.decode()
-            profiles = xmltodict.parse(full_xml, xml_attribs=True)['publishData']['publishProfile']
-
-            if not profiles:
-                return url
-
-            for profile in profiles:
-                if profile['@publishMethod'] == 'FTP':
-                    url = profile['@publishUrl']
-
-        except CloudError as ex:
-            self.fail('Error getting web app {0} app settings'.format(name))
-
-        return url
-
-    def get_curated_webapp(self, resource_group, name, webapp):
-        pip = self.serialize_obj(webapp, AZURE_OBJECT_CLASS)
-
-        try:
-            site_config = self.list_webapp_configuration(resource_group, name)
-            app_settings = self.list_webapp_appsettings(resource_group, name)
-            publish_cred = self.get_publish_credentials(resource_group, name)
-            ftp_publish_url = self.get_webapp_ftp_publish_url(resource_group, name)
-        except CloudError as ex:
-            pass
-        return self.construct_curated_webapp(webapp=pip,
-                                             configuration=site_config,
-                                             app_settings=app_settings,
-                                             deployment_slot=None,
-                                             ftp_publish_url=ftp_publish_url,
-                                             publish_credentials=publish_cred)
+        content = self.web_client.web_apps.list_publishing_profile_xml_with_secrets(resource_group_name=resource_group, name=name)
+        if not content:
+            return None
+
+        parser = ET.XMLParser(target=FtpPublishUrlTarget())
+        for chunk in content:
+            parser.feed(chunk)
+        return parser.close()
+
+    def get_curated_webapps(self, webapps):
+        '''
+        Curate web apps. Their configuration, app settings and, as requested, publishing credentials and FTP publish
+        url are fetched for all of them together on a bounded pool of threads.
+
+        :param webapps: list of (resource group, name, web app) tuples
+        :return: list of curated web apps, in the order of webapps
+        '''
+        sections = [('configuration', self.list_webapp_configuration),
+                    ('app_settings', self.list_webapp_appsettings)]
+        if self.return_publish_profile:
+            sections.append(('publish_credentials', self.get_publish_credentials))
+        if self.return_ftp_publish_url:
+            sections.append(('ftp_publish_url', self.get_webapp_ftp_publish_url))
+
+        calls = [(index, section, fetch) for index in range(len(webapps)) for section, fetch in sections]
+        outcomes = run_concurrently(lambda call: call[2](webapps[call[0]][0], webapps[call[0]][1]), calls, self.max_concurrency)
+
+        fetched = [dict() for dummy in webapps]
+        for (index, section, dummy), (value, exc) in zip(calls, outcomes):
+            if exc is not None:
+                request_id = getattr(exc, 'request_id', None) or ''
+                msg = 'Error getting web app {0} {1}, request id {2} - {3}'.format(webapps[index][1], section.replace('_', ' '), request_id, str(exc))
+                self.fail(msg)
+            fetched[index][section] = value
+
+        return [self.construct_curated_webapp(webapp=self.serialize_obj(webapp, AZURE_OBJECT_CLASS), deployment_slot=None, **fetched[index])
+                for index, (dummy, dummy, webapp) in enumerate(webapps)]
 
     def construct_curated_webapp(self,
                                  webapp,
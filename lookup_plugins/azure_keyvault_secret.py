@@ -27,12 +27,32 @@ DOCUMENTATION = """
             description: Secret of the service principal.
         tenant_id:
             description: Tenant id of service principal.
+        timeout:
+            description: Seconds to wait for the MSI token endpoint and for each request to the vault through it.
+            default: 5
+            version_added: 2.8
+        cache_ttl:
+            description:
+                - Seconds a secret value is reused by later lookups of the same vault, name and version, with the same
+                  credentials, in this process.
+                - Lookups are templated in the worker process of a task, so values are in practice reused by the lookups
+                  of one task, e.g. its loop items, but not across tasks.
+                - Set to 0 to always fetch the secret.
+            default: 300
+            version_added: 2.8
+        max_concurrency:
+            description: Maximum number of secrets fetched at the same time when several terms are looked up.
+            default: 8
+            version_added: 2.8
     notes:
         - If version is not provided, this plugin will return the latest version of the secret.
         - If ansible is running on Azure Virtual Machine with MSI enabled, client_id, secret and tenant isn't required.
         - For enabling MSI on Azure VM, please refer to this doc https://docs.microsoft.com/en-us/azure/active-directory/managed-service-identity/
         - After enabling MSI on Azure VM, remember to grant access of the Key Vault to the VM by adding a new Acess Policy in Azure Portal.
         - If MSI is not enabled on ansible host, it's required to provide a valid service principal which has access to the key vault.
+        - When client_id is given, the service principal is used and the MSI endpoint is not queried.
+        - The MSI token is only requested on the first lookup. Tokens, clients and secret values are then reused for the
+          lifetime of the process, which is usually the worker process of a single task.
 """
 
 EXAMPLE = """
@@ -48,6 +68,9 @@ EXAMPLE = """
     tenant: 'uvwxyz'
   debug: msg="the value of this secret is {{lookup('azure_keyvault_secret',secretname,vault_url=url, cliend_id=client_id, secret=secret, tenant_id=tenant)}}"
 
+- name: Look up several secrets at once
+  debug: msg="{{ lookup('azure_keyvault_secret', 'dbPassword', 'apiKey', 'sshKey', vault_url='https://yourvault.vault.azure.net', wantlist=True) }}"
+
 # Example below creates an Azure Virtual Machine with SSH public key from key vault using 'azure_keyvault_secret' lookup plugin.
 - name: Create Azure VM
   hosts: localhost
@@ -81,30 +104,92 @@ RETURN = """
     description: secret content string
 """
 
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
 from ansible.errors import AnsibleError, AnsibleParserError
 from ansible.plugins.lookup import LookupBase
+from ansible.utils.display import Display
 import requests
+from requests.adapters import HTTPAdapter
+
+display = Display()
+
+MSI_TOKEN_URL = 'http://169.254.169.254/metadata/identity/oauth2/token'
+KEYVAULT_RESOURCE = 'https://vault.azure.net'
+KEYVAULT_API_VERSION = '2016-10-01'
 
-TOKEN_ACQUIRED = False
+DEFAULT_TIMEOUT = 5
+DEFAULT_CACHE_TTL = 300
+DEFAULT_MAX_CONCURRENCY = 8
+# seconds before its expiry a token is considered expired
+TOKEN_EXPIRY_MARGIN = 300
 
 token_params = {
     'api-version': '2018-02-01',
-    'resource': 'https://vault.azure.net'
+    'resource': KEYVAULT_RESOURCE
 }
 token_headers = {
     'Metadata': 'true'
 }
-token = None
-try:
-    token_res = requests.get('http://169.254.169.254/metadata/identity/oauth2/token', params=token_params, headers=token_headers)
-    token = token_res.json()["access_token"]
-    TOKEN_ACQUIRED = True
-except requests.exceptions.RequestException:
-    print('Unable to fetch MSI token. Will use service principal if provided.')
-    TOKEN_ACQUIRED = False
 
+# state shared by every lookup of the process
+_lock = threading.Lock()
+_session = None
+_msi_token = None
+_msi_available = None
+_clients = dict()
+_secrets = dict()
 
-def lookup_secret_non_msi(terms, vault_url, kwargs):
+
+def get_session():
+    '''
+    requests session shared by all lookups, so connections are kept open and reused.
+    '''
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=DEFAULT_MAX_CONCURRENCY, pool_maxsize=DEFAULT_MAX_CONCURRENCY)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+
+def get_msi_token(timeout):
+    '''
+    Get an access token for Key Vault from the MSI endpoint, on first use only. A host without MSI is remembered
+    as such, so the endpoint is not waited for again.
+
+    :return: access token, or None when MSI is not available
+    '''
+    global _msi_token, _msi_available
+    with _lock:
+        if _msi_available is False:
+            return None
+        if _msi_token and _msi_token['expires_on'] - TOKEN_EXPIRY_MARGIN > time.time():
+            return _msi_token['access_token']
+    try:
+        token_res = get_session().get(MSI_TOKEN_URL, params=token_params, headers=token_headers, timeout=timeout)
+        token_res.raise_for_status()
+        token = token_res.json()
+        token = dict(access_token=token['access_token'], expires_on=float(token.get('expires_on') or time.time() + 3600))
+    except (requests.exceptions.RequestException, ValueError, KeyError):
+        display.vvv('Unable to fetch MSI token. Will use service principal if provided.')
+        with _lock:
+            _msi_available = False
+        return None
+    with _lock:
+        _msi_available = True
+        _msi_token = token
+    return token['access_token']
+
+
+def get_client(client_id, secret, tenant_id):
+    '''
+    KeyVaultClient for a service principal, created once per set of credentials.
+    '''
     import logging
     logging.getLogger('msrestazure.azure_active_directory').addHandler(logging.NullHandler())
     logging.getLogger('msrest.service_client').addHandler(logging.NullHandler())
@@ -112,56 +197,130 @@ def lookup_secret_non_msi(terms, vault_url, kwargs):
     try:
         from azure.common.credentials import ServicePrincipalCredentials
         from azure.keyvault import KeyVaultClient
-        from msrest.exceptions import AuthenticationError, ClientRequestError
-        from azure.keyvault.models.key_vault_error import KeyVaultErrorException
+        from msrest.exceptions import AuthenticationError
     except ImportError:
         raise AnsibleError('The azure_keyvault_secret lookup plugin requires azure.keyvault and azure.common.credentials to be installed.')
 
-    client_id = kwargs.pop('client_id', None)
-    secret = kwargs.pop('secret', None)
-    tenant_id = kwargs.pop('tenant_id', None)
+    key = (client_id, secret, tenant_id)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            try:
+                credentials = ServicePrincipalCredentials(
+                    client_id=client_id,
+                    secret=secret,
+                    tenant=tenant_id
+                )
+                client = KeyVaultClient(credentials)
+            except AuthenticationError:
+                raise AnsibleError('Invalid credentials provided.')
+            _clients[key] = client
+        return client
 
+
+def split_term(term):
+    '''
+    :return: tuple of secret name and version, '' for the latest version
+    '''
+    name, dummy, version = term.partition('/')
+    return name, version
+
+
+def fetch_secret_msi(vault_url, term, token, timeout):
+    secret_params = {'api-version': KEYVAULT_API_VERSION}
+    secret_headers = {'Authorization': 'Bearer ' + token}
     try:
-        credentials = ServicePrincipalCredentials(
-            client_id=client_id,
-            secret=secret,
-            tenant=tenant_id
-        )
-        client = KeyVaultClient(credentials)
-    except AuthenticationError:
-        raise AnsibleError('Invalid credentials provided.')
-
-    ret = []
-    for term in terms:
+        secret_res = get_session().get(vault_url + '/secrets/' + term, params=secret_params, headers=secret_headers, timeout=timeout)
+        return secret_res.json()["value"]
+    except requests.exceptions.RequestException:
+        raise AnsibleError('Failed to fetch secret: ' + term + ' via MSI endpoint.')
+    except (KeyError, ValueError):
+        raise AnsibleError('Failed to fetch secret ' + term + '.')
+
+
+def fetch_secret_non_msi(vault_url, term, client):
+    from msrest.exceptions import ClientRequestError
+    from azure.keyvault.models.key_vault_error import KeyVaultErrorException
+
+    name, version = split_term(term)
+    try:
+        return client.get_secret(vault_url, name, version).value
+    except ClientRequestError:
+        raise AnsibleError('Error occurred in request')
+    except KeyVaultErrorException:
+        raise AnsibleError('Failed to fetch secret ' + term + '.')
+
+
+def lookup_secrets(terms, vault_url, identity, fetch, cache_ttl, max_concurrency):
+    '''
+    Look up secrets, from the cache when they were fetched less than cache_ttl seconds ago, the others concurrently.
+
+    :param identity: tuple identifying the credentials used by fetch; values fetched with other credentials are not reused,
+                     as those may not be allowed to read them
+    :param fetch: callable taking a term and returning the secret value
+    :return: list of secret values, in the order of terms
+    '''
+    now = time.time()
+    values = dict()
+    with _lock:
+        for term in terms:
+            cached = _secrets.get(identity + (vault_url,) + split_term(term))
+            if cached and cached[0] > now:
+                values[term] = cached[1]
+    missing = sorted(set(term for term in terms if term not in values))
+
+    def fetch_term(term):
         try:
-            secret_val = client.get_secret(vault_url, term, '').value
-            ret.append(secret_val)
-        except ClientRequestError:
-            raise AnsibleError('Error occurred in request')
-        except KeyVaultErrorException:
-            raise AnsibleError('Failed to fetch secret ' + term + '.')
-    return ret
+            return fetch(term), None
+        except AnsibleError as exc:
+            return None, exc
+
+    if len(missing) > 1 and max_concurrency > 1:
+        pool = ThreadPool(min(max_concurrency, len(missing)))
+        try:
+            outcomes = pool.map(fetch_term, missing)
+        finally:
+            pool.close()
+    else:
+        outcomes = [fetch_term(term) for term in missing]
+
+    for term, (value, exc) in zip(missing, outcomes):
+        if exc is not None:
+            raise exc
+        values[term] = value
+        if cache_ttl > 0:
+            with _lock:
+                _secrets[identity + (vault_url,) + split_term(term)] = (now + cache_ttl, value)
+    return [values[term] for term in terms]
+
+
+def lookup_secret_non_msi(terms, vault_url, kwargs):
+    identity = ('service_principal', kwargs.pop('client_id', None), kwargs.pop('secret', None), kwargs.pop('tenant_id', None))
+    client = get_client(*identity[1:])
+    return lookup_secrets(terms, vault_url, identity, lambda term: fetch_secret_non_msi(vault_url, term, client),
+                          kwargs['cache_ttl'], kwargs['max_concurrency'])
 
 
 class LookupModule(LookupBase):
 
     def run(self, terms, variables, **kwargs):
 
-        ret = []
         vault_url = kwargs.pop('vault_url', None)
         if vault_url is None:
             raise AnsibleError('Failed to get valid vault url.')
-        if TOKEN_ACQUIRED:
-            secret_params = {'api-version': '2016-10-01'}
-            secret_headers = {'Authorization': 'Bearer ' + token}
-            for term in terms:
-                try:
-                    secret_res = requests.get(vault_url + 'secrets/' + term, params=secret_params, headers=secret_headers)
-                    ret.append(secret_res.json()["value"])
-                except requests.exceptions.RequestException:
-                    raise AnsibleError('Failed to fetch secret: ' + term + ' via MSI endpoint.')
-                except KeyError:
-                    raise AnsibleError('Failed to fetch secret ' + term + '.')
-            return ret
+        vault_url = vault_url.rstrip('/')
+        try:
+            timeout = float(kwargs.pop('timeout', DEFAULT_TIMEOUT))
+            kwargs['cache_ttl'] = float(kwargs.get('cache_ttl', DEFAULT_CACHE_TTL))
+            kwargs['max_concurrency'] = int(kwargs.get('max_concurrency', DEFAULT_MAX_CONCURRENCY))
+        except ValueError:
+            raise AnsibleParserError('timeout, cache_ttl and max_concurrency must be numbers.')
+
+        token = None
+        if not kwargs.get('client_id'):
+            token = get_msi_token(timeout)
+        if token:
+            return lookup_secrets(terms, vault_url, ('msi',), lambda term: fetch_secret_msi(vault_url, term, token, timeout),
+                                  kwargs['cache_ttl'], kwargs['max_concurrency'])
         else:
-            return lookup_secret_non_msi(terms, vault_url, kwargs)
\ No newline at end of file
+            return lookup_secret_non_msi(terms, vault_url, kwargs)
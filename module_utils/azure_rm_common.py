@@ -5,17 +5,27 @@
 
 import os
 import re
+import time
+import random
 import types
 import copy
+import errno
+import hashlib
 import inspect
+import tempfile
 import traceback
 import json
+import socket
+import struct
+import threading
 
+from multiprocessing.pool import ThreadPool
 from os.path import expanduser
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.ansible_release import __version__ as ANSIBLE_VERSION
 from ansible.module_utils.six.moves import configparser
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient, resource_graph_query
 import ansible.module_utils.six.moves.urllib.parse as urlparse
 
 AZURE_COMMON_ARGS = dict(
@@ -90,9 +100,43 @@ ANSIBLE_USER_AGENT = 'Ansible/{0}'.format(ANSIBLE_VERSION)
 CLOUDSHELL_USER_AGENT_KEY = 'AZURE_HTTP_USER_AGENT'
 VSCODEEXT_USER_AGENT_KEY = 'VSCODEEXT_USER_AGENT'
 
+# Opt-in on-disk token cache shared by every task of a play. Set to a file path, or to a
+# boolean-like value to use the default location. The file holds bearer tokens, so it is
+# always created with owner-only permissions.
+AZURE_TOKEN_CACHE_KEY = 'ANSIBLE_AZURE_TOKEN_CACHE'
+AZURE_TOKEN_CACHE_DEFAULT_PATH = '~/.azure/ansible_token_cache.json'
+# tokens closer than this (in seconds) to their expiry are never handed out from the cache
+AZURE_TOKEN_CACHE_SKEW = 300
+
+# Opt-in on-disk cache of compute catalog data (VM sizes, marketplace image versions, custom images)
+# shared by every task of a play. Set to a file path, or to a boolean-like value to use the default
+# location; entries are reused for ANSIBLE_AZURE_CATALOG_CACHE_TTL seconds.
+AZURE_CATALOG_CACHE_KEY = 'ANSIBLE_AZURE_CATALOG_CACHE'
+AZURE_CATALOG_CACHE_TTL_KEY = 'ANSIBLE_AZURE_CATALOG_CACHE_TTL'
+AZURE_CATALOG_CACHE_DEFAULT_PATH = '~/.azure/ansible_catalog_cache.json'
+AZURE_CATALOG_CACHE_DEFAULT_TTL = 3600
+
+# Opt-in: facts modules list resources with a single Resource Graph query, with tag filters applied
+# by the service. Graph results can lag behind changes by a few seconds, hence not the default.
+AZURE_RESOURCE_GRAPH_KEY = 'ANSIBLE_AZURE_RESOURCE_GRAPH'
+
 CIDR_PATTERN = re.compile(r"(([0-9]|[1-9][0-9]|1[0-9]{2}|2[0-4][0-9]|25[0-5])\.){3}([0-9]|[1-9][0-9]|1"
                           r"[0-9]{2}|2[0-4][0-9]|25[0-5])(/([0-9]|[1-2][0-9]|3[0-2]))")
 
+# upper bound on concurrent ARM requests issued by a single module run
+AZURE_MAX_CONCURRENCY = 8
+
+# polling of long running operations: capped exponential backoff (seconds) unless the service
+# asks for a specific interval through Retry-After
+AZURE_POLL_INITIAL_DELAY = 1
+AZURE_POLL_MAX_DELAY = 30
+# some resources keep showing up in GETs for a while after their delete has completed
+AZURE_DELETE_TIMEOUT = 1800
+
+# msrest serializers by enum_modules tuple, see serialize_obj; building the class map means scanning
+# whole model modules, so it is done once per process
+AZURE_SERIALIZERS = dict()
+
 AZURE_SUCCESS_STATE = "Succeeded"
 AZURE_FAILED_STATE = "Failed"
 
@@ -110,6 +154,11 @@ except ImportError:
     # Doing so would require catching Exception for all imports of Azure dependencies in modules and module_utils.
     importlib = None
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 try:
     from packaging.version import Version
     HAS_PACKAGING_VERSION = True
@@ -131,36 +180,11 @@ try:
     from msrestazure.azure_active_directory import AADTokenCredentials
     from msrestazure.azure_exceptions import CloudError
     from msrestazure.azure_active_directory import MSIAuthentication
+    from msrest.authentication import BasicTokenAuthentication
     from msrestazure.tools import parse_resource_id, resource_id, is_valid_resource_id
     from msrestazure import azure_cloud
     from azure.common.credentials import ServicePrincipalCredentials, UserPassCredentials
-    from azure.mgmt.monitor.version import VERSION as monitor_client_version
-    from azure.mgmt.network.version import VERSION as network_client_version
-    from azure.mgmt.storage.version import VERSION as storage_client_version
-    from azure.mgmt.compute.version import VERSION as compute_client_version
-    from azure.mgmt.resource.version import VERSION as resource_client_version
-    from azure.mgmt.dns.version import VERSION as dns_client_version
-    from azure.mgmt.web.version import VERSION as web_client_version
-    from azure.mgmt.network import NetworkManagementClient
-    from azure.mgmt.resource.resources import ResourceManagementClient
-    from azure.mgmt.resource.subscriptions import SubscriptionClient
-    from azure.mgmt.storage import StorageManagementClient
-    from azure.mgmt.compute import ComputeManagementClient
-    from azure.mgmt.dns import DnsManagementClient
-    from azure.mgmt.monitor import MonitorManagementClient
-    from azure.mgmt.web import WebSiteManagementClient
-    from azure.mgmt.containerservice import ContainerServiceClient
-    from azure.mgmt.marketplaceordering import MarketplaceOrderingAgreements
-    from azure.mgmt.trafficmanager import TrafficManagerManagementClient
-    from azure.storage.cloudstorageaccount import CloudStorageAccount
-    from azure.storage.blob import PageBlobService, BlockBlobService
     from adal.authentication_context import AuthenticationContext
-    from azure.mgmt.sql import SqlManagementClient
-    from azure.mgmt.rdbms.postgresql import PostgreSQLManagementClient
-    from azure.mgmt.rdbms.mysql import MySQLManagementClient
-    from azure.mgmt.containerregistry import ContainerRegistryManagementClient
-    from azure.mgmt.containerinstance import ContainerInstanceManagementClient
-    from azure.mgmt.cdn import CdnManagementClient
 except ImportError as exc:
     HAS_AZURE_EXC = exc
     HAS_AZURE = False
@@ -174,6 +198,51 @@ except ImportError:
     CLIError = Exception
 
 
+# Management SDK packages are only imported when a client or models property is first used, so a
+# module pays the import cost of the packages it actually talks to and nothing else.
+AZURE_SDK_CLASSES = dict(
+    NetworkManagementClient=('azure.mgmt.network', 'azure-mgmt-network'),
+    ResourceManagementClient=('azure.mgmt.resource.resources', 'azure-mgmt-resource'),
+    SubscriptionClient=('azure.mgmt.resource.subscriptions', 'azure-mgmt-resource'),
+    StorageManagementClient=('azure.mgmt.storage', 'azure-mgmt-storage'),
+    ComputeManagementClient=('azure.mgmt.compute', 'azure-mgmt-compute'),
+    DnsManagementClient=('azure.mgmt.dns', 'azure-mgmt-dns'),
+    MonitorManagementClient=('azure.mgmt.monitor', 'azure-mgmt-monitor'),
+    WebSiteManagementClient=('azure.mgmt.web', 'azure-mgmt-web'),
+    ContainerServiceClient=('azure.mgmt.containerservice', 'azure-mgmt-containerservice'),
+    MarketplaceOrderingAgreements=('azure.mgmt.marketplaceordering', 'azure-mgmt-marketplaceordering'),
+    TrafficManagerManagementClient=('azure.mgmt.trafficmanager', 'azure-mgmt-trafficmanager'),
+    SqlManagementClient=('azure.mgmt.sql', 'azure-mgmt-sql'),
+    PostgreSQLManagementClient=('azure.mgmt.rdbms.postgresql', 'azure-mgmt-rdbms'),
+    MySQLManagementClient=('azure.mgmt.rdbms.mysql', 'azure-mgmt-rdbms'),
+    ContainerRegistryManagementClient=('azure.mgmt.containerregistry', 'azure-mgmt-containerregistry'),
+    ContainerInstanceManagementClient=('azure.mgmt.containerinstance', 'azure-mgmt-containerinstance'),
+    CdnManagementClient=('azure.mgmt.cdn', 'azure-mgmt-cdn'),
+    PageBlobService=('azure.storage.blob', 'azure-storage'),
+    BlockBlobService=('azure.storage.blob', 'azure-storage'),
+    KeyVaultClient=('azure.keyvault', 'azure-keyvault'),
+    KeyVaultAuthentication=('azure.keyvault', 'azure-keyvault'),
+)
+
+KEYVAULT_RESOURCE = 'https://vault.azure.net'
+
+
+def import_azure_sdk_class(class_name):
+    '''
+    Import an Azure SDK class listed in AZURE_SDK_CLASSES.
+
+    :param class_name: name of the SDK class
+    :return: the class
+    :raises ImportError: with a message naming the missing package
+    '''
+    module_name, package_name = AZURE_SDK_CLASSES[class_name]
+    try:
+        return getattr(importlib.import_module(module_name), class_name)
+    except ImportError as exc:
+        raise ImportError("Do you have {0} installed? Try `pip install ansible[azure]`"
+                          "- {1}".format(package_name, exc))
+
+
 def azure_id_to_dict(id):
     pieces = re.sub(r'^\/', '', id).split('/')
     result = {}
@@ -196,6 +265,211 @@ def normalize_location_name(name):
     return name.replace(' ', '').lower()
 
 
+def retry_after_seconds(headers):
+    '''
+    Return the polling interval requested through a Retry-After header, or None.
+
+    :param headers: response headers (any mapping with case-insensitive get)
+    '''
+    if not headers:
+        return None
+    try:
+        return max(0, int(headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return None
+
+
+def response_headers(response):
+    '''
+    Return the headers of the HTTP response behind an SDK result, or None.
+
+    :param response: ClientRawResponse (from raw=True), LROPoller, or HTTP response
+    '''
+    polling_method = getattr(response, '_polling_method', None)
+    if polling_method is not None:
+        # last response received by the polling method of the poller
+        response = getattr(polling_method, '_response', None)
+    response = getattr(response, 'response', response)
+    return getattr(response, 'headers', None)
+
+
+class AzureRMPollingTimeout(Exception):
+    pass
+
+
+def run_concurrently(func, items, max_workers=AZURE_MAX_CONCURRENCY):
+    '''
+    Call func once per item on a bounded pool of threads.
+
+    func runs outside the main thread, so it must not call fail() (fail_json exits via SystemExit);
+    exceptions are captured and handed back to the caller instead.
+
+    :param func: callable taking a single item
+    :param items: iterable of items
+    :param max_workers: maximum number of calls in flight
+    :return: list of (result, exception) tuples, in the order of items
+    '''
+    items = list(items)
+
+    def _call(item):
+        try:
+            return func(item), None
+        except Exception as exc:
+            return None, exc
+
+    if len(items) < 2 or max_workers < 2:
+        return [_call(item) for item in items]
+    pool = ThreadPool(min(max_workers, len(items)))
+    try:
+        return pool.map(_call, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+AZURE_DEPLOYMENT_FINISHED_STATES = ['Canceled', 'Failed', 'Deleted', 'Succeeded']
+
+
+def ipv4_to_int(address):
+    '''
+    Convert a dotted IPv4 address to an integer.
+
+    :raises ValueError: when address is not a dotted IPv4 address
+    '''
+    try:
+        packed = socket.inet_aton(address)
+    except (socket.error, TypeError):
+        packed = None
+    # inet_aton also accepts shorthands such as 10.1
+    if packed is None or socket.inet_ntoa(packed) != address:
+        raise ValueError("{0} is not a valid IPv4 address".format(address))
+    return struct.unpack('!I', packed)[0]
+
+
+def int_to_ipv4(value):
+    return socket.inet_ntoa(struct.pack('!I', value))
+
+
+def merge_ip_ranges(ranges):
+    '''
+    Merge overlapping and adjacent IPv4 ranges. The range 0.0.0.0 - 0.0.0.0, which firewalls of Azure databases
+    read as all Azure-internal addresses, is never merged with others.
+
+    :param ranges: list of (start, end) address tuples
+    :return: sorted list of merged (start, end) address tuples
+    '''
+    merged = []
+    for start, end in sorted((ipv4_to_int(start), ipv4_to_int(end)) for start, end in ranges):
+        if merged and start != 0 and merged[-1][1] != 0 and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(int_to_ipv4(start), int_to_ipv4(end)) for start, end in merged]
+
+
+def firewall_rule_changes(desired, existing, state='present', purge=False):
+    '''
+    Compute the changes bringing the firewall rules of a server to a desired rule set. A named desired rule is
+    matched by name. A rule without a name is satisfied by any existing rule with the same range that no named
+    desired rule takes, or else created under a name derived from its range.
+
+    :param desired: list of dicts with name (None for unnamed rules), start_ip_address and end_ip_address
+    :param existing: list of dicts with name, start_ip_address and end_ip_address
+    :param state: 'present' to create and update the desired rules, 'absent' to delete them
+    :param purge: with state 'present', also delete the existing rules matched by no desired rule
+    :return: list of dicts with name, action (create, update or delete), start_ip_address and end_ip_address
+    '''
+    by_name = dict((rule['name'].lower(), rule) for rule in existing)
+
+    # named rules are resolved first: the existing rules they take cannot satisfy an unnamed rule by range,
+    # since they are about to be updated or deleted
+    currents = [by_name.get(rule['name'].lower()) if rule['name'] else None for rule in desired]
+    matched = set(current['name'].lower() for current in currents if current)
+    by_range = dict()
+    for rule in existing:
+        if rule['name'].lower() not in matched:
+            by_range.setdefault((rule['start_ip_address'], rule['end_ip_address']), rule)
+
+    changes = []
+    for rule, current in zip(desired, currents):
+        ip_range = (rule['start_ip_address'], rule['end_ip_address'])
+        name = rule['name']
+        if not name:
+            current = by_range.get(ip_range)
+            if not current:
+                name = ip_range[0] if ip_range[0] == ip_range[1] else '{0}-{1}'.format(*ip_range)
+                current = by_name.get(name.lower())
+        if current:
+            matched.add(current['name'].lower())
+
+        if state == 'absent':
+            if current:
+                changes.append(dict(current, action='delete'))
+        elif not current:
+            changes.append(dict(name=name, action='create', start_ip_address=ip_range[0], end_ip_address=ip_range[1]))
+        elif (current['start_ip_address'], current['end_ip_address']) != ip_range:
+            changes.append(dict(name=current['name'], action='update', start_ip_address=ip_range[0], end_ip_address=ip_range[1]))
+
+    if state == 'present' and purge:
+        changes.extend(dict(rule, action='delete') for rule in existing if rule['name'].lower() not in matched)
+    return changes
+
+
+def deployment_operation_to_dict(operation):
+    return dict(
+        id=operation.id,
+        operation_id=operation.operation_id,
+        status_code=operation.properties.status_code,
+        status_message=operation.properties.status_message,
+        target_resource=dict(
+            id=operation.properties.target_resource.id,
+            resource_name=operation.properties.target_resource.resource_name,
+            resource_type=operation.properties.target_resource.resource_type
+        ) if operation.properties.target_resource else None,
+        provisioning_state=operation.properties.provisioning_state,
+    )
+
+
+def failed_deployment_operations(rm_client, resource_group, deployment_name, max_workers=AZURE_MAX_CONCURRENCY):
+    '''
+    Collect the failed operations of a deployment and, recursively, of the nested deployments they target. The
+    nested deployments of each level are listed concurrently. A nested deployment that cannot be listed only
+    contributes the operation that targets it.
+
+    :param rm_client: ResourceManagementClient
+    :return: list of operation dicts, each failed nested deployment operation followed by its own failed operations
+    :raises CloudError: when the operations of the deployment itself cannot be listed
+    '''
+    def list_failed(deployment):
+        return [operation for operation in rm_client.deployment_operations.list(*deployment)
+                if operation.properties.provisioning_state == 'Failed']
+
+    def nested_deployment(operation):
+        target = operation.properties.target_resource
+        if target and target.id and 'Microsoft.Resources/deployments' in target.id:
+            return parse_resource_id(target.id).get('resource_group') or resource_group, target.resource_name
+        return None
+
+    def expand(failed):
+        # failed holds the failed operations of each deployment of a level; the nested deployments they target
+        # form the next level
+        nested = sorted(set(filter(None, (nested_deployment(operation) for operations in failed for operation in operations))))
+        nested_results = dict(zip(nested, collect(nested))) if nested else dict()
+        results = []
+        for operations in failed:
+            result = []
+            for operation in operations:
+                result.append(deployment_operation_to_dict(operation))
+                result.extend(nested_results.get(nested_deployment(operation)) or [])
+            results.append(result)
+        return results
+
+    def collect(deployments):
+        return expand([operations or [] for operations, dummy in run_concurrently(list_failed, deployments, max_workers)])
+
+    return expand([list_failed((resource_group, deployment_name))])[0]
+
+
 # FUTURE: either get this from the requirements file (if we can be sure it's always available at runtime)
 # or generate the requirements files from this so we only have one source of truth to maintain...
 AZURE_PKG_VERSIONS = {
@@ -241,7 +515,7 @@ class AzureRMModuleBase(object):
     def __init__(self, derived_arg_spec, bypass_checks=False, no_log=False,
                  check_invalid_arguments=None, mutually_exclusive=None, required_together=None,
                  required_one_of=None, add_file_common_args=False, supports_check_mode=False,
-                 required_if=None, supports_tags=True, facts_module=False, skip_exec=False):
+                 required_if=None, supports_tags=True, facts_module=False, skip_exec=False, report_poll_stats=False):
 
         merged_arg_spec = dict()
         merged_arg_spec.update(AZURE_COMMON_ARGS)
@@ -293,7 +567,13 @@ class AzureRMModuleBase(object):
         self._containerservice_client = None
         self._traffic_manager_management_client = None
         self._monitor_client = None
+        self._graph_client = None
+        self._catalog_cache = AzureRMCatalogCache.from_env()
         self._resource = None
+        self.poll_stats = []
+        # poll_stats is only added to the results of modules documenting it in RETURN
+        self.report_poll_stats = report_poll_stats
+        self._last_response = threading.local()
 
         self.check_mode = self.module.check_mode
         self.api_profile = self.module.params.get('api_profile')
@@ -309,6 +589,8 @@ class AzureRMModuleBase(object):
 
         if not skip_exec:
             res = self.exec_module(**self.module.params)
+            if self.report_poll_stats and self.poll_stats:
+                res['poll_stats'] = self.poll_stats
             self.module.exit_json(**res)
 
     def check_client_version(self, client_type):
@@ -333,6 +615,34 @@ class AzureRMModuleBase(object):
     def exec_module(self, **kwargs):
         self.fail("Error: {0} failed to implement exec_module method.".format(self.__class__.__name__))
 
+    def get_sdk_class(self, class_name):
+        '''
+        Import an Azure SDK class on first use, failing the module if its package is missing.
+
+        :param class_name: name of a class listed in AZURE_SDK_CLASSES
+        :return: the class
+        '''
+        try:
+            return import_azure_sdk_class(class_name)
+        except ImportError as exc:
+            self.fail(str(exc))
+
+    def get_keyvault_client(self):
+        '''
+        Create a KeyVaultClient authenticating as the service principal of the module. Each resource
+        challenged for is only issued one token, shared by every request of the client.
+
+        :return: KeyVaultClient
+        '''
+        if self.credentials.get('client_id') is None or self.credentials.get('secret') is None:
+            self.fail('Please specify client_id, secret and tenant to access azure Key Vault.')
+
+        def auth_callback(server, resource, scope):
+            token = self.azure_auth.get_resource_token(resource or KEYVAULT_RESOURCE)
+            return token['token_type'], token['access_token']
+
+        return self.get_sdk_class('KeyVaultClient')(self.get_sdk_class('KeyVaultAuthentication')(auth_callback))
+
     def fail(self, msg, **kwargs):
         '''
         Shortcut for calling module.fail()
@@ -341,6 +651,8 @@ class AzureRMModuleBase(object):
         :param kwargs: Any key=value pairs
         :return: None
         '''
+        if getattr(self, 'report_poll_stats', False) and self.poll_stats:
+            kwargs.setdefault('poll_stats', self.poll_stats)
         self.module.fail_json(msg=msg, **kwargs)
 
     def deprecate(self, msg, version=None):
@@ -423,6 +735,92 @@ class AzureRMModuleBase(object):
             result = True
         return result
 
+    def list_resources(self, resource_type, model, list_method, resource_group=None, tags=None, subscriptions=None):
+        '''
+        Used in fact modules to list the resources of one type carrying tag_list tags.
+
+        With ANSIBLE_AZURE_RESOURCE_GRAPH set this is one paged Resource Graph query, tags being filtered
+        by the service. Otherwise, or if the query fails (e.g. the provider is not registered), list_method
+        is called and tags are filtered with has_tags.
+
+        :param resource_type: ARM resource type, cased as ARM reports it, e.g. Microsoft.Network/networkInterfaces
+        :param model: SDK model class Resource Graph rows are deserialized into
+        :param list_method: callable returning the SDK list of the resources of the subscription of the module
+        :param resource_group: only list resources of this resource group
+        :param tags: list of tag keys or tag key:value pairs
+        :param subscriptions: list of subscription ids to query, defaults to the subscription of the module; other
+            subscriptions can only be listed through Resource Graph, the module fails otherwise
+        :return: list of model objects
+        '''
+        subscriptions = subscriptions or [self.subscription_id]
+        if os.environ.get(AZURE_RESOURCE_GRAPH_KEY, '').lower() in ('1', 'true', 'yes', 'on'):
+            query = resource_graph_query(resource_type, resource_group, tags)
+            try:
+                items = [model.deserialize(row) for row in self.graph_client.iter_resource_graph(query, subscriptions)]
+                for item in items:
+                    # Resource Graph reports types in lower case
+                    item.type = resource_type
+                return items
+            except Exception as exc:
+                self.log('Resource Graph query failed, using list calls - {0}'.format(str(exc)))
+        if [subscription for subscription in subscriptions if subscription != self.subscription_id]:
+            self.fail("Listing the resources of other subscriptions requires Resource Graph, "
+                      "set {0} to enable it".format(AZURE_RESOURCE_GRAPH_KEY))
+        return [item for item in list_method() if self.has_tags(item.tags, tags)]
+
+    @property
+    def catalog_cache_enabled(self):
+        return self._catalog_cache is not None
+
+    def cached_catalog(self, fetch, key_parts, refresh=False):
+        '''
+        Return catalog data from the catalog cache, or fetch and cache it. Without ANSIBLE_AZURE_CATALOG_CACHE
+        this just calls fetch.
+
+        :param fetch: callable returning the data, which must be JSON serializable
+        :param key_parts: list of what the data depends on, besides the subscription
+        :param refresh: ignore the cached entry, e.g. when it lacks something that may have been created since
+        :return: the data
+        '''
+        if not self._catalog_cache:
+            return fetch()
+        key = AzureRMCatalogCache.make_key(self.subscription_id, *key_parts)
+        entry = self._catalog_cache.get(key) if not refresh else None
+        if entry:
+            return entry['value']
+        value = fetch()
+        self._catalog_cache.set(key, value)
+        return value
+
+    def list_vm_size_names(self, location, refresh=False):
+        '''
+        :return: names of the virtual machine sizes available in location
+        '''
+        return self.cached_catalog(lambda: [size.name for size in self.compute_client.virtual_machine_sizes.list(location)],
+                                   ['vm_sizes', normalize_location_name(location)], refresh)
+
+    def list_image_version_names(self, location, publisher, offer, sku, refresh=False):
+        '''
+        :return: versions of a marketplace image available in location, in the order the service lists them
+        '''
+        return self.cached_catalog(lambda: [version.name for version in
+                                            self.compute_client.virtual_machine_images.list(location, publisher, offer, sku)],
+                                   ['image_versions', normalize_location_name(location), publisher, offer, sku], refresh)
+
+    def get_custom_image_index(self, resource_group=None, refresh=False):
+        '''
+        :param resource_group: only index the images of this resource group
+        :return: dict of custom image names to ids; the first image listed wins when names repeat across resource groups
+        '''
+        def fetch():
+            images = self.compute_client.images.list_by_resource_group(resource_group) if resource_group else \
+                self.compute_client.images.list()
+            index = dict()
+            for image in images:
+                index.setdefault(image.name, image.id)
+            return index
+        return self.cached_catalog(fetch, ['custom_images', resource_group], refresh)
+
     def get_resource_group(self, resource_group):
         '''
         Fetch a resource group.
@@ -457,36 +855,260 @@ class AzureRMModuleBase(object):
         :param enum_modules: List of module names to build enum dependencies from.
         :return: serialized result
         '''
-        enum_modules = [] if enum_modules is None else enum_modules
-
-        dependencies = dict()
-        if enum_modules:
-            for module_name in enum_modules:
+        key = tuple(enum_modules or [])
+        serializer = AZURE_SERIALIZERS.get(key)
+        if serializer is None:
+            dependencies = dict()
+            for module_name in key:
                 mod = importlib.import_module(module_name)
                 for mod_class_name, mod_class_obj in inspect.getmembers(mod, predicate=inspect.isclass):
                     dependencies[mod_class_name] = mod_class_obj
-            self.log("dependencies: ")
-            self.log(str(dependencies))
-        serializer = Serializer(classes=dependencies)
+            if dependencies:
+                self.log("dependencies: ")
+                self.log(str(dependencies))
+            serializer = AZURE_SERIALIZERS[key] = Serializer(classes=dependencies)
         return serializer.body(obj, class_name, keep_readonly=True)
 
-    def get_poller_result(self, poller, wait=5):
+    def poll_until(self, probe, description, timeout=None, initial_delay=AZURE_POLL_INITIAL_DELAY,
+                   max_delay=AZURE_POLL_MAX_DELAY, sleep=None):
+        '''
+        Shared engine for waiting on long running operations. Calls probe until it reports completion,
+        pausing between calls for the interval requested by the service (Retry-After, kept between
+        initial_delay and max_delay) or, failing that, for a capped exponential backoff with jitter. The number of polls and the latency of every operation
+        are recorded in self.poll_stats.
+
+        :param probe: callable returning a tuple (done, result, retry_after); retry_after is in seconds or None
+        :param description: operation name used in logs, stats and errors
+        :param timeout: overall timeout in seconds, None to wait indefinitely
+        :param initial_delay: first backoff interval in seconds
+        :param max_delay: cap of the backoff interval in seconds
+        :param sleep: callable used to pause, defaults to time.sleep
+        :return: result of the final probe
+        :raises AzureRMPollingTimeout: when the operation does not complete within timeout
+        '''
+        sleep = sleep or time.sleep
+        start = time.time()
+        delay = initial_delay
+        polls = 0
+        while True:
+            polls += 1
+            done, result, retry_after = probe()
+            elapsed = time.time() - start
+            if done:
+                break
+            if timeout is not None and elapsed >= timeout:
+                self._record_poll(description, polls, elapsed, timed_out=True)
+                raise AzureRMPollingTimeout("Timed out after {0} seconds waiting for {1}".format(timeout, description))
+            if retry_after is not None:
+                # Retry-After: 0 must not turn into a busy loop, nor a huge value into a stall
+                interval = min(max(retry_after, initial_delay), max_delay)
+            else:
+                interval = delay / 2.0 + random.uniform(0, delay / 2.0)
+                delay = min(delay * 2, max_delay)
+            if timeout is not None:
+                interval = min(interval, timeout - elapsed)
+            sleep(interval)
+        self._record_poll(description, polls, elapsed)
+        return result
+
+    def _record_poll(self, description, polls, elapsed, timed_out=False):
+        stats = dict(operation=description, polls=polls, elapsed=round(elapsed, 3), timed_out=timed_out)
+        self.poll_stats.append(stats)
+        self.log("Polling stats: {0}".format(stats))
+
+    def _remember_response(self, response, *args, **kwargs):
+        self._last_response.headers = response.headers
+
+    def last_retry_after(self):
+        '''
+        Return the Retry-After requested by the last response received by the current thread through a
+        management client, or None.
+        '''
+        return retry_after_seconds(getattr(self._last_response, 'headers', None))
+
+    def forget_last_response(self):
+        self._last_response.headers = None
+
+    def get_poller_result(self, poller, wait=5, timeout=None, description='long running operation'):
         '''
         Consistent method of waiting on and retrieving results from Azure's long poller
 
+        The SDK poller follows Retry-After/Azure-AsyncOperation itself on a background thread; this only
+        waits on that thread, returning as soon as it finishes, and checks it again at the Retry-After of
+        the last response of the operation.
+
         :param poller Azure poller object
+        :param wait maximum interval in seconds between checks of the poller
+        :param timeout overall timeout in seconds, None to wait indefinitely
+        :param description operation name used in logs and stats
         :return object resulting from the original request
         '''
         try:
-            delay = wait
-            while not poller.done():
-                self.log("Waiting for {0} sec".format(delay))
-                poller.wait(timeout=delay)
+            self.poll_until(lambda: (poller.done(), None, retry_after_seconds(response_headers(poller))),
+                            description,
+                            timeout=timeout,
+                            max_delay=wait,
+                            sleep=lambda interval: poller.wait(timeout=interval))
             return poller.result()
         except Exception as exc:
             self.log(str(exc))
             raise
 
+    def wait_until_deleted(self, get_resource, description, timeout=AZURE_DELETE_TIMEOUT):
+        '''
+        Wait until a deleted resource stops being returned by the service. For some Azure resources,
+        instance is hanging around for some time after deletion.
+
+        :param get_resource: callable returning a falsy value once the resource is gone, through a management client
+            so that the Retry-After of its response paces the checks
+        :param description: resource name used in logs and errors
+        :param timeout: overall timeout in seconds
+        '''
+        def probe():
+            self.forget_last_response()
+            return not get_resource(), None, self.last_retry_after()
+
+        try:
+            self.poll_until(probe, "deletion of {0}".format(description), timeout=timeout)
+        except AzureRMPollingTimeout as exc:
+            self.fail(str(exc))
+
+    def apply_changes(self, changes, apply_change, description, max_concurrency=AZURE_MAX_CONCURRENCY, summarize=None):
+        '''
+        Apply the changes computed by a module concurrently, then report them with report_changes. Nothing is applied
+        in check mode. A change carrying an 'error' (met while it was computed) is not applied and is reported failed.
+
+        :param changes: list of change dicts
+        :param apply_change: callable writing one change; it runs on a worker thread, so errors are raised, not failed
+        :param description: what is changed, e.g. 'record set', used in the failure message
+        :param max_concurrency: maximum number of changes applied at the same time
+        :param summarize: see report_changes
+        :return: self.results
+        '''
+        def apply(change):
+            if change.get('error') is not None:
+                raise change['error']
+            return apply_change(change)
+
+        self.results['changed'] = len(changes) > 0
+        outcomes = [(None, change.get('error')) for change in changes]
+        if changes and not self.check_mode:
+            outcomes = run_concurrently(apply, changes, max_concurrency)
+        return self.report_changes(changes, outcomes, description, summarize)
+
+    def report_changes(self, changes, outcomes, description, summarize=None):
+        '''
+        Set self.results['changes'] to one summary per change, with failed and, for a failed change, msg. Fails the
+        module with those results when any change failed.
+
+        :param changes: list of change dicts
+        :param outcomes: list of (result, exception) tuples in the order of changes, as returned by run_concurrently
+        :param description: what is changed, e.g. 'record set', used in the failure message
+        :param summarize: callable taking a change and its result and returning the dict reported for it; defaults to
+            the change without its error
+        :return: self.results
+        '''
+        self.results['changes'] = []
+        for change, (result, exc) in zip(changes, outcomes):
+            if summarize:
+                summary = summarize(change, result)
+            else:
+                summary = dict((key, value) for key, value in change.items() if key != 'error')
+            summary['failed'] = exc is not None
+            if exc is not None:
+                summary['msg'] = str(exc)
+            self.results['changes'].append(summary)
+
+        failed = [summary for summary in self.results['changes'] if summary['failed']]
+        if failed:
+            self.fail("Failed to apply {0} of {1} {2} changes".format(len(failed), len(changes), description), **self.results)
+        return self.results
+
+    def reconcile_firewall_rules(self, firewall_rules, server_name, rules, purge=False, merge=False,
+                                 max_concurrency=AZURE_MAX_CONCURRENCY):
+        '''
+        Bring the firewall rules of a SQL, MySQL or PostgreSQL server to a desired rule set, with a single listing of
+        the rules of the server and concurrent writes. Deletions are confirmed by listing the rules again until
+        the deleted ones are gone, with the backoff of poll_until. Sets changed and changes in self.results and fails
+        when a change failed.
+
+        :param firewall_rules: firewall_rules operations of the management client of the server
+        :param server_name: name of the server, in self.resource_group
+        :param rules: list of dicts with start_ip_address, and optionally name and end_ip_address
+        :param purge: delete the rules of the server not in rules
+        :param merge: merge overlapping and adjacent unnamed rules before comparing
+        :return: self.results
+        '''
+        desired = []
+        for index, rule in enumerate(rules):
+            if not isinstance(rule, dict) or not rule.get('start_ip_address'):
+                self.fail("Parameter error: item {0} of rules must be a dict with a start_ip_address".format(index))
+            desired.append(dict(name=rule.get('name'), start_ip_address=rule['start_ip_address'],
+                                end_ip_address=rule.get('end_ip_address') or rule['start_ip_address']))
+        try:
+            for rule in desired:
+                if ipv4_to_int(rule['start_ip_address']) > ipv4_to_int(rule['end_ip_address']):
+                    raise ValueError("{0} is greater than {1}".format(rule['start_ip_address'], rule['end_ip_address']))
+            if merge:
+                ranges = merge_ip_ranges([(rule['start_ip_address'], rule['end_ip_address']) for rule in desired if not rule['name']])
+                desired = [rule for rule in desired if rule['name']] + \
+                    [dict(name=None, start_ip_address=start, end_ip_address=end) for start, end in ranges]
+        except ValueError as exc:
+            self.fail("Parameter error: rules - {0}".format(str(exc)))
+        names = [rule['name'].lower() for rule in desired if rule['name']]
+        if len(set(names)) != len(names):
+            self.fail("Parameter error: the names of rules must be unique")
+
+        def list_rules():
+            return [dict(name=rule.name, start_ip_address=rule.start_ip_address, end_ip_address=rule.end_ip_address)
+                    for rule in firewall_rules.list_by_server(resource_group_name=self.resource_group, server_name=server_name)]
+
+        try:
+            existing = list_rules()
+        except Exception as exc:
+            self.fail("Error listing the firewall rules of server {0} - {1}".format(server_name, str(exc)))
+
+        changes = firewall_rule_changes(desired, existing, self.state, purge)
+
+        def apply_change(change):
+            if change['action'] == 'delete':
+                response = firewall_rules.delete(resource_group_name=self.resource_group,
+                                                 server_name=server_name,
+                                                 firewall_rule_name=change['name'])
+            else:
+                response = firewall_rules.create_or_update(resource_group_name=self.resource_group,
+                                                           server_name=server_name,
+                                                           firewall_rule_name=change['name'],
+                                                           start_ip_address=change['start_ip_address'],
+                                                           end_ip_address=change['end_ip_address'])
+            # depending on the service and the SDK version, writes are long running operations or not
+            if hasattr(response, 'done') and hasattr(response, 'result'):
+                response = self.get_poller_result(response)
+            return response
+
+        self.results['changed'] = len(changes) > 0
+        outcomes = [(None, None)] * len(changes)
+        if changes and not self.check_mode:
+            outcomes = run_concurrently(apply_change, changes, max_concurrency)
+
+            deleted = set(change['name'].lower() for change, (dummy, exc) in zip(changes, outcomes)
+                          if change['action'] == 'delete' and exc is None)
+            if deleted:
+                # rules can be listed for a while after their deletion
+                def probe():
+                    self.forget_last_response()
+                    done = not deleted.intersection(rule['name'].lower() for rule in list_rules())
+                    return done, None, self.last_retry_after()
+
+                try:
+                    self.poll_until(probe, "deletion of firewall rules of {0}".format(server_name), timeout=AZURE_DELETE_TIMEOUT)
+                except AzureRMPollingTimeout as exc:
+                    self.fail(str(exc))
+                except Exception as exc:
+                    self.fail("Error listing the firewall rules of server {0} - {1}".format(server_name, str(exc)))
+
+        return self.report_changes(changes, outcomes, 'firewall rule')
+
     def check_provisioning_state(self, azure_object, requested_state='present'):
         '''
         Check an Azure object's provisioning state. If something did not complete the provisioning
@@ -523,29 +1145,41 @@ class AzureRMModuleBase(object):
                     azure_object.name, azure_object.provisioning_state, AZURE_SUCCESS_STATE))
 
     def get_blob_client(self, resource_group_name, storage_account_name, storage_blob_type='block'):
-        keys = dict()
+        try:
+            return self.create_blob_client(resource_group_name, storage_account_name, storage_blob_type)
+        except Exception as exc:
+            self.fail(str(exc))
+
+    def create_blob_client(self, resource_group_name, storage_account_name, storage_blob_type='block'):
+        '''
+        Like get_blob_client, but raises instead of failing, for callers that carry on with other work.
+
+        :raises Exception: when the keys of the account cannot be listed or the client cannot be created
+        '''
         try:
             # Get keys from the storage account
             self.log('Getting keys')
             account_keys = self.storage_client.storage_accounts.list_keys(resource_group_name, storage_account_name)
         except Exception as exc:
-            self.fail("Error getting keys for account {0} - {1}".format(storage_account_name, str(exc)))
+            raise Exception("Error getting keys for account {0} - {1}".format(storage_account_name, str(exc)))
 
         try:
             self.log('Create blob service')
             if storage_blob_type == 'page':
+                PageBlobService = import_azure_sdk_class('PageBlobService')
                 return PageBlobService(endpoint_suffix=self._cloud_environment.suffixes.storage_endpoint,
                                        account_name=storage_account_name,
                                        account_key=account_keys.keys[0].value)
             elif storage_blob_type == 'block':
+                BlockBlobService = import_azure_sdk_class('BlockBlobService')
                 return BlockBlobService(endpoint_suffix=self._cloud_environment.suffixes.storage_endpoint,
                                         account_name=storage_account_name,
                                         account_key=account_keys.keys[0].value)
             else:
                 raise Exception("Invalid storage blob type defined.")
         except Exception as exc:
-            self.fail("Error creating blob service client for storage account {0} - {1}".format(storage_account_name,
-                                                                                                str(exc)))
+            raise Exception("Error creating blob service client for storage account {0} - {1}".format(storage_account_name,
+                                                                                                      str(exc)))
 
     def create_default_pip(self, resource_group, location, public_ip_name, allocation_method='Dynamic'):
         '''
@@ -611,6 +1245,25 @@ class AzureRMModuleBase(object):
             self.check_provisioning_state(group)
             return group
 
+        parameters = self.default_securitygroup_parameters(location, os_type, open_ports)
+
+        self.log('Creating default security group {0}'.format(security_group_name))
+        try:
+            poller = self.network_client.network_security_groups.create_or_update(resource_group,
+                                                                                  security_group_name,
+                                                                                  parameters)
+        except Exception as exc:
+            self.fail("Error creating default security rule {0} - {1}".format(security_group_name, str(exc)))
+
+        return self.get_poller_result(poller)
+
+    def default_securitygroup_parameters(self, location, os_type, open_ports):
+        '''
+        Build the parameters of a default security group: SSH for Linux, RDP and WinRM for Windows, or one rule per
+        port of open_ports.
+
+        :return: NetworkSecurityGroup object
+        '''
         parameters = self.network_models.NetworkSecurityGroup()
         parameters.location = location
 
@@ -673,16 +1326,7 @@ class AzureRMModuleBase(object):
                                                      priority=priority,
                                                      name=rule_name)
                 )
-
-        self.log('Creating default security group {0}'.format(security_group_name))
-        try:
-            poller = self.network_client.network_security_groups.create_or_update(resource_group,
-                                                                                  security_group_name,
-                                                                                  parameters)
-        except Exception as exc:
-            self.fail("Error creating default security rule {0} - {1}".format(security_group_name, str(exc)))
-
-        return self.get_poller_result(poller)
+        return parameters
 
     @staticmethod
     def _validation_ignore_callback(session, global_config, local_config, **kwargs):
@@ -760,6 +1404,10 @@ class AzureRMModuleBase(object):
         if VSCODEEXT_USER_AGENT_KEY in os.environ:
             client.config.add_user_agent(os.environ[VSCODEEXT_USER_AGENT_KEY])
 
+        # remember the headers of the last response of each thread, for the Retry-After of polling probes
+        if isinstance(getattr(client.config, 'hooks', None), list):
+            client.config.hooks.append(self._remember_response)
+
         if self.azure_auth._cert_validation_mode == 'ignore':
             client.config.session_configuration_callback = self._validation_ignore_callback
 
@@ -782,34 +1430,42 @@ class AzureRMModuleBase(object):
     def storage_client(self):
         self.log('Getting storage client...')
         if not self._storage_client:
-            self._storage_client = self.get_mgmt_svc_client(StorageManagementClient,
+            self._storage_client = self.get_mgmt_svc_client(self.get_sdk_class('StorageManagementClient'),
                                                             base_url=self._cloud_environment.endpoints.resource_manager,
                                                             api_version='2017-10-01')
         return self._storage_client
 
     @property
     def storage_models(self):
-        return StorageManagementClient.models("2017-10-01")
+        return self.get_sdk_class('StorageManagementClient').models("2017-10-01")
 
     @property
     def network_client(self):
         self.log('Getting network client')
         if not self._network_client:
-            self._network_client = self.get_mgmt_svc_client(NetworkManagementClient,
+            self._network_client = self.get_mgmt_svc_client(self.get_sdk_class('NetworkManagementClient'),
                                                             base_url=self._cloud_environment.endpoints.resource_manager,
                                                             api_version='2018-08-01')
         return self._network_client
 
+    @property
+    def graph_client(self):
+        self.log('Getting resource graph client')
+        if not self._graph_client:
+            self._graph_client = self.get_mgmt_svc_client(GenericRestClient,
+                                                          base_url=self._cloud_environment.endpoints.resource_manager)
+        return self._graph_client
+
     @property
     def network_models(self):
         self.log("Getting network models...")
-        return NetworkManagementClient.models("2018-08-01")
+        return self.get_sdk_class('NetworkManagementClient').models("2018-08-01")
 
     @property
     def rm_client(self):
         self.log('Getting resource manager client')
         if not self._resource_client:
-            self._resource_client = self.get_mgmt_svc_client(ResourceManagementClient,
+            self._resource_client = self.get_mgmt_svc_client(self.get_sdk_class('ResourceManagementClient'),
                                                              base_url=self._cloud_environment.endpoints.resource_manager,
                                                              api_version='2017-05-10')
         return self._resource_client
@@ -817,13 +1473,13 @@ class AzureRMModuleBase(object):
     @property
     def rm_models(self):
         self.log("Getting resource manager models")
-        return ResourceManagementClient.models("2017-05-10")
+        return self.get_sdk_class('ResourceManagementClient').models("2017-05-10")
 
     @property
     def compute_client(self):
         self.log('Getting compute client')
         if not self._compute_client:
-            self._compute_client = self.get_mgmt_svc_client(ComputeManagementClient,
+            self._compute_client = self.get_mgmt_svc_client(self.get_sdk_class('ComputeManagementClient'),
                                                             base_url=self._cloud_environment.endpoints.resource_manager,
                                                             api_version='2017-03-30')
         return self._compute_client
@@ -831,13 +1487,13 @@ class AzureRMModuleBase(object):
     @property
     def compute_models(self):
         self.log("Getting compute models")
-        return ComputeManagementClient.models("2017-03-30")
+        return self.get_sdk_class('ComputeManagementClient').models("2017-03-30")
 
     @property
     def dns_client(self):
         self.log('Getting dns client')
         if not self._dns_client:
-            self._dns_client = self.get_mgmt_svc_client(DnsManagementClient,
+            self._dns_client = self.get_mgmt_svc_client(self.get_sdk_class('DnsManagementClient'),
                                                         base_url=self._cloud_environment.endpoints.resource_manager)
         return self._dns_client
 
@@ -845,7 +1501,7 @@ class AzureRMModuleBase(object):
     def web_client(self):
         self.log('Getting web client')
         if not self._web_client:
-            self._web_client = self.get_mgmt_svc_client(WebSiteManagementClient,
+            self._web_client = self.get_mgmt_svc_client(self.get_sdk_class('WebSiteManagementClient'),
                                                         base_url=self._cloud_environment.endpoints.resource_manager,
                                                         api_version='2016-08-01')
         return self._web_client
@@ -854,7 +1510,7 @@ class AzureRMModuleBase(object):
     def containerservice_client(self):
         self.log('Getting container service client')
         if not self._containerservice_client:
-            self._containerservice_client = self.get_mgmt_svc_client(ContainerServiceClient,
+            self._containerservice_client = self.get_mgmt_svc_client(self.get_sdk_class('ContainerServiceClient'),
                                                                      base_url=self._cloud_environment.endpoints.resource_manager)
         return self._containerservice_client
 
@@ -862,7 +1518,7 @@ class AzureRMModuleBase(object):
     def sql_client(self):
         self.log('Getting SQL client')
         if not self._sql_client:
-            self._sql_client = self.get_mgmt_svc_client(SqlManagementClient,
+            self._sql_client = self.get_mgmt_svc_client(self.get_sdk_class('SqlManagementClient'),
                                                         base_url=self._cloud_environment.endpoints.resource_manager)
         return self._sql_client
 
@@ -870,7 +1526,7 @@ class AzureRMModuleBase(object):
     def postgresql_client(self):
         self.log('Getting PostgreSQL client')
         if not self._postgresql_client:
-            self._postgresql_client = self.get_mgmt_svc_client(PostgreSQLManagementClient,
+            self._postgresql_client = self.get_mgmt_svc_client(self.get_sdk_class('PostgreSQLManagementClient'),
                                                                base_url=self._cloud_environment.endpoints.resource_manager)
         return self._postgresql_client
 
@@ -878,7 +1534,7 @@ class AzureRMModuleBase(object):
     def mysql_client(self):
         self.log('Getting MySQL client')
         if not self._mysql_client:
-            self._mysql_client = self.get_mgmt_svc_client(MySQLManagementClient,
+            self._mysql_client = self.get_mgmt_svc_client(self.get_sdk_class('MySQLManagementClient'),
                                                           base_url=self._cloud_environment.endpoints.resource_manager)
         return self._mysql_client
 
@@ -886,7 +1542,7 @@ class AzureRMModuleBase(object):
     def sql_client(self):
         self.log('Getting SQL client')
         if not self._sql_client:
-            self._sql_client = self.get_mgmt_svc_client(SqlManagementClient,
+            self._sql_client = self.get_mgmt_svc_client(self.get_sdk_class('SqlManagementClient'),
                                                         base_url=self._cloud_environment.endpoints.resource_manager)
         return self._sql_client
 
@@ -894,7 +1550,7 @@ class AzureRMModuleBase(object):
     def containerregistry_client(self):
         self.log('Getting container registry mgmt client')
         if not self._containerregistry_client:
-            self._containerregistry_client = self.get_mgmt_svc_client(ContainerRegistryManagementClient,
+            self._containerregistry_client = self.get_mgmt_svc_client(self.get_sdk_class('ContainerRegistryManagementClient'),
                                                                       base_url=self._cloud_environment.endpoints.resource_manager,
                                                                       api_version='2017-10-01')
 
@@ -904,7 +1560,7 @@ class AzureRMModuleBase(object):
     def containerinstance_client(self):
         self.log('Getting container instance mgmt client')
         if not self._containerinstance_client:
-            self._containerinstance_client = self.get_mgmt_svc_client(ContainerInstanceManagementClient,
+            self._containerinstance_client = self.get_mgmt_svc_client(self.get_sdk_class('ContainerInstanceManagementClient'),
                                                                       base_url=self._cloud_environment.endpoints.resource_manager,
                                                                       api_version='2018-06-01')
 
@@ -914,7 +1570,7 @@ class AzureRMModuleBase(object):
     def marketplace_client(self):
         self.log('Getting marketplace agreement client')
         if not self._marketplace_client:
-            self._marketplace_client = self.get_mgmt_svc_client(MarketplaceOrderingAgreements,
+            self._marketplace_client = self.get_mgmt_svc_client(self.get_sdk_class('MarketplaceOrderingAgreements'),
                                                                 base_url=self._cloud_environment.endpoints.resource_manager)
         return self._marketplace_client
 
@@ -922,7 +1578,7 @@ class AzureRMModuleBase(object):
     def traffic_manager_management_client(self):
         self.log('Getting traffic manager client')
         if not self._traffic_manager_management_client:
-            self._traffic_manager_management_client = self.get_mgmt_svc_client(TrafficManagerManagementClient,
+            self._traffic_manager_management_client = self.get_mgmt_svc_client(self.get_sdk_class('TrafficManagerManagementClient'),
                                                                                base_url=self._cloud_environment.endpoints.resource_manager)
         return self._traffic_manager_management_client
 
@@ -930,7 +1586,7 @@ class AzureRMModuleBase(object):
     def monitor_client(self):
         self.log('Getting monitor client')
         if not self._monitor_client:
-            self._monitor_client = self.get_mgmt_svc_client(MonitorManagementClient,
+            self._monitor_client = self.get_mgmt_svc_client(self.get_sdk_class('MonitorManagementClient'),
                                                             base_url=self._cloud_environment.endpoints.resource_manager)
         return self._monitor_client
 
@@ -939,10 +1595,292 @@ class AzureRMAuthException(Exception):
     pass
 
 
+class AzureRMFileCache(object):
+    '''
+    JSON document on disk that can be shared by concurrently running module processes.
+
+    Reads take a shared lock and writes take an exclusive lock on a sidecar lock file (where
+    fcntl is available), and new content is written to a temporary file and renamed into place
+    so readers never observe a partial document.
+    '''
+
+    def __init__(self, path):
+        self.path = os.path.abspath(expanduser(path))
+
+    def _open_lock(self, exclusive):
+        if fcntl is None:
+            return None
+        try:
+            fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        except (IOError, OSError):
+            return None
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        return fd
+
+    @staticmethod
+    def _release_lock(fd):
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as cache_file:
+                data = json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            return dict()
+        return data if isinstance(data, dict) else dict()
+
+    def _dump(self, data):
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, 0o700)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST:
+                raise
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.ansible_azure_cache')
+        try:
+            with os.fdopen(fd, 'w') as cache_file:
+                json.dump(data, cache_file)
+            os.chmod(tmp_path, 0o600)
+            os.rename(tmp_path, self.path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def read(self):
+        lock = self._open_lock(exclusive=False)
+        try:
+            return self._load()
+        finally:
+            self._release_lock(lock)
+
+    def update(self, update_fn):
+        '''
+        Read-modify-write the document under an exclusive lock.
+
+        :param update_fn: callable receiving the current document (a dict) and modifying it in place
+        '''
+        lock = self._open_lock(exclusive=True)
+        try:
+            data = self._load()
+            update_fn(data)
+            self._dump(data)
+        except (IOError, OSError):
+            # a cache that cannot be written is simply not used
+            pass
+        finally:
+            self._release_lock(lock)
+
+
+def token_expires_on(token):
+    '''
+    Return the expiry of an AAD token as a POSIX timestamp, or None when it cannot be determined.
+
+    :param token: token dict as returned by AAD, adal or msrestazure, in camel or snake case
+    '''
+    if not token:
+        return None
+    if token.get('expires_at'):
+        return float(token['expires_at'])
+    expires_on = token.get('expires_on') or token.get('expiresOn')
+    if not expires_on:
+        return None
+    try:
+        return float(expires_on)
+    except (TypeError, ValueError):
+        pass
+    # adal reports a naive local time, e.g. '2018-10-16 11:52:44.288741'
+    for fmt in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S'):
+        try:
+            return time.mktime(time.strptime(str(expires_on), fmt))
+        except ValueError:
+            continue
+    return None
+
+
+class AzureRMTokenCache(AzureRMFileCache):
+    '''
+    Access tokens keyed by credential source, tenant, client and cloud. Entries are only
+    returned while the token has more than AZURE_TOKEN_CACHE_SKEW seconds left to live.
+    '''
+
+    @staticmethod
+    def from_env():
+        setting = os.environ.get(AZURE_TOKEN_CACHE_KEY)
+        if not setting or setting.lower() in ('0', 'false', 'no', 'off'):
+            return None
+        if setting.lower() in ('1', 'true', 'yes', 'on'):
+            setting = AZURE_TOKEN_CACHE_DEFAULT_PATH
+        return AzureRMTokenCache(setting)
+
+    @staticmethod
+    def make_key(*parts):
+        # secrets may be part of the key so a wrong secret can never be answered from the cache;
+        # only the digest is ever written to disk
+        raw = json.dumps([str(part) if part is not None else None for part in parts])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        entry = self.read().get(key)
+        if not entry or entry.get('expires_on', 0) - AZURE_TOKEN_CACHE_SKEW <= time.time():
+            return None
+        return entry
+
+    def set(self, key, token, **extra):
+        expires_on = token_expires_on(token)
+        if expires_on is None or expires_on - AZURE_TOKEN_CACHE_SKEW <= time.time():
+            return
+
+        def _set(data):
+            now = time.time()
+            for stale in [k for k, v in data.items() if v.get('expires_on', 0) <= now]:
+                del data[stale]
+            entry = dict(extra)
+            entry.update(token=token, expires_on=expires_on)
+            data[key] = entry
+
+        self.update(_set)
+
+
+def credentials_token(credentials):
+    '''
+    Return the current token of credentials as a dict with access_token, or None.
+
+    :param credentials: msrest/msrestazure credentials, or the Azure CLI credentials adapter
+    '''
+    token = getattr(credentials, 'token', None)
+    if token:
+        return token
+    # the CLI hands out a callback that reads its own token store
+    token_retriever = getattr(credentials, '_token_retriever', None)
+    if token_retriever:
+        token_type, access_token, full_token = token_retriever()
+        return dict(token_type=token_type, access_token=access_token, expires_on=full_token.get('expiresOn'))
+    return None
+
+
+class AzureRMCachedTokenCredentials(object):
+    '''
+    Credentials serving a token taken from the token cache. The cached token cannot be refreshed by itself:
+    once it nears expiry, or a request signed with it is answered with 401, credentials are acquired again
+    from the original source and sign every later request, so operations outliving the cached token go on.
+    '''
+
+    def __init__(self, token, acquire, on_refresh=None):
+        '''
+        :param token: cached token dict, with access_token
+        :param acquire: callable returning fresh credentials from the original source
+        :param on_refresh: callable receiving the token of the fresh credentials, e.g. to cache it
+        '''
+        self.token = token
+        self._acquire = acquire
+        self._on_refresh = on_refresh
+        self._credentials = None
+        self._lock = threading.Lock()
+
+    def _expired(self):
+        expires_on = token_expires_on(self.token)
+        return expires_on is not None and expires_on - AZURE_TOKEN_CACHE_SKEW <= time.time()
+
+    def _refresh(self):
+        with self._lock:
+            if self._credentials is not None:
+                # another thread refreshed already; fresh credentials refresh themselves
+                return
+            credentials = self._acquire()
+            token = credentials_token(credentials)
+            if token and self._on_refresh:
+                self._on_refresh(token)
+            self._credentials = credentials
+
+    def _retry_unauthorized(self, response, *args, **kwargs):
+        # requests response hook: a request signed with the cached token is signed again with fresh
+        # credentials and resent once
+        if response.status_code != 401 or \
+                response.request.headers.get('Authorization') != 'Bearer {0}'.format(self.token['access_token']):
+            return response
+        try:
+            self._refresh()
+            token = credentials_token(self._credentials)
+        except Exception:
+            return response
+        if not token or not token.get('access_token'):
+            return response
+        request = response.request.copy()
+        request.headers['Authorization'] = '{0} {1}'.format(token.get('token_type') or 'Bearer', token['access_token'])
+        # release the connection before reusing it, as the auth handlers of requests do
+        response.content
+        response.close()
+        retried = response.connection.send(request, **kwargs)
+        retried.history.append(response)
+        retried.request = request
+        return retried
+
+    def signed_session(self, session=None):
+        if self._credentials is None and self._expired():
+            self._refresh()
+        if self._credentials is not None:
+            return self._credentials.signed_session(session) if session is not None else self._credentials.signed_session()
+        session = BasicTokenAuthentication(self.token).signed_session(session)
+        if self._retry_unauthorized not in session.hooks['response']:
+            session.hooks['response'].append(self._retry_unauthorized)
+        return session
+
+    def refresh_session(self, session=None):
+        if self._credentials is None:
+            self._refresh()
+            return self.signed_session(session)
+        return self._credentials.refresh_session(session) if session is not None else self._credentials.refresh_session()
+
+
+class AzureRMCatalogCache(AzureRMFileCache):
+    '''
+    Catalog data that rarely changes, keyed by what it was listed for (subscription, location, publisher,
+    offer, sku, ...). Entries are returned for ttl seconds after they were stored.
+    '''
+
+    def __init__(self, path, ttl=AZURE_CATALOG_CACHE_DEFAULT_TTL):
+        super(AzureRMCatalogCache, self).__init__(path)
+        self.ttl = ttl
+
+    @staticmethod
+    def from_env():
+        setting = os.environ.get(AZURE_CATALOG_CACHE_KEY)
+        if not setting or setting.lower() in ('0', 'false', 'no', 'off'):
+            return None
+        if setting.lower() in ('1', 'true', 'yes', 'on'):
+            setting = AZURE_CATALOG_CACHE_DEFAULT_PATH
+        try:
+            ttl = int(os.environ.get(AZURE_CATALOG_CACHE_TTL_KEY, AZURE_CATALOG_CACHE_DEFAULT_TTL))
+        except ValueError:
+            ttl = AZURE_CATALOG_CACHE_DEFAULT_TTL
+        return AzureRMCatalogCache(setting, ttl)
+
+    @staticmethod
+    def make_key(*parts):
+        return json.dumps([str(part).lower() if part is not None else None for part in parts])
+
+    def get(self, key):
+        entry = self.read().get(key)
+        if not entry or entry.get('stored_on', 0) + self.ttl <= time.time():
+            return None
+        return entry
+
+    def set(self, key, value):
+        def _set(data):
+            now = time.time()
+            for stale in [k for k, v in data.items() if v.get('stored_on', 0) + self.ttl <= now]:
+                del data[stale]
+            data[key] = dict(value=value, stored_on=now)
+
+        self.update(_set)
+
+
 class AzureRMAuth(object):
     def __init__(self, auth_source='auto', profile=None, subscription_id=None, client_id=None, secret=None,
                  tenant=None, ad_user=None, password=None, cloud_environment='AzureCloud', cert_validation_mode='validate',
-                 api_profile='latest', adfs_authority_url=None, fail_impl=None, **kwargs):
+                 api_profile='latest', adfs_authority_url=None, fail_impl=None, token_cache=None, **kwargs):
 
         if fail_impl:
             self._fail_impl = fail_impl
@@ -951,6 +1889,9 @@ class AzureRMAuth(object):
 
         self._cloud_environment = None
         self._adfs_authority_url = None
+        self._token_cache = token_cache if token_cache is not None else AzureRMTokenCache.from_env()
+        self._resource_tokens = dict()
+        self._resource_tokens_lock = threading.Lock()
 
         # authenticate
         self.credentials = self._get_credentials(
@@ -1017,41 +1958,109 @@ class AzureRMAuth(object):
         elif self.credentials.get('client_id') is not None and \
                 self.credentials.get('secret') is not None and \
                 self.credentials.get('tenant') is not None:
-                self.azure_credentials = ServicePrincipalCredentials(client_id=self.credentials['client_id'],
-                                                                     secret=self.credentials['secret'],
-                                                                     tenant=self.credentials['tenant'],
-                                                                     cloud_environment=self._cloud_environment,
-                                                                     verify=self._cert_validation_mode == 'validate')
+                self.azure_credentials = self._get_cached_aad_credentials(
+                    lambda: ServicePrincipalCredentials(client_id=self.credentials['client_id'],
+                                                        secret=self.credentials['secret'],
+                                                        tenant=self.credentials['tenant'],
+                                                        cloud_environment=self._cloud_environment,
+                                                        verify=self._cert_validation_mode == 'validate'),
+                    'service_principal', self.credentials['tenant'], self.credentials['client_id'],
+                    self.credentials['secret'])
 
         elif self.credentials.get('ad_user') is not None and \
                 self.credentials.get('password') is not None and \
                 self.credentials.get('client_id') is not None and \
                 self.credentials.get('tenant') is not None:
 
-                self.azure_credentials = self.acquire_token_with_username_password(
-                    self._adfs_authority_url,
-                    self._resource,
-                    self.credentials['ad_user'],
-                    self.credentials['password'],
-                    self.credentials['client_id'],
-                    self.credentials['tenant'])
+                self.azure_credentials = self._get_cached_aad_credentials(
+                    lambda: self.acquire_token_with_username_password(
+                        self._adfs_authority_url,
+                        self._resource,
+                        self.credentials['ad_user'],
+                        self.credentials['password'],
+                        self.credentials['client_id'],
+                        self.credentials['tenant']),
+                    'adfs', self.credentials['tenant'], self.credentials['client_id'],
+                    self.credentials['ad_user'], self.credentials['password'], self._adfs_authority_url)
 
         elif self.credentials.get('ad_user') is not None and self.credentials.get('password') is not None:
             tenant = self.credentials.get('tenant')
             if not tenant:
                 tenant = 'common'  # SDK default
 
-            self.azure_credentials = UserPassCredentials(self.credentials['ad_user'],
-                                                         self.credentials['password'],
-                                                         tenant=tenant,
-                                                         cloud_environment=self._cloud_environment,
-                                                         verify=self._cert_validation_mode == 'validate')
+            self.azure_credentials = self._get_cached_aad_credentials(
+                lambda: UserPassCredentials(self.credentials['ad_user'],
+                                            self.credentials['password'],
+                                            tenant=tenant,
+                                            cloud_environment=self._cloud_environment,
+                                            verify=self._cert_validation_mode == 'validate'),
+                'user_password', tenant, None, self.credentials['ad_user'], self.credentials['password'])
         else:
             self.fail("Failed to authenticate with provided credentials. Some attributes were missing. "
                       "Credentials must include client_id, secret and tenant or ad_user and password, or "
                       "ad_user, password, client_id, tenant and adfs_authority_url(optional) for ADFS authentication, or "
                       "be logged in using AzureCLI.")
 
+    def _get_cached_aad_credentials(self, acquire, source, tenant, client_id, *secrets):
+        '''
+        Return AAD credentials from the token cache, or acquire them with `acquire` and cache the token.
+
+        :param acquire: callable returning msrestazure AAD credentials; called on a cache miss, or once a cached
+            token nears expiry or is rejected
+        :param source: name of the credential source, part of the cache key
+        :param tenant: tenant id, part of the cache key
+        :param client_id: client id, part of the cache key
+        :param secrets: values that must also match for a cached token to be reused
+        :return: credentials object
+        '''
+        if not self._token_cache:
+            return acquire()
+
+        key = AzureRMTokenCache.make_key(source, tenant, client_id, self._cloud_environment.name,
+                                         self._resource, *secrets)
+        entry = self._token_cache.get(key)
+        if entry:
+            self.log('Using cached {0} token'.format(source))
+            return AzureRMCachedTokenCredentials(entry['token'], acquire,
+                                                 lambda token: self._token_cache.set(key, token))
+
+        credentials = acquire()
+        self._token_cache.set(key, getattr(credentials, 'token', None))
+        return credentials
+
+    def get_resource_token(self, resource):
+        '''
+        Get a service principal token for a data plane resource such as Key Vault. The token is reused until it
+        nears expiry, by this object and, when the token cache is enabled, by later tasks. Safe to call from
+        worker threads: errors are raised, never failed.
+
+        :param resource: resource the token is requested for, e.g. https://vault.azure.net
+        :return: token dict with token_type and access_token
+        '''
+        with self._resource_tokens_lock:
+            token = self._resource_tokens.get(resource)
+            expires_on = token_expires_on(token)
+            if token and (expires_on is None or expires_on - AZURE_TOKEN_CACHE_SKEW > time.time()):
+                return token
+
+            tenant = self.credentials.get('tenant') or 'common'
+            key = AzureRMTokenCache.make_key('resource', tenant, self.credentials['client_id'], self._cloud_environment.name,
+                                             resource, self.credentials['secret'])
+            entry = self._token_cache.get(key) if self._token_cache else None
+            if entry:
+                token = entry['token']
+            else:
+                token = ServicePrincipalCredentials(client_id=self.credentials['client_id'],
+                                                    secret=self.credentials['secret'],
+                                                    tenant=tenant,
+                                                    cloud_environment=self._cloud_environment,
+                                                    resource=resource,
+                                                    verify=self._cert_validation_mode == 'validate').token
+                if self._token_cache:
+                    self._token_cache.set(key, token)
+            self._resource_tokens[resource] = token
+            return token
+
     def fail(self, msg, exception=None, **kwargs):
         self._fail_impl(msg)
 
@@ -1079,26 +2088,70 @@ class AzureRMAuth(object):
         return None
 
     def _get_msi_credentials(self, subscription_id_param=None):
-        credentials = MSIAuthentication()
         subscription_id = subscription_id_param or os.environ.get(AZURE_CREDENTIAL_ENV_MAPPING['subscription_id'], None)
+        cache_key = AzureRMTokenCache.make_key('msi', subscription_id)
+        entry = self._token_cache.get(cache_key) if self._token_cache else None
+        if entry:
+            self.log('Using cached MSI token')
+            return {
+                'credentials': AzureRMCachedTokenCredentials(
+                    entry['token'], MSIAuthentication,
+                    lambda token: self._token_cache.set(cache_key, token, subscription_id=entry['subscription_id'])),
+                'subscription_id': entry['subscription_id']
+            }
+
+        credentials = MSIAuthentication()
         if not subscription_id:
             try:
                 # use the first subscription of the MSI
-                subscription_client = SubscriptionClient(credentials)
+                subscription_client = import_azure_sdk_class('SubscriptionClient')(credentials)
                 subscription = next(subscription_client.subscriptions.list())
                 subscription_id = str(subscription.subscription_id)
             except Exception as exc:
                 self.fail("Failed to get MSI token: {0}. "
                           "Please check whether your machine enabled MSI or grant access to any subscription.".format(str(exc)))
+        if self._token_cache:
+            self._token_cache.set(cache_key, credentials.token, subscription_id=subscription_id)
         return {
             'credentials': credentials,
             'subscription_id': subscription_id
         }
 
     def _get_azure_cli_credentials(self):
+        cache_key = None
+        if self._token_cache:
+            # a login, logout or account switch rewrites the CLI profile, which invalidates the key
+            cli_profile_path = os.path.join(os.environ.get('AZURE_CONFIG_DIR', expanduser('~/.azure')), 'azureProfile.json')
+            try:
+                cache_key = AzureRMTokenCache.make_key('cli', cli_profile_path, os.path.getmtime(cli_profile_path))
+            except OSError:
+                cache_key = None
+            entry = self._token_cache.get(cache_key) if cache_key else None
+            cloud_environment = self._get_well_known_cloud(entry['cloud_environment']) if entry else None
+            if cloud_environment:
+                self.log('Using cached Azure CLI token')
+                return {
+                    'credentials': AzureRMCachedTokenCredentials(
+                        entry['token'], lambda: get_azure_cli_credentials()[0],
+                        lambda token: self._token_cache.set(cache_key, token, subscription_id=entry['subscription_id'],
+                                                            cloud_environment=entry['cloud_environment'])),
+                    'subscription_id': entry['subscription_id'],
+                    'cloud_environment': cloud_environment
+                }
+
         credentials, subscription_id = get_azure_cli_credentials()
         cloud_environment = get_cli_active_cloud()
 
+        # the CLI hands out a callback that reads its own token store; resolve it once so the
+        # token itself can be shared with later tasks
+        if cache_key and self._get_well_known_cloud(cloud_environment.name):
+            try:
+                self._token_cache.set(cache_key, credentials_token(credentials),
+                                      subscription_id=subscription_id,
+                                      cloud_environment=cloud_environment.name)
+            except Exception as exc:
+                self.log('Unable to cache Azure CLI token - {0}'.format(exc))
+
         cli_credentials = {
             'credentials': credentials,
             'subscription_id': subscription_id,
@@ -1106,6 +2159,13 @@ class AzureRMAuth(object):
         }
         return cli_credentials
 
+    @staticmethod
+    def _get_well_known_cloud(name):
+        for dummy, cloud in inspect.getmembers(azure_cloud):
+            if isinstance(cloud, azure_cloud.Cloud) and cloud.name == name:
+                return cloud
+        return None
+
     def _get_env_credentials(self):
         env_credentials = dict()
         for attribute, env_variable in AZURE_CREDENTIAL_ENV_MAPPING.items():
@@ -2,15 +2,101 @@
 #
 # GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
 
+import threading
+
+from ansible.module_utils.six.moves import queue
+
 try:
     from msrestazure.azure_exceptions import CloudError
     from msrestazure.azure_configuration import AzureConfiguration
     from msrest.service_client import ServiceClient
+    from requests.adapters import HTTPAdapter
+    import codecs
     import json
 except ImportError:
     # This is handled in azure_rm_common
     AzureConfiguration = object
 
+# connections kept open per host; should be at least the number of concurrent queries
+DEFAULT_POOL_SIZE = 10
+
+RESOURCE_GRAPH_API_VERSION = '2019-04-01'
+# rows per Resource Graph page; 1000 is the service maximum
+RESOURCE_GRAPH_PAGE_SIZE = 1000
+
+
+def kql_string(value):
+    '''
+    Quote a value as a KQL string literal.
+    '''
+    return "'{0}'".format(str(value).replace('\\', '\\\\').replace("'", "\\'"))
+
+
+def resource_graph_query(resource_type, resource_group=None, tags=None):
+    '''
+    Build a Resource Graph query selecting the resources of one type. Tags are matched the way
+    AzureRMModuleBase.has_tags matches them: a 'key:value' entry requires that value, a bare 'key' (or
+    'key:') requires a non-empty value.
+
+    :param resource_type: ARM resource type, e.g. Microsoft.Network/networkInterfaces
+    :param resource_group: only return resources of this resource group
+    :param tags: list of tag keys or tag key:value pairs
+    :return: KQL query
+    '''
+    clauses = ['type =~ {0}'.format(kql_string(resource_type))]
+    if resource_group:
+        clauses.append('resourceGroup =~ {0}'.format(kql_string(resource_group)))
+    for tag in tags or []:
+        key, dummy, value = tag.partition(':')
+        if value:
+            clauses.append('tostring(tags[{0}]) == {1}'.format(kql_string(key), kql_string(value)))
+        else:
+            clauses.append('isnotempty(tags[{0}])'.format(kql_string(key)))
+    return 'Resources | where {0} | order by id asc'.format(' and '.join(clauses))
+
+
+def prefetch(iterable, depth=1):
+    '''
+    Run an iterator ahead of its consumer on a background thread, keeping up to depth items ready.
+    Closing the returned generator stops the background thread after its current item.
+
+    :param iterable: iterable to consume, e.g. pages of a list operation
+    :param depth: number of items fetched ahead
+    :return: generator yielding the items of iterable
+    '''
+    ready = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    end = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        ready.put((item, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if stop.is_set():
+                    return
+            ready.put((end, None))
+        except Exception as exc:
+            ready.put((end, exc))
+
+    producer = threading.Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+    try:
+        while True:
+            item, exc = ready.get()
+            if item is end:
+                if exc:
+                    raise exc
+                return
+            yield item
+    finally:
+        stop.set()
+
 
 class GenericRestClientConfiguration(AzureConfiguration):
 
@@ -23,6 +109,9 @@ class GenericRestClientConfiguration(AzureConfiguration):
         if not base_url:
             base_url = 'https://management.azure.com'
 
+        self.pool_size = DEFAULT_POOL_SIZE
+        self._session_callback = None
+
         super(GenericRestClientConfiguration, self).__init__(base_url)
 
         self.add_user_agent('genericrestclient/1.0')
@@ -31,17 +120,65 @@ class GenericRestClientConfiguration(AzureConfiguration):
         self.credentials = credentials
         self.subscription_id = subscription_id
 
+    @property
+    def session_configuration_callback(self):
+        return self._configure_session
+
+    @session_configuration_callback.setter
+    def session_configuration_callback(self, callback):
+        # callbacks set by the SDK or by the caller (e.g. to ignore cert validation) still run,
+        # after the connection pool has been sized
+        self._session_callback = callback
+
+    def _configure_session(self, session, global_config, local_config, **kwargs):
+        for protocol in ('http://', 'https://'):
+            adapter = session.get_adapter(protocol)
+            if getattr(adapter, '_pool_maxsize', None) != self.pool_size:
+                session.mount(protocol, HTTPAdapter(pool_connections=self.pool_size,
+                                                    pool_maxsize=self.pool_size,
+                                                    max_retries=adapter.max_retries))
+        if self._session_callback:
+            return self._session_callback(session, global_config, local_config, **kwargs)
+        return kwargs
+
 
 class GenericRestClient(object):
 
-    def __init__(self, credentials, subscription_id, base_url=None):
+    def __init__(self, credentials, subscription_id, base_url=None, pool_size=DEFAULT_POOL_SIZE, keep_alive=True,
+                 retries=None, timeout=None):
+        '''
+        :param pool_size: number of connections kept open per host
+        :param keep_alive: reuse one session, and its open connections, for every query of the client
+        :param retries: number of times a failed request is retried, None for the msrest default
+        :param timeout: connection and read timeout in seconds, None for the msrest default
+        '''
         self.config = GenericRestClientConfiguration(credentials, subscription_id, base_url)
         self._client = ServiceClient(self.config.credentials, self.config)
+        self.configure_connection(pool_size=pool_size, keep_alive=keep_alive, retries=retries, timeout=timeout)
         self.models = None
 
-    def query(self, url, method, query_parameters, header_parameters, body, expected_status_codes):
+    def configure_connection(self, pool_size=None, keep_alive=None, retries=None, timeout=None):
+        '''
+        Tune the HTTP connection settings. Arguments left as None keep their current value.
+        '''
+        if pool_size is not None:
+            self.config.pool_size = pool_size
+        if keep_alive is not None:
+            self.config.keep_alive = keep_alive
+        if retries is not None:
+            self.config.retry_policy.retries = retries
+        if timeout is not None:
+            self.config.connection.timeout = timeout
+
+    def query(self, url, method, query_parameters, header_parameters, body, expected_status_codes, stream=False):
+        '''
+        Send a request.
+
+        :param stream: do not read the response body up front; use read_json to parse it straight from the socket
+        :return: requests response
+        '''
         # Construct and send request
-        operation_config = {}
+        operation_config = {'stream': stream}
 
         request = None
 
@@ -68,3 +205,79 @@ class GenericRestClient(object):
             raise exp
 
         return response
+
+    def iter_pages(self, url, query_parameters, header_parameters, expected_status_codes, prefetch_pages=False):
+        '''
+        GET url and lazily follow the nextLink of every page.
+
+        :param expected_status_codes: status codes accepted for the first page; later pages must return 200
+        :param prefetch_pages: fetch the next page on a background thread while the current one is consumed
+        :return: generator yielding each page as parsed JSON
+        '''
+        def pages():
+            page = self.read_json(self.query(url, "GET", query_parameters, header_parameters, None,
+                                             expected_status_codes, stream=True))
+            while True:
+                yield page
+                next_link = page.get('nextLink') if isinstance(page, dict) else None
+                if not next_link:
+                    return
+                # nextLink is absolute and already carries api-version and the continuation token
+                page = self.read_json(self.query(next_link, "GET", {}, header_parameters, None, [200], stream=True))
+
+        return prefetch(pages()) if prefetch_pages else pages()
+
+    def iter_items(self, url, query_parameters, header_parameters, expected_status_codes, prefetch_pages=False):
+        '''
+        Like iter_pages, but yields the entries of the 'value' list of each page. A response that is not a
+        list page (e.g. a single resource) is yielded as is.
+        '''
+        pages = self.iter_pages(url, query_parameters, header_parameters, expected_status_codes, prefetch_pages)
+        try:
+            for page in pages:
+                if isinstance(page, dict) and isinstance(page.get('value'), list):
+                    for item in page['value']:
+                        yield item
+                else:
+                    yield page
+        finally:
+            pages.close()
+
+    def iter_resource_graph(self, query, subscriptions, page_size=RESOURCE_GRAPH_PAGE_SIZE):
+        '''
+        Run a Resource Graph query and lazily follow its $skipToken.
+
+        :param query: KQL query, see resource_graph_query
+        :param subscriptions: list of subscription ids the query runs against
+        :param page_size: rows requested per page
+        :return: generator yielding each row as a dict
+        '''
+        url = '/providers/Microsoft.ResourceGraph/resources'
+        query_parameters = {'api-version': RESOURCE_GRAPH_API_VERSION}
+        header_parameters = {'Content-Type': 'application/json; charset=utf-8'}
+        options = {'$top': page_size, 'resultFormat': 'objectArray'}
+        while True:
+            body = {'subscriptions': subscriptions, 'query': query, 'options': options}
+            page = self.read_json(self.query(url, "POST", query_parameters, header_parameters, body, [200], stream=True))
+            for row in page.get('data') or []:
+                yield row
+            skip_token = page.get('$skipToken')
+            if not skip_token:
+                return
+            options = dict(options)
+            options['$skipToken'] = skip_token
+
+    @staticmethod
+    def read_json(response):
+        '''
+        Parse the JSON body of a response sent with stream=True, decoding it from the socket
+        instead of buffering it as text first.
+
+        :param response: requests response
+        :return: parsed JSON
+        '''
+        response.raw.decode_content = True
+        try:
+            return json.load(codecs.getreader(response.encoding or 'utf-8')(response.raw))
+        finally:
+            response.close()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2018, Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+# keys identifying the items of a list of dicts, in order of preference
+LIST_ITEM_KEYS = ('id', 'name')
+
+_MISSING = object()
+
+
+def diff_paths(desired, actual, first_only=False, sort_scalar_lists=True):
+    """
+    Compare a desired payload to an actual one without copying either, and return
+    the paths at which they differ.
+
+    Only what desired specifies is compared: keys of actual that desired does not
+    mention are ignored, as are read-only properties the service adds. An empty
+    dict or list in desired matches a missing value in actual. Lists must
+    have the same length. Lists of dicts that all carry a unique 'id' (or else a
+    unique 'name') are matched by that key, regardless of order; other lists are
+    compared item by item, after sorting when sort_scalar_lists is set and the
+    items allow it.
+
+    Paths look like properties/frontendPorts[name=http]/properties/port and are
+    only built for the differences found, so they can be shown in --diff output.
+
+    :param desired: dict, list or scalar
+    :param actual: dict, list or scalar
+    :param first_only: stop at the first difference
+    :param sort_scalar_lists: ignore the order of lists of scalars
+    :return: list of paths, empty when desired matches actual
+    """
+    changes = []
+    _diff(desired, actual, None, changes, first_only, sort_scalar_lists)
+    return [_format_path(path) for path in changes]
+
+
+def differs(desired, actual, sort_scalar_lists=True):
+    """
+    Like diff_paths, but only tells whether desired and actual differ.
+    """
+    return len(diff_paths(desired, actual, first_only=True, sort_scalar_lists=sort_scalar_lists)) > 0
+
+
+def _diff(desired, actual, path, changes, first_only, sort_scalar_lists):
+    # paths are linked (parent, component) tuples until a difference needs to be reported
+    if isinstance(desired, (dict, list)) and not desired and actual is None:
+        # services omit empty collections from their responses
+        return False
+
+    if isinstance(desired, dict):
+        if not isinstance(actual, dict):
+            changes.append(path)
+            return True
+        changed = False
+        for key, value in desired.items():
+            if _diff(value, actual.get(key), (path, key), changes, first_only, sort_scalar_lists):
+                changed = True
+                if first_only:
+                    break
+        return changed
+
+    if isinstance(desired, list):
+        if not isinstance(actual, list) or len(desired) != len(actual):
+            changes.append(path)
+            return True
+        key = _list_item_key(desired, actual)
+        if key:
+            return _diff_keyed_list(desired, actual, key, path, changes, first_only, sort_scalar_lists)
+        if sort_scalar_lists:
+            try:
+                desired, actual = sorted(desired), sorted(actual)
+            except TypeError:
+                pass
+        changed = False
+        for index, (desired_item, actual_item) in enumerate(zip(desired, actual)):
+            if _diff(desired_item, actual_item, (path, index), changes, first_only, sort_scalar_lists):
+                changed = True
+                if first_only:
+                    break
+        return changed
+
+    if desired != actual:
+        changes.append(path)
+        return True
+    return False
+
+
+def _diff_keyed_list(desired, actual, key, path, changes, first_only, sort_scalar_lists):
+    index = dict((item[key], item) for item in actual)
+    changed = False
+    for item in desired:
+        component = '[{0}={1}]'.format(key, item[key])
+        match = index.get(item[key], _MISSING)
+        if match is _MISSING:
+            changes.append((path, component))
+            changed = True
+        elif _diff(item, match, (path, component), changes, first_only, sort_scalar_lists):
+            changed = True
+        if changed and first_only:
+            break
+    return changed
+
+
+def _list_item_key(desired, actual):
+    if not desired or not all(isinstance(item, dict) for item in desired) or not all(isinstance(item, dict) for item in actual):
+        return None
+    for key in LIST_ITEM_KEYS:
+        if all(key in item for item in desired) and all(key in item for item in actual):
+            # duplicate keys on either side cannot be matched, fall back to comparing item by item
+            if len(set(item[key] for item in actual)) == len(actual) and len(set(item[key] for item in desired)) == len(desired):
+                return key
+    return None
+
+
+def _format_path(path):
+    components = []
+    while path is not None:
+        path, component = path
+        components.append(component)
+    result = ''
+    for component in reversed(components):
+        if isinstance(component, int):
+            result += '[{0}]'.format(component)
+        elif component.startswith('['):
+            result += component
+        else:
+            result += ('/' if result else '') + component
+    return result or '/'
@@ -11,6 +11,19 @@ import re
 from copy import deepcopy
 
 
+# converted keys are cached, since payloads repeat the same few hundred property names over and over;
+# the cache is emptied when it reaches this many entries
+KEY_CACHE_SIZE = 4096
+_key_cache = {}
+
+_REVERSIBLE_UPPER_PATTERN = re.compile(r'[A-Z]')
+# Cope with pluralized abbreviations such as TargetGroupARNs
+# that would otherwise be rendered target_group_ar_ns
+_PLURAL_UPPER_PATTERN = re.compile(r'[A-Z]{3,}s$')
+_FIRST_CAP_PATTERN = re.compile(r'(.)([A-Z][a-z]+)')
+_ALL_CAP_PATTERN = re.compile(r'([a-z0-9])([A-Z]+)')
+
+
 def camel_dict_to_snake_dict(camel_dict, reversible=False, ignore_list=()):
     """
     reversible allows two way conversion of a camelized dict
@@ -24,30 +37,7 @@ def camel_dict_to_snake_dict(camel_dict, reversible=False, ignore_list=()):
     particularly important for tags, where keys are case-sensitive. We convert
     the 'Tags' key but nothing below.
     """
-
-    def value_is_list(camel_list):
-
-        checked_list = []
-        for item in camel_list:
-            if isinstance(item, dict):
-                checked_list.append(camel_dict_to_snake_dict(item, reversible))
-            elif isinstance(item, list):
-                checked_list.append(value_is_list(item))
-            else:
-                checked_list.append(item)
-
-        return checked_list
-
-    snake_dict = {}
-    for k, v in camel_dict.items():
-        if isinstance(v, dict) and k not in ignore_list:
-            snake_dict[_camel_to_snake(k, reversible=reversible)] = camel_dict_to_snake_dict(v, reversible)
-        elif isinstance(v, list) and k not in ignore_list:
-            snake_dict[_camel_to_snake(k, reversible=reversible)] = value_is_list(v)
-        else:
-            snake_dict[_camel_to_snake(k, reversible=reversible)] = v
-
-    return snake_dict
+    return _convert_keys(camel_dict, lambda key: _camel_to_snake(key, reversible=reversible), ignore_list)
 
 
 def snake_dict_to_camel_dict(snake_dict, capitalize_first=False):
@@ -56,56 +46,95 @@ def snake_dict_to_camel_dict(snake_dict, capitalize_first=False):
     rather than true CamelCase. Passing capitalize_first=True returns
     CamelCase. The default remains False as that was the original implementation
     """
+    if snake_dict is None:
+        return None
+    return _convert_keys(snake_dict, lambda key: _snake_to_camel(key, capitalize_first), keep_types=True)
 
-    def camelize(complex_type, capitalize_first=False):
-        if complex_type is None:
-            return
-        new_type = type(complex_type)()
-        if isinstance(complex_type, dict):
-            for key in complex_type:
-                new_type[_snake_to_camel(key, capitalize_first)] = camelize(complex_type[key], capitalize_first)
-        elif isinstance(complex_type, list):
-            for i in range(len(complex_type)):
-                new_type.append(camelize(complex_type[i], capitalize_first))
-        else:
-            return complex_type
-        return new_type
 
-    return camelize(snake_dict, capitalize_first)
+def _convert_keys(data, convert_key, ignore_list=(), keep_types=False):
+    """
+    Copy nested dicts and lists, converting every dict key with convert_key.
+    Works with an explicit stack, so the depth of data is not bounded by the
+    recursion limit.
+
+    ignore_list names keys of the top level dict whose values are kept as they are.
+    keep_types creates copies of the same type as the originals (e.g. OrderedDict)
+    instead of plain dicts and lists.
+    """
+    if not isinstance(data, (dict, list)):
+        return data
+
+    def new_container(value):
+        if keep_types:
+            return type(value)()
+        return {} if isinstance(value, dict) else []
+
+    result = new_container(data)
+    stack = [(data, result, ignore_list)]
+    while stack:
+        source, target, ignore = stack.pop()
+        if isinstance(source, dict):
+            for key, value in source.items():
+                if isinstance(value, (dict, list)) and key not in ignore:
+                    child = new_container(value)
+                    stack.append((value, child, ()))
+                    value = child
+                target[convert_key(key)] = value
+        else:
+            for value in source:
+                if isinstance(value, (dict, list)):
+                    child = new_container(value)
+                    stack.append((value, child, ()))
+                    value = child
+                target.append(value)
+    return result
 
 
 def _snake_to_camel(snake, capitalize_first=False):
+    cache_key = ('camel', snake, capitalize_first)
+    try:
+        return _key_cache[cache_key]
+    except KeyError:
+        pass
+    words = snake.split('_')
     if capitalize_first:
-        return ''.join(x.capitalize() or '_' for x in snake.split('_'))
+        camel = ''.join(x.capitalize() or '_' for x in words)
     else:
-        return snake.split('_')[0] + ''.join(x.capitalize() or '_' for x in snake.split('_')[1:])
+        camel = words[0] + ''.join(x.capitalize() or '_' for x in words[1:])
+    _cache_key(cache_key, camel)
+    return camel
 
 
 def _camel_to_snake(name, reversible=False):
+    cache_key = ('snake', name, reversible)
+    try:
+        return _key_cache[cache_key]
+    except KeyError:
+        pass
 
     def prepend_underscore_and_lower(m):
         return '_' + m.group(0).lower()
 
-    import re
-    if reversible:
-        upper_pattern = r'[A-Z]'
-    else:
-        # Cope with pluralized abbreviations such as TargetGroupARNs
-        # that would otherwise be rendered target_group_ar_ns
-        upper_pattern = r'[A-Z]{3,}s$'
+    upper_pattern = _REVERSIBLE_UPPER_PATTERN if reversible else _PLURAL_UPPER_PATTERN
 
-    s1 = re.sub(upper_pattern, prepend_underscore_and_lower, name)
+    s1 = upper_pattern.sub(prepend_underscore_and_lower, name)
     # Handle when there was nothing before the plural_pattern
     if s1.startswith("_") and not name.startswith("_"):
         s1 = s1[1:]
     if reversible:
-        return s1
+        snake = s1
+    else:
+        # Remainder of solution seems to be https://stackoverflow.com/a/1176023
+        s2 = _FIRST_CAP_PATTERN.sub(r'\1_\2', s1)
+        snake = _ALL_CAP_PATTERN.sub(r'\1_\2', s2).lower()
+    _cache_key(cache_key, snake)
+    return snake
+
 
-    # Remainder of solution seems to be https://stackoverflow.com/a/1176023
-    first_cap_pattern = r'(.)([A-Z][a-z]+)'
-    all_cap_pattern = r'([a-z0-9])([A-Z]+)'
-    s2 = re.sub(first_cap_pattern, r'\1_\2', s1)
-    return re.sub(all_cap_pattern, r'\1_\2', s2).lower()
+def _cache_key(cache_key, value):
+    if len(_key_cache) >= KEY_CACHE_SIZE:
+        _key_cache.clear()
+    _key_cache[cache_key] = value
 
 
 def dict_merge(a, b):
@@ -117,12 +146,45 @@ def dict_merge(a, b):
     result = deepcopy(a)
     for k, v in b.items():
         if k in result and isinstance(result[k], dict):
-                result[k] = dict_merge(result[k], v)
+            result[k] = dict_merge(result[k], v)
         else:
             result[k] = deepcopy(v)
     return result
 
 
+def dict_merge_shared(a, b):
+    '''merges dicts like dict_merge, without copying a and b.
+
+    Only the dicts along the keys of b are copied; every other subtree of the
+    result is shared with a or b. Treat the result as read-only, or use
+    dict_merge when it is changed in place.'''
+    if not isinstance(b, dict):
+        return b
+    result = dict(a)
+    for k, v in b.items():
+        if k in result and isinstance(result[k], dict):
+            result[k] = dict_merge_shared(result[k], v)
+        else:
+            result[k] = v
+    return result
+
+
+def merge_would_change(a, b):
+    '''returns whether dict_merge(a, b) != a, without building the merged
+    dict and stopping at the first difference.'''
+    if not isinstance(b, dict):
+        return b != a
+    for k, v in b.items():
+        if k not in a:
+            return True
+        if isinstance(a[k], dict):
+            if merge_would_change(a[k], v):
+                return True
+        elif a[k] != v:
+            return True
+    return False
+
+
 def recursive_diff(dict1, dict2):
     left = dict((k, v) for (k, v) in dict1.items() if k not in dict2)
     right = dict((k, v) for (k, v) in dict2.items() if k not in dict1)
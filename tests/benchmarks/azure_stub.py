@@ -0,0 +1,198 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Helpers of the benchmarks: run the modules of the role in process, against a local HTTP server serving recorded
+Azure Resource Manager responses, with authentication stubbed out.
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import os
+import re
+import runpy
+import threading
+import time
+
+import ansible.module_utils
+import ansible.module_utils.common
+from ansible.module_utils import basic
+from ansible.module_utils.six.moves import BaseHTTPServer
+from ansible.module_utils.six.moves.urllib.parse import urlparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+MODULE_UTILS = os.path.join(ROOT, 'module_utils')
+LIBRARY = os.path.join(ROOT, 'library')
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000000'
+
+
+def use_role_module_utils():
+    '''
+    Make the module_utils of the role take precedence over those of Ansible, as when Ansible runs the modules of the role.
+    '''
+    if MODULE_UTILS not in ansible.module_utils.__path__:
+        ansible.module_utils.__path__.insert(0, MODULE_UTILS)
+        ansible.module_utils.common.__path__.insert(0, os.path.join(MODULE_UTILS, 'common'))
+
+
+class ARMStub(BaseHTTPServer.HTTPServer):
+    '''
+    Local HTTP server answering requests with the first route matching their method and path, and counting them.
+
+    :param routes: list of (method, path regex, handler); handler is called with the match and returns (status, body)
+    '''
+    def __init__(self, routes):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), ARMStubHandler)
+        self.routes = [(method, re.compile(pattern + '$'), handler) for method, pattern, handler in routes]
+        self.requests = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{0}'.format(self.server_address[1])
+
+    def count(self, method, pattern):
+        return len([path for request_method, path in self.requests if request_method == method and re.match(pattern + '$', path)])
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class ARMStubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def handle_request(self, method):
+        path = urlparse(self.path).path
+        with self.server._lock:
+            self.server.requests.append((method, path))
+        status, body = 404, dict(error=dict(code='NotFound', message='no route for {0} {1}'.format(method, path)))
+        for route_method, pattern, handler in self.server.routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                status, body = handler(match)
+                break
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def do_DELETE(self):
+        self.handle_request('DELETE')
+
+    def log_message(self, *args):
+        pass
+
+
+class CloudEnvironment(object):
+    def __init__(self, url):
+        self.endpoints = type('Endpoints', (object,), dict(resource_manager=url))()
+
+
+def fake_auth(url):
+    '''
+    Return a replacement of AzureRMAuth authenticating every module against the stub at url with a fixed token.
+    '''
+    from msrest.authentication import BasicTokenAuthentication
+
+    class FakeAuth(object):
+        def __init__(self, **kwargs):
+            self.azure_credentials = BasicTokenAuthentication(dict(access_token='token'))
+            self.credentials = dict()
+            self.subscription_id = SUBSCRIPTION_ID
+            self._cloud_environment = CloudEnvironment(url)
+            self._cert_validation_mode = 'validate'
+
+    return FakeAuth
+
+
+class ModuleExit(Exception):
+    def __init__(self, result):
+        super(ModuleExit, self).__init__()
+        self.result = result
+        self.time = time.time()
+
+
+def exit_json(self, **kwargs):
+    raise ModuleExit(kwargs)
+
+
+def fail_json(self, **kwargs):
+    kwargs['failed'] = True
+    raise ModuleExit(kwargs)
+
+
+def run_module(name, args, url):
+    '''
+    Run library/<name>.py in process against the stub at url.
+
+    :param name: module name, e.g. azure_rm_dnszone_facts
+    :param args: module arguments
+    :return: (result passed to exit_json or fail_json, seconds from the import of the module to exit_json)
+    '''
+    start = time.time()
+    use_role_module_utils()
+    from ansible.module_utils import azure_rm_common
+    azure_rm_common.AzureRMAuth = fake_auth(url)
+    basic._ANSIBLE_ARGS = json.dumps(dict(ANSIBLE_MODULE_ARGS=args)).encode('utf-8')
+    basic.AnsibleModule.exit_json = exit_json
+    basic.AnsibleModule.fail_json = fail_json
+    try:
+        runpy.run_path(os.path.join(LIBRARY, name + '.py'), run_name='__main__')
+    except ModuleExit as exc:
+        return exc.result, exc.time - start
+    raise AssertionError('{0} did not call exit_json'.format(name))
+
+
+def resource_id(resource_group, provider, name):
+    return '/subscriptions/{0}/resourceGroups/{1}/providers/{2}/{3}'.format(SUBSCRIPTION_ID, resource_group, provider, name)
+
+
+def dns_zone(resource_group, name):
+    return dict(id=resource_id(resource_group, 'Microsoft.Network/dnszones', name), name=name, type='Microsoft.Network/dnszones',
+                location='global', tags=dict(), etag='00000000-0000-0000-0000-000000000000',
+                properties=dict(maxNumberOfRecordSets=5000, numberOfRecordSets=2, nameServers=['ns1-01.azure-dns.com.']))
+
+
+def instance_view():
+    return dict(statuses=[dict(code='ProvisioningState/succeeded', level='Info', displayStatus='Provisioning succeeded'),
+                          dict(code='PowerState/running', level='Info', displayStatus='VM running')])
+
+
+def virtual_machine(resource_group, name, expand_instance_view=False):
+    vm = dict(
+        id=resource_id(resource_group, 'Microsoft.Compute/virtualMachines', name), name=name,
+        type='Microsoft.Compute/virtualMachines', location='eastus', tags=dict(env='bench'),
+        properties=dict(
+            vmId='00000000-0000-0000-0000-000000000000',
+            provisioningState='Succeeded',
+            hardwareProfile=dict(vmSize='Standard_DS1_v2'),
+            osProfile=dict(computerName=name, adminUsername='azureuser'),
+            storageProfile=dict(
+                imageReference=dict(publisher='Canonical', offer='UbuntuServer', sku='18.04-LTS', version='latest'),
+                osDisk=dict(osType='Linux', name=name + '-os', caching='ReadWrite', createOption='FromImage',
+                            managedDisk=dict(storageAccountType='Premium_LRS',
+                                             id=resource_id(resource_group, 'Microsoft.Compute/disks', name + '-os'))),
+                dataDisks=[dict(lun=0, name=name + '-data', caching='ReadOnly', createOption='Empty', diskSizeGB=128,
+                                managedDisk=dict(storageAccountType='Premium_LRS',
+                                                 id=resource_id(resource_group, 'Microsoft.Compute/disks', name + '-data')))]),
+            networkProfile=dict(networkInterfaces=[dict(id=resource_id(resource_group, 'Microsoft.Network/networkInterfaces',
+                                                                       name + '-nic'))])))
+    if expand_instance_view:
+        vm['properties']['instanceView'] = instance_view()
+    return vm
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Time the idempotency checks of azure_rm_appgateway and azure_rm_resource on a large
+Application Gateway, before and after module_utils/common/dict_comparison.
+
+    python tests/benchmarks/dict_comparison_benchmark.py [--items N] [--repeat N]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import copy
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'module_utils'))
+
+from common.dict_comparison import diff_paths, differs  # noqa: E402
+from common.dict_transformations import dict_merge  # noqa: E402
+
+COLLECTIONS = ['authentication_certificates', 'gateway_ip_configurations', 'redirect_configurations',
+               'frontend_ip_configurations', 'frontend_ports', 'backend_address_pools', 'probes',
+               'backend_http_settings_collection', 'request_routing_rules', 'http_listeners']
+
+
+def gateway(items):
+    '''
+    Existing gateway as returned by the service, with items entries in each of its collections.
+    '''
+    prefix = '/subscriptions/xxxx/resourceGroups/rg/providers/Microsoft.Network/applicationGateways/gw/'
+    result = dict(location='eastus', sku=dict(name='Standard_Medium', tier='Standard', capacity=2))
+    for collection in COLLECTIONS:
+        result[collection] = [dict(name='{0}{1}'.format(collection, index),
+                                   id='{0}{1}/{2}{3}'.format(prefix, collection, collection, index),
+                                   etag='W/"00000000-0000-0000-0000-000000000000"',
+                                   provisioning_state='Succeeded',
+                                   port=1024 + index,
+                                   protocol='Http',
+                                   backend_addresses=[dict(ip_address='10.0.{0}.{1}'.format(index // 250, index % 250))],
+                                   type='Microsoft.Network/applicationGateways/' + collection)
+                              for index in range(items)]
+    return result
+
+
+def desired(existing):
+    '''
+    Parameters of the module matching existing: no id, etag or read-only properties, items in reverse order.
+    '''
+    result = dict(location=existing['location'], sku=dict(existing['sku']))
+    for collection in COLLECTIONS:
+        result[collection] = [dict(name=item['name'], port=item['port'], protocol=item['protocol'],
+                                   backend_addresses=copy.deepcopy(item['backend_addresses']))
+                              for item in reversed(existing[collection])]
+    return result
+
+
+def compare_arrays(old_params, new_params, param_name):
+    # azure_rm_appgateway before dict_comparison
+    old = old_params.get(param_name) or []
+    new = new_params.get(param_name) or []
+    oldd = dict((item['name'], item) for item in old)
+    newd = dict((item['name'], item) for item in new)
+    return dict_merge(oldd, newd) == oldd
+
+
+def appgateway_before(parameters, existing):
+    return (parameters['location'] != existing['location'] or
+            any(parameters['sku'][key] != existing['sku'][key] for key in ('name', 'tier', 'capacity')) or
+            not all(compare_arrays(existing, parameters, collection) for collection in COLLECTIONS))
+
+
+def resource_before(body, response):
+    # azure_rm_resource before dict_comparison
+    return dict_merge(response, body) != response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=500, help='entries in each collection of the gateway')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each check, the best one is reported')
+    args = parser.parse_args()
+
+    existing = gateway(args.items)
+    parameters = desired(existing)
+    changed = copy.deepcopy(parameters)
+    changed['http_listeners'][-1]['port'] += 1
+
+    checks = [
+        ('appgateway, dict_merge per collection', lambda: appgateway_before(parameters, existing)),
+        ('appgateway, diff_paths', lambda: diff_paths(parameters, existing)),
+        ('appgateway, differs', lambda: differs(parameters, existing)),
+        ('appgateway, differs on a changed port', lambda: differs(changed, existing)),
+        ('resource, dict_merge != response', lambda: resource_before(existing, existing)),
+        ('resource, diff_paths', lambda: diff_paths(existing, existing, sort_scalar_lists=False)),
+    ]
+    print('{0} collections of {1} items'.format(len(COLLECTIONS), args.items))
+    for name, check in checks:
+        best = min(timeit.repeat(check, number=1, repeat=args.repeat))
+        print('{0:<45} {1:10.2f} ms'.format(name, best * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Time dict_merge, dict_merge_shared and merge_would_change on a large nested ARM payload, and measure the
+memory each one allocates with tracemalloc.
+
+    python tests/benchmarks/dict_merge_benchmark.py [--items N] [--repeat N]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import timeit
+import tracemalloc
+
+from azure_stub import use_role_module_utils
+
+use_role_module_utils()
+
+from ansible.module_utils.common.dict_transformations import dict_merge, dict_merge_shared, merge_would_change  # noqa: E402
+
+
+def payload(items):
+    '''
+    Application gateway sized response: collections of items nested a few levels deep.
+    '''
+    prefix = '/subscriptions/xxxx/resourceGroups/rg/providers/Microsoft.Network/applicationGateways/gw/'
+    properties = dict(sku=dict(name='Standard_Medium', tier='Standard', capacity=2), provisioningState='Succeeded')
+    for collection in ('frontendPorts', 'backendAddressPools', 'httpListeners', 'requestRoutingRules', 'probes'):
+        properties[collection] = dict(
+            ('{0}{1}'.format(collection, index),
+             dict(id='{0}{1}/{2}'.format(prefix, collection, index), etag='W/"00000000-0000-0000-0000-000000000000"',
+                  properties=dict(port=1024 + index, protocol='Http', provisioningState='Succeeded',
+                                  backendAddresses=[dict(ipAddress='10.0.{0}.{1}'.format(index // 250, index % 250))])))
+            for index in range(items))
+    return dict(id=prefix[:-1], name='gw', location='eastus', tags=dict(env='bench'), properties=properties)
+
+
+def peak(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=2000, help='entries in each collection of the payload')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each function, the best one is reported')
+    args = parser.parse_args()
+
+    existing = payload(args.items)
+    # an update touching one leaf of the payload
+    update = dict(tags=dict(env='prod'), properties=dict(sku=dict(capacity=3)))
+
+    checks = [
+        ('dict_merge', lambda: dict_merge(existing, update)),
+        ('dict_merge_shared', lambda: dict_merge_shared(existing, update)),
+        ('merge_would_change', lambda: merge_would_change(existing, update)),
+        ('dict_merge(...) != existing', lambda: dict_merge(existing, update) != existing),
+    ]
+    print('5 collections of {0} items'.format(args.items))
+    print('{0:<30} {1:>12} {2:>14}'.format('function', 'time', 'peak memory'))
+    for name, check in checks:
+        best = min(timeit.repeat(check, number=1, repeat=args.repeat))
+        print('{0:<30} {1:9.3f} ms {2:11.1f} KiB'.format(name, best * 1000, peak(check) / 1024.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Measure the throughput of camel_dict_to_snake_dict and snake_dict_to_camel_dict on a large list response,
+before and after their key conversions were cached and nested payloads converted iteratively. The former
+implementation is the one kept by the unit tests.
+
+    python tests/benchmarks/dict_transformations_benchmark.py [--items N] [--repeat N]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import os
+import sys
+import timeit
+
+from azure_stub import ROOT, use_role_module_utils
+
+use_role_module_utils()
+sys.path.insert(0, os.path.join(ROOT, 'tests', 'unit', 'module_utils', 'common'))
+
+from ansible.module_utils.common.dict_transformations import camel_dict_to_snake_dict, snake_dict_to_camel_dict  # noqa: E402
+import legacy_dict_transformations as legacy  # noqa: E402
+
+
+def network_interfaces(items):
+    '''
+    Network interface list response, as returned by Resource Manager.
+    '''
+    prefix = '/subscriptions/xxxx/resourceGroups/rg/providers/Microsoft.Network/'
+    return dict(value=[dict(
+        name='nic{0}'.format(index), id='{0}networkInterfaces/nic{1}'.format(prefix, index),
+        etag='W/"00000000-0000-0000-0000-000000000000"', location='eastus', type='Microsoft.Network/networkInterfaces',
+        tags=dict(Environment='bench', CostCenter='1234'),
+        properties=dict(
+            provisioningState='Succeeded', resourceGuid='00000000-0000-0000-0000-000000000000',
+            ipConfigurations=[dict(
+                name='ipconfig1', id='{0}networkInterfaces/nic{1}/ipConfigurations/ipconfig1'.format(prefix, index),
+                properties=dict(provisioningState='Succeeded', privateIPAddress='10.0.{0}.{1}'.format(index // 250, index % 250),
+                                privateIPAllocationMethod='Dynamic', privateIPAddressVersion='IPv4', primary=True,
+                                subnet=dict(id='{0}virtualNetworks/vnet/subnets/default'.format(prefix)),
+                                publicIPAddress=dict(id='{0}publicIPAddresses/pip{1}'.format(prefix, index))))],
+            dnsSettings=dict(dnsServers=[], appliedDnsServers=[], internalDomainNameSuffix='example.internal.cloudapp.net'),
+            macAddress='00-0D-3A-00-00-00', enableAcceleratedNetworking=False, enableIPForwarding=False,
+            networkSecurityGroup=dict(id='{0}networkSecurityGroups/nsg'.format(prefix)),
+            virtualMachine=dict(id='/subscriptions/xxxx/resourceGroups/rg/providers/Microsoft.Compute/virtualMachines/vm{0}'.format(index)))
+    ) for index in range(items)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=2000, help='network interfaces in the list response')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each conversion, the best one is reported')
+    args = parser.parse_args()
+
+    response = network_interfaces(args.items)
+    snake = camel_dict_to_snake_dict(response)
+    assert snake == legacy.camel_dict_to_snake_dict(response)
+    assert snake_dict_to_camel_dict(snake) == legacy.snake_dict_to_camel_dict(snake)
+
+    conversions = [
+        ('camel_dict_to_snake_dict', legacy.camel_dict_to_snake_dict, camel_dict_to_snake_dict, response),
+        ('snake_dict_to_camel_dict', legacy.snake_dict_to_camel_dict, snake_dict_to_camel_dict, snake),
+    ]
+    print('list response of {0} network interfaces'.format(args.items))
+    print('{0:<26} {1:>10} {2:>10} {3:>8}'.format('conversion', 'before', 'after', 'speedup'))
+    for name, before, after, payload in conversions:
+        before_time = min(timeit.repeat(lambda: before(payload), number=1, repeat=args.repeat))
+        after_time = min(timeit.repeat(lambda: after(payload), number=1, repeat=args.repeat))
+        print('{0:<26} {1:7.1f} ms {2:7.1f} ms {3:7.1f}x'.format(name, before_time * 1000, after_time * 1000, before_time / after_time))
+
+
+if __name__ == '__main__':
+    main()
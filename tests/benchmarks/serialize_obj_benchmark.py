@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Time AzureRMModuleBase.serialize_obj per object, with the serializer cached per enum_modules
+and with the former serializer built for every object, on the image entries listed by
+azure_rm_virtualmachineimage_facts. Needs ansible, msrest and azure-mgmt-compute.
+
+    python tests/benchmarks/serialize_obj_benchmark.py [--items N] [--repeat N]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import importlib
+import inspect
+import timeit
+
+from azure_stub import use_role_module_utils
+
+use_role_module_utils()
+
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase  # noqa: E402
+from azure.mgmt.compute.models import VirtualMachineImage, VirtualMachineImageResource, OSDiskImage, PurchasePlan  # noqa: E402
+from msrest.serialization import Serializer  # noqa: E402
+
+# as in azure_rm_virtualmachineimage_facts
+AZURE_ENUM_MODULES = ['azure.mgmt.compute.models']
+
+
+class Module(AzureRMModuleBase):
+    # serialize_obj without an Ansible module behind it
+    def __init__(self):
+        self.messages = []
+
+    def log(self, msg, pretty_print=False):
+        self.messages.append(msg)
+
+    def serialize_obj_before(self, obj, class_name, enum_modules=None):
+        # serialize_obj before the serializers were cached
+        enum_modules = [] if enum_modules is None else enum_modules
+
+        dependencies = dict()
+        if enum_modules:
+            for module_name in enum_modules:
+                mod = importlib.import_module(module_name)
+                for mod_class_name, mod_class_obj in inspect.getmembers(mod, predicate=inspect.isclass):
+                    dependencies[mod_class_name] = mod_class_obj
+            self.log("dependencies: ")
+            self.log(str(dependencies))
+        serializer = Serializer(classes=dependencies)
+        return serializer.body(obj, class_name, keep_readonly=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=1000, help='image entries serialized per run')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each variant, the best one is reported')
+    args = parser.parse_args()
+
+    prefix = '/Subscriptions/xxxx/Providers/Microsoft.Compute/Locations/eastus/Publishers/Canonical/ArtifactTypes/VMImage/Offers/UbuntuServer/Skus/18.04-LTS/'
+    resources = [VirtualMachineImageResource(name='18.04.2018{0:04d}'.format(index), location='eastus',
+                                             id=prefix + 'Versions/18.04.2018{0:04d}'.format(index))
+                 for index in range(args.items)]
+    image = VirtualMachineImage(name='18.04.201810030', location='eastus', id=prefix + 'Versions/18.04.201810030',
+                                plan=PurchasePlan(publisher='Canonical', name='18.04-LTS', product='UbuntuServer'),
+                                os_disk_image=OSDiskImage(operating_system='Linux'))
+    module = Module()
+
+    variants = [
+        ('serializer per object', module.serialize_obj_before),
+        ('serializer per enum_modules', module.serialize_obj),
+    ]
+    print('{0} VirtualMachineImageResource entries and 1 VirtualMachineImage'.format(args.items))
+    for name, serialize in variants:
+        def run():
+            for resource in resources:
+                serialize(resource, 'VirtualMachineImageResource', enum_modules=AZURE_ENUM_MODULES)
+            serialize(image, 'VirtualMachineImage', enum_modules=AZURE_ENUM_MODULES)
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print('{0:<30} {1:10.1f} us per object'.format(name, best * 1e6 / (args.items + 1)))
+
+
+if __name__ == '__main__':
+    main()
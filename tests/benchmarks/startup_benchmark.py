@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Time the startup of fact modules: from the import of the module to exit_json, each run in a fresh Python
+process against a local stub of Azure Resource Manager. Also reports the wall time of the whole process and
+the number of azure.* modules imported by then. Needs ansible, msrest, azure-mgmt-dns and azure-mgmt-compute.
+
+    python tests/benchmarks/startup_benchmark.py [--repeat N]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from azure_stub import ARMStub, SUBSCRIPTION_ID, dns_zone, instance_view, run_module, virtual_machine
+
+RESOURCE_GROUP = 'myResourceGroup'
+
+MODULES = [
+    ('azure_rm_dnszone_facts', dict()),
+    ('azure_rm_virtualmachine_facts', dict(resource_group=RESOURCE_GROUP)),
+]
+
+ROUTES = [
+    ('GET', '/subscriptions/{0}/providers/Microsoft.Network/dnszones'.format(SUBSCRIPTION_ID),
+     lambda match: (200, dict(value=[dns_zone(RESOURCE_GROUP, 'zone{0}.com'.format(index)) for index in range(5)]))),
+    ('GET', '/subscriptions/{0}/resourceGroups/{1}/providers/Microsoft.Compute/virtualMachines'.format(SUBSCRIPTION_ID, RESOURCE_GROUP),
+     lambda match: (200, dict(value=[virtual_machine(RESOURCE_GROUP, 'vm{0}'.format(index)) for index in range(5)]))),
+    ('GET', '/subscriptions/{0}/resourceGroups/[^/]+/providers/Microsoft.Compute/virtualMachines/[^/]+/instanceView'.format(SUBSCRIPTION_ID),
+     lambda match: (200, instance_view())),
+]
+
+
+def child(name, args, url):
+    result, elapsed = run_module(name, args, url)
+    if result.get('failed'):
+        raise SystemExit('{0} failed - {1}'.format(name, result.get('msg')))
+    print(json.dumps(dict(elapsed=elapsed, azure_modules=len([module for module in sys.modules if module.startswith('azure.')]))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each module, the median is reported')
+    parser.add_argument('--child', nargs=3, metavar=('MODULE', 'ARGS', 'URL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], json.loads(args.child[1]), args.child[2])
+        return
+
+    print('{0:<32} {1:>16} {2:>14} {3:>14}'.format('module', 'import-exit_json', 'process', 'azure modules'))
+    with ARMStub(ROUTES) as stub:
+        for name, module_args in MODULES:
+            runs = []
+            for dummy in range(args.repeat):
+                start = time.time()
+                output = subprocess.check_output([sys.executable, __file__, '--child', name, json.dumps(module_args), stub.url])
+                run = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+                run['process'] = time.time() - start
+                runs.append(run)
+            median = sorted(runs, key=lambda run: run['elapsed'])[len(runs) // 2]
+            print('{0:<32} {1:13.0f} ms {2:11.0f} ms {3:>14}'.format(name, median['elapsed'] * 1000, median['process'] * 1000,
+                                                                     median['azure_modules']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Measure the throughput of the transfers of azure_rm_storageblob against an in-memory fake of the blob service:
+upload_block_blob, upload_page_blob and download_to_path. Fails when a transfer corrupts data, when a transfer
+interrupted midway does not resume from its journal, or when ranges holding only zeros are sent or fetched.
+Needs ansible and azure-storage.
+
+    python tests/benchmarks/storageblob_benchmark.py [--size MB] [--block-size MB] [--max-connections N]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import os
+import runpy
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from azure_stub import LIBRARY, use_role_module_utils
+
+use_role_module_utils()
+
+from azure.common import AzureHttpError, AzureMissingResourceHttpError  # noqa: E402
+from azure.storage.blob.models import ContentSettings  # noqa: E402
+
+MB = 1024 * 1024
+
+
+class Record(object):
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeBlobService(object):
+    '''
+    In-memory stand-in for BlockBlobService and PageBlobService, holding the blobs of a single container. Counts
+    the successful calls of each method, and can be told to fail a method after a number of calls to interrupt a
+    transfer.
+    '''
+
+    def __init__(self):
+        self.blobs = dict()
+        self.uncommitted = defaultdict(dict)
+        self.calls = defaultdict(int)
+        self.interruptions = dict()
+        self._lock = threading.Lock()
+        self._etag = 0
+
+    def interrupt(self, method, after):
+        self.interruptions[method] = self.calls[method] + after
+
+    def _call(self, method):
+        with self._lock:
+            if self.calls[method] >= self.interruptions.get(method, float('inf')):
+                raise AzureHttpError('{0} interrupted'.format(method), 500)
+            self.calls[method] += 1
+
+    def _store(self, name, blob_type, data, content_settings=None, pages=None):
+        self._etag += 1
+        self.blobs[name] = dict(type=blob_type, data=data, content_settings=content_settings or ContentSettings(),
+                                pages=pages if pages is not None else set(), etag='"0x{0:X}"'.format(self._etag))
+
+    def _blob(self, name):
+        if name not in self.blobs:
+            raise AzureMissingResourceHttpError('The specified blob does not exist.', 404)
+        return self.blobs[name]
+
+    def put_block(self, container, name, block, block_id, validate_content=False):
+        self._call('put_block')
+        with self._lock:
+            self.uncommitted[name][block_id] = bytes(block)
+
+    def get_block_list(self, container, name, block_list_type=None):
+        self._call('get_block_list')
+        return Record(uncommitted_blocks=[Record(id=block_id) for block_id in self.uncommitted[name]])
+
+    def put_block_list(self, container, name, block_list, content_settings=None, metadata=None):
+        self._call('put_block_list')
+        with self._lock:
+            blocks = self.uncommitted.pop(name)
+            self._store(name, 'BlockBlob', bytearray(b''.join(blocks[block.id] for block in block_list)), content_settings)
+
+    def create_blob(self, container, name, content_length, metadata=None):
+        self._call('create_blob')
+        with self._lock:
+            self._store(name, 'PageBlob', bytearray(content_length))
+
+    def update_page(self, container, name, page, start_range, end_range, validate_content=False):
+        self._call('update_page')
+        with self._lock:
+            blob = self._blob(name)
+            blob['data'][start_range:end_range + 1] = page
+            blob['pages'].update(range(start_range // 512, end_range // 512 + 1))
+
+    def set_blob_properties(self, container, name, content_settings=None):
+        self._call('set_blob_properties')
+        with self._lock:
+            self._blob(name)['content_settings'] = content_settings
+
+    def get_blob_properties(self, container, name):
+        self._call('get_blob_properties')
+        blob = self._blob(name)
+        return Record(name=name, metadata=dict(), properties=Record(
+            blob_type=blob['type'], content_length=len(blob['data']), etag=blob['etag'], content_settings=blob['content_settings']))
+
+    def get_page_ranges(self, container, name, if_match=None):
+        self._call('get_page_ranges')
+        ranges = []
+        for page in sorted(self._blob(name)['pages']):
+            if ranges and ranges[-1].end == page * 512 - 1:
+                ranges[-1].end += 512
+            else:
+                ranges.append(Record(start=page * 512, end=page * 512 + 511))
+        return ranges
+
+    def get_blob_to_bytes(self, container, name, start_range=None, end_range=None, validate_content=False, max_connections=1,
+                          if_match=None):
+        self._call('get_blob_to_bytes')
+        blob = self._blob(name)
+        if if_match and if_match != blob['etag']:
+            raise AzureHttpError('The condition specified using HTTP conditional header(s) is not met.', 412)
+        return Record(content=bytes(blob['data'][start_range:end_range + 1]))
+
+
+def storageblob_class():
+    return runpy.run_path(os.path.join(LIBRARY, 'azure_rm_storageblob.py'), run_name='azure_rm_storageblob')['AzureRMStorageBlob']
+
+
+def failure(msg, **kwargs):
+    raise AssertionError(msg)
+
+
+def transfer(cls, service, args, **params):
+    '''
+    Instance of the module set up for a transfer, without argument parsing nor authentication.
+    '''
+    module = cls.__new__(cls)
+    module.fail = failure
+    settings = dict(storage_account_name='bench', container='bench', blob='blob', blob_type='block', src=None, dest=None,
+                    tags=None, content_md5=None, resume=True, block_size=args.block_size, max_connections=args.max_connections)
+    settings.update(params)
+    for key, value in settings.items():
+        setattr(module, key, value)
+    module.blob_client = service
+    return module
+
+
+def timed(func, *args):
+    start = time.time()
+    func(*args)
+    return time.time() - start
+
+
+def interrupted(service, method, after, func, *args):
+    service.interrupt(method, after)
+    try:
+        func(*args)
+    except AzureHttpError:
+        pass
+    else:
+        raise AssertionError('the transfer was not interrupted')
+    finally:
+        service.interruptions.clear()
+
+
+def read(path):
+    with open(path, 'rb') as source:
+        return source.read()
+
+
+def report(name, size, elapsed, requests):
+    print('{0:<44} {1:8.0f} ms {2:9.1f} MB/s {3:>9}'.format(name, elapsed * 1000, size / MB / elapsed, requests))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=64, help='size of the file transferred, in MB')
+    parser.add_argument('--block-size', type=int, default=4, help='block_size of the module, in MB')
+    parser.add_argument('--max-connections', type=int, default=4, help='max_connections of the module')
+    args = parser.parse_args()
+
+    cls = storageblob_class()
+    work = tempfile.mkdtemp(prefix='storageblob_benchmark')
+    # keep the transfer journals out of the home directory of the user
+    os.environ['HOME'] = work
+    try:
+        size = args.size * MB
+        chunk = args.block_size * MB
+        chunks = (size + chunk - 1) // chunk
+        dense = os.path.join(work, 'dense')
+        with open(dense, 'wb') as dense_file:
+            dense_file.write(os.urandom(size))
+        # every other page chunk only holds zeros
+        sparse = os.path.join(work, 'sparse')
+        page_chunk = min(chunk, 4 * MB)
+        with open(sparse, 'wb') as sparse_file:
+            for index in range((size + page_chunk - 1) // page_chunk):
+                length = min(page_chunk, size - index * page_chunk)
+                sparse_file.write(os.urandom(length) if index % 2 == 0 else b'\0' * length)
+        data_chunks = ((size + page_chunk - 1) // page_chunk + 1) // 2
+
+        print('{0} MB, block_size {1} MB, max_connections {2}'.format(args.size, args.block_size, args.max_connections))
+        print('{0:<44} {1:>11} {2:>14} {3:>9}'.format('transfer', 'time', 'throughput', 'requests'))
+
+        service = FakeBlobService()
+        upload = transfer(cls, service, args, src=dense)
+        elapsed = timed(upload.upload_block_blob, None)
+        report('upload_block_blob', size, elapsed, service.calls['put_block'])
+        assert service.calls['put_block'] == chunks
+        assert bytes(service.blobs['blob']['data']) == read(dense)
+
+        service = FakeBlobService()
+        upload = transfer(cls, service, args, src=dense)
+        interrupted(service, 'put_block', chunks // 2, upload.upload_block_blob, None)
+        sent = service.calls['put_block']
+        elapsed = timed(upload.upload_block_blob, None)
+        report('upload_block_blob, resumed', size, elapsed, service.calls['put_block'] - sent)
+        assert service.calls['put_block'] == chunks
+        assert bytes(service.blobs['blob']['data']) == read(dense)
+
+        service = FakeBlobService()
+        upload = transfer(cls, service, args, src=sparse, blob_type='page')
+        elapsed = timed(upload.upload_page_blob, None)
+        report('upload_page_blob, half zeros', size, elapsed, service.calls['update_page'])
+        assert service.calls['update_page'] == data_chunks
+        assert bytes(service.blobs['blob']['data']) == read(sparse)
+
+        service = FakeBlobService()
+        upload = transfer(cls, service, args, src=sparse, blob_type='page')
+        interrupted(service, 'update_page', data_chunks // 2, upload.upload_page_blob, None)
+        sent = service.calls['update_page']
+        elapsed = timed(upload.upload_page_blob, None)
+        report('upload_page_blob, half zeros, resumed', size, elapsed, service.calls['update_page'] - sent)
+        assert service.calls['update_page'] == data_chunks
+        assert service.calls['create_blob'] == 1
+        assert bytes(service.blobs['blob']['data']) == read(sparse)
+        page_service = service
+
+        service = FakeBlobService()
+        transfer(cls, service, args, src=dense).upload_block_blob(None)
+        dest = os.path.join(work, 'download')
+        download = transfer(cls, service, args, dest=dest)
+        elapsed = timed(download.download_to_path)
+        report('download_to_path', size, elapsed, service.calls['get_blob_to_bytes'])
+        assert service.calls['get_blob_to_bytes'] == chunks
+        assert read(dest) == read(dense)
+
+        os.remove(dest)
+        interrupted(service, 'get_blob_to_bytes', chunks // 2, download.download_to_path)
+        fetched = service.calls['get_blob_to_bytes']
+        elapsed = timed(download.download_to_path)
+        report('download_to_path, resumed', size, elapsed, service.calls['get_blob_to_bytes'] - fetched)
+        assert service.calls['get_blob_to_bytes'] == 2 * chunks
+        assert read(dest) == read(dense)
+
+        service = page_service
+        os.remove(dest)
+        download = transfer(cls, service, args, dest=dest, blob_type='page')
+        elapsed = timed(download.download_to_path)
+        report('download_to_path, page blob, half zeros', size, elapsed, service.calls['get_blob_to_bytes'])
+        assert service.calls['get_blob_to_bytes'] == data_chunks
+        assert read(dest) == read(sparse)
+
+        assert not os.listdir(os.path.join(work, '.azure', 'ansible_blob_journal'))
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == '__main__':
+    main()
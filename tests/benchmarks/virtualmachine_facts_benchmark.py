@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Count the requests azure_rm_virtualmachine_facts sends per virtual machine, against a local stub of Azure Resource
+Manager serving recorded responses, and time the listing of a resource group. Fails when listing sends more than
+one instance view request per VM, or when looking up a VM by name sends more than one GET.
+Needs ansible, msrest and azure-mgmt-compute.
+
+    python tests/benchmarks/virtualmachine_facts_benchmark.py [--vms N] [--repeat N]
+'''
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+
+from azure_stub import ARMStub, SUBSCRIPTION_ID, instance_view, run_module, virtual_machine
+
+RESOURCE_GROUP = 'myResourceGroup'
+VMS = '/subscriptions/{0}/resourceGroups/{1}/providers/Microsoft.Compute/virtualMachines'.format(SUBSCRIPTION_ID, RESOURCE_GROUP)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vms', type=int, default=400, help='virtual machines in the resource group')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of the listing, the best one is reported')
+    args = parser.parse_args()
+
+    routes = [
+        ('GET', VMS, lambda match: (200, dict(value=[virtual_machine(RESOURCE_GROUP, 'vm{0}'.format(index)) for index in range(args.vms)]))),
+        ('GET', VMS + '/([^/]+)/instanceView', lambda match: (200, instance_view())),
+        ('GET', VMS + '/([^/]+)', lambda match: (200, virtual_machine(RESOURCE_GROUP, match.group(1), expand_instance_view=True))),
+    ]
+
+    with ARMStub(routes) as stub:
+        best = None
+        for dummy in range(args.repeat):
+            del stub.requests[:]
+            result, elapsed = run_module('azure_rm_virtualmachine_facts', dict(resource_group=RESOURCE_GROUP), stub.url)
+            assert not result.get('failed'), result.get('msg')
+            assert len(result['vms']) == args.vms
+            assert all(vm['power_state'] == 'running' for vm in result['vms'])
+            best = elapsed if best is None else min(best, elapsed)
+        lists, instance_views = stub.count('GET', VMS), stub.count('GET', VMS + '/[^/]+/instanceView')
+        print('list {0} VMs: {1} list and {2} instance view requests, {3:.2f} requests per VM, {4:.0f} ms'.format(
+            args.vms, lists, instance_views, float(len(stub.requests)) / args.vms, best * 1000))
+        assert lists == 1
+        assert instance_views == args.vms
+
+        del stub.requests[:]
+        result, elapsed = run_module('azure_rm_virtualmachine_facts', dict(resource_group=RESOURCE_GROUP, name='vm0'), stub.url)
+        assert not result.get('failed'), result.get('msg')
+        assert [vm['power_state'] for vm in result['vms']] == ['running']
+        print('get 1 VM by name: {0} request(s), {1:.0f} ms'.format(len(stub.requests), elapsed * 1000))
+        assert stub.requests == [('GET', VMS + '/vm0')]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import os
+import sys
+
+import ansible.module_utils
+import ansible.module_utils.common
+
+MODULE_UTILS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'module_utils')
+LIBRARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'library')
+
+# the module_utils of the role take precedence over those of Ansible, as when Ansible runs the modules of the role;
+# Ansible releases up to 2.8 ship their own azure_rm_common
+ansible.module_utils.__path__.insert(0, MODULE_UTILS)
+ansible.module_utils.common.__path__.insert(0, os.path.join(MODULE_UTILS, 'common'))
+
+# the modules of the role are imported by name in tests/unit/library
+sys.path.insert(0, LIBRARY)
@@ -0,0 +1,69 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from azure_rm_securitygroup import diff_rules, priority_conflicts
+
+
+def rule(name, priority, direction='Inbound', **kwargs):
+    result = dict(name=name, description=None, protocol='Tcp', access='Allow', priority=priority, direction=direction,
+                  source_port_range='*', destination_port_range='22', source_address_prefix='*',
+                  destination_address_prefix='*', source_address_prefixes=None, destination_address_prefixes=None,
+                  source_port_ranges=None, destination_port_ranges=None)
+    result.update(kwargs)
+    return result
+
+
+def test_diff_rules_added_removed_and_updated():
+    old = [rule('keep', 100), rule('change', 101), rule('drop', 102)]
+    new = [rule('keep', 100), rule('change', 101, destination_port_range='22-23'), rule('add', 103)]
+
+    added, removed, updated, rules = diff_rules(old, new, purge_list=True)
+
+    assert (added, removed, updated) == (['add'], ['drop'], ['change'])
+    assert [r['name'] for r in rules] == ['keep', 'change', 'add']
+
+
+def test_diff_rules_without_purge_keeps_the_rules_not_requested():
+    old = [rule('keep', 100), rule('other', 102)]
+    new = [rule('keep', 100)]
+
+    added, removed, updated, rules = diff_rules(old, new, purge_list=False)
+
+    assert (added, removed, updated) == ([], [], [])
+    assert [r['name'] for r in rules] == ['keep', 'other']
+
+
+def test_diff_rules_ignores_the_order_of_prefix_lists():
+    old = [rule('allow', 100, source_address_prefix=None, source_address_prefixes=['10.0.0.1', '10.0.0.2'])]
+    new = [rule('allow', 100, source_address_prefix=None, source_address_prefixes=['10.0.0.2', '10.0.0.1'])]
+
+    assert diff_rules(old, new, purge_list=True)[:3] == ([], [], [])
+
+
+def test_diff_rules_compares_scalars_as_strings():
+    old = [rule('allow', 100, destination_port_range='22')]
+    new = [rule('allow', 100, destination_port_range=22)]
+
+    assert diff_rules(old, new, purge_list=True)[:3] == ([], [], [])
+
+
+def test_priority_conflicts_on_a_priority_swap():
+    old = [rule('a', 100), rule('b', 101)]
+
+    assert priority_conflicts(old, [rule('a', 101), rule('b', 100)], removed=[])
+
+
+def test_priority_conflicts_ignores_priorities_freed_by_deleted_rules():
+    old = [rule('a', 100), rule('b', 101)]
+
+    assert not priority_conflicts(old, [rule('c', 101)], removed=['b'])
+    assert priority_conflicts(old, [rule('c', 101)], removed=[])
+
+
+def test_priority_conflicts_per_direction():
+    old = [rule('in', 100)]
+
+    assert not priority_conflicts(old, [rule('out', 100, direction='Outbound')], removed=[])
+    assert not priority_conflicts(old, [rule('in', 100, destination_port_range='23')], removed=[])
@@ -0,0 +1,100 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible.module_utils.common.dict_comparison import diff_paths, differs
+
+
+def port(name, number, id=None):
+    item = dict(name=name, properties=dict(port=number))
+    if id:
+        item['id'] = id
+    return item
+
+
+def test_keyed_list_is_matched_by_name_regardless_of_order():
+    desired = dict(frontendPorts=[port('http', 80), port('https', 443)])
+    actual = dict(frontendPorts=[port('https', 443), port('http', 80)])
+
+    assert diff_paths(desired, actual) == []
+
+
+def test_keyed_list_reports_the_item_that_differs():
+    desired = dict(frontendPorts=[port('http', 80), port('https', 443)])
+    actual = dict(frontendPorts=[port('https', 8443), port('http', 80)])
+
+    assert diff_paths(desired, actual) == ['frontendPorts[name=https]/properties/port']
+
+
+def test_keyed_list_prefers_id_to_name():
+    desired = [port('renamed', 80, id='/ports/1')]
+    actual = [port('http', 80, id='/ports/1')]
+
+    assert diff_paths(desired, actual) == ['[id=/ports/1]/name']
+
+
+def test_keyed_list_reports_a_missing_item():
+    desired = [port('http', 80), port('https', 443)]
+    actual = [port('http', 80), port('ssh', 22)]
+
+    assert diff_paths(desired, actual) == ['[name=https]']
+
+
+def test_list_with_duplicate_keys_is_compared_item_by_item():
+    desired = [port('http', 80), port('http', 8080)]
+
+    assert diff_paths(desired, [port('http', 80), port('http', 8080)]) == []
+    assert diff_paths(desired, [port('http', 8080), port('http', 80)]) == ['[0]/properties/port', '[1]/properties/port']
+
+
+def test_duplicate_keys_in_desired_are_not_matched_to_the_same_item():
+    assert diff_paths([dict(name='a'), dict(name='a')], [dict(name='a'), dict(name='b')]) == ['[1]/name']
+
+
+@pytest.mark.parametrize('sort_scalar_lists, expected', [(True, []), (False, ['addressPrefixes[0]', 'addressPrefixes[1]'])])
+def test_sort_scalar_lists(sort_scalar_lists, expected):
+    desired = dict(addressPrefixes=['10.0.0.0/24', '10.0.1.0/24'])
+    actual = dict(addressPrefixes=['10.0.1.0/24', '10.0.0.0/24'])
+
+    assert diff_paths(desired, actual, sort_scalar_lists=sort_scalar_lists) == expected
+
+
+def test_unsortable_scalar_lists_are_compared_in_order():
+    assert diff_paths([1, 'a', None], [1, 'a', None]) == []
+    assert diff_paths([1, 'a'], ['a', 1]) == ['[0]', '[1]']
+
+
+def test_keys_only_in_actual_are_ignored():
+    desired = dict(properties=dict(sku=dict(name='Standard')))
+    actual = dict(id='/lb', etag='W/"1"', properties=dict(provisioningState='Succeeded', sku=dict(name='Standard', tier='Regional')))
+
+    assert diff_paths(desired, actual) == []
+
+
+@pytest.mark.parametrize('actual', [dict(rules=[]), dict(), dict(rules=None)])
+def test_empty_list_matches_an_empty_or_missing_list(actual):
+    assert diff_paths(dict(rules=[]), actual) == []
+
+
+def test_empty_desired_list_differs_from_a_non_empty_one():
+    assert diff_paths(dict(rules=[]), dict(rules=[port('http', 80)])) == ['rules']
+
+
+def test_list_length_and_type_mismatches():
+    assert diff_paths(dict(a=[1]), dict(a=[1, 2])) == ['a']
+    assert diff_paths(dict(a=[1]), dict(a='1')) == ['a']
+    assert diff_paths(dict(a=dict(b=1)), dict(a=[1])) == ['a']
+    assert diff_paths(1, 2) == ['/']
+
+
+def test_first_only_stops_at_the_first_difference():
+    desired = dict(a=1, b=2, c=[port('http', 80), port('https', 443)])
+    actual = dict(a=0, b=0, c=[port('http', 0), port('https', 0)])
+
+    assert len(diff_paths(desired, actual)) == 4
+    assert len(diff_paths(desired, actual, first_only=True)) == 1
+    assert differs(desired, actual)
+    assert not differs(dict(a=1), dict(a=1, b=2))
@@ -0,0 +1,141 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import copy
+import random
+import sys
+from collections import OrderedDict
+
+import pytest
+
+from ansible.module_utils.common.dict_transformations import camel_dict_to_snake_dict, snake_dict_to_camel_dict, \
+    dict_merge, dict_merge_shared, merge_would_change
+
+import legacy_dict_transformations as legacy
+
+KEYS = ['name', 'id', 'provisioningState', 'ipAddress', 'HTTPEndpoint', 'TargetGroupARNs', 'IPConfigurations', 'vmSize',
+        'Tags', 'tags', 'ip_address', 'backend_http_settings', 'a__b', '_private', 'trailing_', 'ABC', 'aB1C', 'x', '']
+
+PAYLOADS = [
+    (dict(), dict()),
+    (dict(a=1), dict(b=2)),
+    (dict(a=dict(b=1, c=[1, 2])), dict(a=dict(c=[3]), d=dict(e=None))),
+    (dict(properties=dict(sku=dict(name='Standard', tier='Standard'), tags=dict(a='b'))),
+     dict(properties=dict(sku=dict(name='Premium'), rules=[dict(name='r1', port=80)]))),
+    (dict(a=dict(b=dict(c=dict(d=1)))), dict(a=dict(b='replaced'))),
+    (dict(a='scalar'), dict(a=dict(b=1))),
+]
+
+
+@pytest.mark.parametrize('a, b', PAYLOADS)
+def test_dict_merge_shared_equals_dict_merge(a, b):
+    assert dict_merge_shared(a, b) == dict_merge(a, b)
+
+
+@pytest.mark.parametrize('merge', [dict_merge, dict_merge_shared])
+@pytest.mark.parametrize('a, b', PAYLOADS)
+def test_merge_does_not_change_its_inputs(merge, a, b):
+    a_before, b_before = copy.deepcopy(a), copy.deepcopy(b)
+
+    merge(a, b)
+
+    assert a == a_before
+    assert b == b_before
+
+
+def test_dict_merge_result_is_independent_of_its_inputs():
+    a = dict(a=dict(b=[1]), c=dict(d=1))
+    b = dict(e=dict(f=[2]))
+
+    result = dict_merge(a, b)
+    result['a']['b'].append(3)
+    result['e']['f'].append(4)
+
+    assert a == dict(a=dict(b=[1]), c=dict(d=1))
+    assert b == dict(e=dict(f=[2]))
+
+
+def test_dict_merge_shared_shares_the_subtrees_not_merged():
+    a = dict(a=dict(b=[1]), c=dict(d=1))
+    b = dict(c=dict(e=2))
+
+    result = dict_merge_shared(a, b)
+
+    assert result['a'] is a['a']
+    assert result['c'] is not a['c']
+
+
+@pytest.mark.parametrize('a, b', PAYLOADS)
+def test_merge_would_change(a, b):
+    assert merge_would_change(a, b) == (dict_merge(a, b) != a)
+    assert not merge_would_change(dict_merge(a, b), b)
+
+
+def random_payload(rng, depth=0):
+    if depth > 4 or rng.random() < 0.3:
+        return rng.choice([None, True, 0, 42, 1.5, 'value', 'HTTPEndpoint', u'caf\xe9'])
+    if rng.random() < 0.3:
+        return [random_payload(rng, depth + 1) for dummy in range(rng.randint(0, 4))]
+    container = OrderedDict() if rng.random() < 0.2 else dict()
+    for dummy in range(rng.randint(0, 5)):
+        container[rng.choice(KEYS)] = random_payload(rng, depth + 1)
+    return container
+
+
+def random_dicts(count):
+    rng = random.Random(0)
+    payloads = []
+    while len(payloads) < count:
+        payload = random_payload(rng)
+        if isinstance(payload, dict):
+            payloads.append(payload)
+    return payloads
+
+
+def test_key_conversion_matches_the_former_implementation():
+    rng = random.Random(1)
+    for payload in random_dicts(3000):
+        ignore_list = tuple(key for key in payload if rng.random() < 0.5)
+        for reversible in (False, True):
+            assert camel_dict_to_snake_dict(payload, reversible=reversible, ignore_list=ignore_list) == \
+                legacy.camel_dict_to_snake_dict(payload, reversible=reversible, ignore_list=ignore_list)
+        for capitalize_first in (False, True):
+            converted = snake_dict_to_camel_dict(payload, capitalize_first=capitalize_first)
+            expected = legacy.snake_dict_to_camel_dict(payload, capitalize_first=capitalize_first)
+            assert converted == expected
+            assert type(converted) is type(expected)
+
+
+def test_key_conversion_keeps_container_types():
+    payload = OrderedDict([('first_key', OrderedDict([('b_c', 1), ('a_b', [OrderedDict([('z_z', 2)])])]))])
+
+    converted = snake_dict_to_camel_dict(payload)
+
+    assert list(converted) == ['firstKey']
+    assert list(converted['firstKey']) == ['bC', 'aB']
+    assert isinstance(converted['firstKey']['aB'][0], OrderedDict)
+
+
+def test_key_conversion_of_deep_payloads_has_no_recursion_limit():
+    depth = sys.getrecursionlimit() * 3
+    payload = leaf = dict()
+    for dummy in range(depth):
+        child = dict(innerValue=[dict()])
+        leaf['nestedItem'] = child
+        leaf = child['innerValue'][0]
+    leaf['lastKey'] = 'end'
+
+    with pytest.raises(RuntimeError):
+        legacy.camel_dict_to_snake_dict(payload)
+
+    converted = camel_dict_to_snake_dict(payload)
+    for dummy in range(depth):
+        converted = converted['nested_item']['inner_value'][0]
+    assert converted == dict(last_key='end')
+
+    camelized = snake_dict_to_camel_dict(camel_dict_to_snake_dict(payload))
+    for dummy in range(depth):
+        camelized = camelized['nestedItem']['innerValue'][0]
+    assert camelized == dict(lastKey='end')
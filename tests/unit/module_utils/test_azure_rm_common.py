@@ -0,0 +1,420 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import multiprocessing
+import os
+import stat
+import time
+
+import pytest
+
+import ansible.module_utils.azure_rm_common as azure_rm_common
+from ansible.module_utils.azure_rm_common import firewall_rule_changes, AzureRMFileCache, AzureRMTokenCache, \
+    AzureRMCachedTokenCredentials, AzureRMModuleBase, AzureRMPollingTimeout, AZURE_TOKEN_CACHE_SKEW
+
+
+def rule(name, start, end=None):
+    return dict(name=name, start_ip_address=start, end_ip_address=end or start)
+
+
+def test_firewall_rule_changes_unnamed_rule_matches_by_range():
+    existing = [rule('office', '1.1.1.1')]
+
+    assert firewall_rule_changes([rule(None, '1.1.1.1')], existing) == []
+
+
+def test_firewall_rule_changes_unnamed_rule_skips_rules_taken_by_named_rules():
+    existing = [rule('office', '1.1.1.1')]
+    desired = [rule('office', '2.2.2.2'), rule(None, '1.1.1.1')]
+
+    assert firewall_rule_changes(desired, existing) == [
+        dict(rule('office', '2.2.2.2'), action='update'),
+        dict(rule('1.1.1.1', '1.1.1.1'), action='create'),
+    ]
+
+
+def test_firewall_rule_changes_absent_does_not_delete_a_rule_twice():
+    existing = [rule('office', '1.1.1.1')]
+    desired = [rule('office', '1.1.1.1'), rule(None, '1.1.1.1')]
+
+    assert firewall_rule_changes(desired, existing, state='absent') == [dict(rule('office', '1.1.1.1'), action='delete')]
+
+
+def test_firewall_rule_changes_purge():
+    existing = [rule('office', '1.1.1.1'), rule('old', '3.3.3.3'), rule('vpn', '10.0.0.1', '10.0.0.9')]
+    desired = [rule(None, '10.0.0.1', '10.0.0.9'), rule('office', '1.1.1.1')]
+
+    assert firewall_rule_changes(desired, existing, purge=True) == [dict(rule('old', '3.3.3.3'), action='delete')]
+
+
+def token(expires_in, access_token='token'):
+    return dict(access_token=access_token, token_type='Bearer', expires_on=time.time() + expires_in)
+
+
+def test_token_cache_key_depends_on_every_part():
+    key = AzureRMTokenCache.make_key('service_principal', 'tenant', 'client', 'AzureCloud', 's3cr3t')
+
+    assert key == AzureRMTokenCache.make_key('service_principal', 'tenant', 'client', 'AzureCloud', 's3cr3t')
+    assert key != AzureRMTokenCache.make_key('service_principal', 'tenant', 'client', 'AzureCloud', 'other')
+    assert key != AzureRMTokenCache.make_key('user_password', 'tenant', 'client', 'AzureCloud', 's3cr3t')
+    assert AzureRMTokenCache.make_key('msi', None) != AzureRMTokenCache.make_key('msi', 'None')
+    assert 's3cr3t' not in key
+
+
+def test_token_cache_never_writes_secrets(tmpdir):
+    cache = AzureRMTokenCache(str(tmpdir.join('tokens.json')))
+    cache.set(AzureRMTokenCache.make_key('service_principal', 's3cr3t'), token(3600))
+
+    assert 's3cr3t' not in tmpdir.join('tokens.json').read()
+
+
+def test_token_cache_honours_skew(tmpdir, monkeypatch):
+    cache = AzureRMTokenCache(str(tmpdir.join('tokens.json')))
+    cache.set('fresh', token(AZURE_TOKEN_CACHE_SKEW + 60))
+    cache.set('nearly_expired', token(AZURE_TOKEN_CACHE_SKEW - 1))
+
+    assert cache.get('fresh')['token']['access_token'] == 'token'
+    assert cache.get('nearly_expired') is None
+
+    now = time.time()
+    monkeypatch.setattr(azure_rm_common.time, 'time', lambda: now + 61)
+    assert cache.get('fresh') is None
+
+
+def test_token_cache_drops_expired_entries_on_write(tmpdir, monkeypatch):
+    cache = AzureRMTokenCache(str(tmpdir.join('tokens.json')))
+    cache.set('old', token(AZURE_TOKEN_CACHE_SKEW + 60))
+    now = time.time()
+    monkeypatch.setattr(azure_rm_common.time, 'time', lambda: now + AZURE_TOKEN_CACHE_SKEW + 61)
+    cache.set('new', token(2 * AZURE_TOKEN_CACHE_SKEW + 120))
+
+    assert list(cache.read()) == ['new']
+
+
+def test_file_cache_write_is_atomic(tmpdir):
+    cache = AzureRMFileCache(str(tmpdir.join('cache', 'cache.json')))
+    cache.update(lambda data: data.update(a=1))
+
+    with pytest.raises(TypeError):
+        cache.update(lambda data: data.update(b=object()))
+
+    assert cache.read() == dict(a=1)
+    assert sorted(os.listdir(str(tmpdir.join('cache')))) == ['cache.json', 'cache.json.lock']
+    assert stat.S_IMODE(os.stat(cache.path).st_mode) == 0o600
+
+
+def test_file_cache_ignores_a_corrupt_document(tmpdir):
+    tmpdir.join('cache.json').write('{"a": ')
+    cache = AzureRMFileCache(str(tmpdir.join('cache.json')))
+
+    assert cache.read() == dict()
+    cache.update(lambda data: data.update(a=1))
+    assert cache.read() == dict(a=1)
+
+
+def increment(path, times):
+    cache = AzureRMFileCache(path)
+    for dummy in range(times):
+        cache.update(lambda data: data.update(count=data.get('count', 0) + 1))
+
+
+@pytest.mark.skipif(azure_rm_common.fcntl is None, reason='needs flock')
+def test_file_cache_concurrent_writers_lose_no_update(tmpdir):
+    path = str(tmpdir.join('cache.json'))
+    writers = [multiprocessing.Process(target=increment, args=(path, 50)) for dummy in range(2)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+
+    assert [writer.exitcode for writer in writers] == [0, 0]
+    with open(path) as cache_file:
+        assert json.load(cache_file) == dict(count=100)
+
+
+class FakeCredentials(object):
+    def __init__(self, access_token):
+        self.token = dict(access_token=access_token, token_type='Bearer')
+        self.sessions = []
+
+    def signed_session(self, session=None):
+        self.sessions.append(session)
+        return session
+
+
+class FakeResponse(object):
+    def __init__(self, status_code, authorization, connection=None):
+        self.status_code = status_code
+        self.request = FakeRequest(dict(Authorization=authorization))
+        self.connection = connection
+        self.history = []
+        self.content = b''
+
+    def close(self):
+        pass
+
+
+class FakeRequest(object):
+    def __init__(self, headers):
+        self.headers = headers
+
+    def copy(self):
+        return FakeRequest(dict(self.headers))
+
+
+class FakeConnection(object):
+    def __init__(self):
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        self.sent.append(request)
+        return FakeResponse(200, request.headers['Authorization'])
+
+
+def test_cached_token_credentials_acquire_once_the_token_nears_expiry():
+    fresh = FakeCredentials('fresh')
+    refreshed = []
+    credentials = AzureRMCachedTokenCredentials(token(AZURE_TOKEN_CACHE_SKEW - 1, 'cached'), lambda: fresh, refreshed.append)
+
+    assert credentials.signed_session('session') == 'session'
+    assert credentials.signed_session('session') == 'session'
+    assert fresh.sessions == ['session', 'session']
+    assert refreshed == [fresh.token]
+
+
+def test_cached_token_credentials_resend_a_rejected_request_with_fresh_credentials():
+    acquired = []
+
+    def acquire():
+        acquired.append(FakeCredentials('fresh'))
+        return acquired[-1]
+
+    credentials = AzureRMCachedTokenCredentials(token(3600, 'cached'), acquire)
+    connection = FakeConnection()
+    response = credentials._retry_unauthorized(FakeResponse(401, 'Bearer cached', connection))
+
+    assert response.status_code == 200
+    assert [request.headers['Authorization'] for request in connection.sent] == ['Bearer fresh']
+    assert len(response.history) == 1
+    assert len(acquired) == 1
+
+    # only requests signed with the cached token are resent, and only once
+    assert credentials._retry_unauthorized(FakeResponse(401, 'Bearer fresh', connection)).status_code == 401
+    assert len(connection.sent) == 1
+    assert len(acquired) == 1
+
+
+def test_cached_token_credentials_sign_with_the_cached_token_while_it_is_valid(monkeypatch):
+    authentication = pytest.importorskip('msrest.authentication')
+    monkeypatch.setattr(azure_rm_common, 'BasicTokenAuthentication', authentication.BasicTokenAuthentication, raising=False)
+
+    credentials = AzureRMCachedTokenCredentials(token(3600, 'cached'), lambda: pytest.fail('acquired a valid token again'))
+    session = credentials.signed_session()
+    credentials.signed_session(session)
+
+    assert session.headers['Authorization'] == 'Bearer cached'
+    assert session.hooks['response'] == [credentials._retry_unauthorized]
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, interval):
+        self.sleeps.append(interval)
+        self.now += interval
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(azure_rm_common.time, 'time', clock.time)
+    # no jitter: every backoff interval is its upper bound
+    monkeypatch.setattr(azure_rm_common.random, 'uniform', lambda a, b: b)
+    return clock
+
+
+def polling_module():
+    module = AzureRMModuleBase.__new__(AzureRMModuleBase)
+    module.poll_stats = []
+    module.log = lambda msg: None
+    return module
+
+
+def probe_returning(*retry_afters):
+    answers = [(False, None, retry_after) for retry_after in retry_afters] + [(True, 'result', None)]
+    return lambda: answers.pop(0)
+
+
+def test_poll_until_backoff_grows_up_to_max_delay(clock):
+    module = polling_module()
+
+    result = module.poll_until(probe_returning(None, None, None, None, None, None), 'operation',
+                               initial_delay=1, max_delay=8, sleep=clock.sleep)
+
+    assert result == 'result'
+    assert clock.sleeps == [1, 2, 4, 8, 8, 8]
+
+
+def test_poll_until_honours_retry_after(clock):
+    module = polling_module()
+
+    module.poll_until(probe_returning(7, None, 3), 'operation', initial_delay=1, max_delay=30, sleep=clock.sleep)
+
+    assert clock.sleeps == [7, 1, 3]
+
+
+def test_poll_until_bounds_retry_after(clock):
+    module = polling_module()
+
+    module.poll_until(probe_returning(0, 0, 3600), 'operation', initial_delay=2, max_delay=30, sleep=clock.sleep)
+
+    assert clock.sleeps == [2, 2, 30]
+
+
+def test_poll_until_times_out(clock):
+    module = polling_module()
+
+    with pytest.raises(AzureRMPollingTimeout):
+        module.poll_until(lambda: (False, None, 4), 'operation', timeout=10, sleep=clock.sleep)
+
+    # the last pause is cut short by the timeout
+    assert clock.sleeps == [4, 4, 2]
+    assert module.poll_stats == [dict(operation='operation', polls=4, elapsed=10, timed_out=True)]
+
+
+def test_poll_until_records_poll_stats(clock):
+    module = polling_module()
+
+    module.poll_until(probe_returning(5, 5), 'first', sleep=clock.sleep)
+    module.poll_until(probe_returning(), 'second', sleep=clock.sleep)
+
+    assert module.poll_stats == [dict(operation='first', polls=3, elapsed=10, timed_out=False),
+                                 dict(operation='second', polls=1, elapsed=0, timed_out=False)]
+
+
+class FakeGraphClient(object):
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def iter_resource_graph(self, query, subscriptions):
+        self.queries.append((query, subscriptions))
+        return iter(self.rows)
+
+
+class FakeResource(object):
+    def __init__(self, name, tags=None, type=None):
+        self.name = name
+        self.tags = tags
+        self.type = type
+
+    @classmethod
+    def deserialize(cls, row):
+        return cls(row['name'], row.get('tags'), row.get('type'))
+
+
+class FakeAuth(object):
+    subscription_id = 'own'
+
+
+def listing_module(rows=None):
+    module = AzureRMModuleBase.__new__(AzureRMModuleBase)
+    module.azure_auth = FakeAuth()
+    module._graph_client = FakeGraphClient(rows or [])
+    module.log = lambda msg: None
+    return module
+
+
+def test_list_resources_queries_resource_graph_across_subscriptions(monkeypatch):
+    monkeypatch.setenv(azure_rm_common.AZURE_RESOURCE_GRAPH_KEY, 'true')
+    module = listing_module([dict(name='disk', type='microsoft.compute/disks')])
+
+    items = module.list_resources('Microsoft.Compute/disks', FakeResource, lambda: pytest.fail('listed'),
+                                  subscriptions=['own', 'other'])
+
+    assert [(item.name, item.type) for item in items] == [('disk', 'Microsoft.Compute/disks')]
+    assert module._graph_client.queries[0][1] == ['own', 'other']
+
+
+def test_list_resources_lists_the_subscription_of_the_module_without_resource_graph(monkeypatch):
+    monkeypatch.delenv(azure_rm_common.AZURE_RESOURCE_GRAPH_KEY, raising=False)
+    module = listing_module()
+    resources = [FakeResource('tagged', dict(env='prod')), FakeResource('untagged')]
+
+    assert [item.name for item in module.list_resources('Microsoft.Compute/disks', FakeResource, lambda: resources,
+                                                        tags=['env:prod'])] == ['tagged']
+    module.fail = changing_module().fail
+    with pytest.raises(Failed, match='requires Resource Graph'):
+        module.list_resources('Microsoft.Compute/disks', FakeResource, lambda: resources, subscriptions=['other'])
+    assert module._graph_client.queries == []
+
+
+class Failed(Exception):
+    def __init__(self, msg, **kwargs):
+        super(Failed, self).__init__(msg)
+        self.kwargs = kwargs
+
+
+def changing_module(check_mode=False):
+    module = AzureRMModuleBase.__new__(AzureRMModuleBase)
+    module.results = dict(changed=False)
+    module.check_mode = check_mode
+    module.poll_stats = []
+
+    def fail(msg, **kwargs):
+        raise Failed(msg, **kwargs)
+    module.fail = fail
+    return module
+
+
+def write(change):
+    if change['name'] == 'bad':
+        raise ValueError('refused')
+    return change['name'].upper()
+
+
+def test_apply_changes_reports_every_change():
+    module = changing_module()
+    changes = [dict(name='a', action='create'), dict(name='b', action='delete')]
+
+    results = module.apply_changes(changes, write, 'thing', summarize=lambda change, result: dict(name=result))
+
+    assert results['changed']
+    assert results['changes'] == [dict(name='A', failed=False), dict(name='B', failed=False)]
+
+
+def test_apply_changes_fails_with_the_results_when_a_change_failed():
+    module = changing_module()
+    changes = [dict(name='a', action='create'), dict(name='bad', action='create', secret='x')]
+
+    with pytest.raises(Failed) as failure:
+        module.apply_changes(changes, write, 'thing', summarize=lambda change, result: dict(name=change['name']))
+
+    assert str(failure.value) == 'Failed to apply 1 of 2 thing changes'
+    assert failure.value.kwargs['changes'] == [dict(name='a', failed=False), dict(name='bad', failed=True, msg='refused')]
+
+
+def test_apply_changes_applies_nothing_in_check_mode_but_reports_known_errors():
+    module = changing_module(check_mode=True)
+    changes = [dict(name='a', action='create'), dict(name='b', action='update', error=ValueError('unreadable'))]
+
+    with pytest.raises(Failed) as failure:
+        module.apply_changes(changes, lambda change: pytest.fail('applied in check mode'), 'thing')
+
+    assert failure.value.kwargs['changed']
+    assert failure.value.kwargs['changes'] == [dict(name='a', action='create', failed=False),
+                                               dict(name='b', action='update', failed=True, msg='unreadable')]
+
+
+def test_apply_changes_without_changes():
+    module = changing_module()
+
+    assert module.apply_changes([], write, 'thing') == dict(changed=False, changes=[])
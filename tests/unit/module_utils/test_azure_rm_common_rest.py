@@ -0,0 +1,133 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import threading
+
+import pytest
+
+from ansible.module_utils.six.moves import BaseHTTPServer
+from ansible.module_utils.six.moves.urllib.parse import urlparse, parse_qs
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient, kql_string, resource_graph_query
+
+pytest.importorskip('msrest')
+from msrest.authentication import BasicTokenAuthentication  # noqa: E402
+
+
+class ResourceGraphStub(BaseHTTPServer.HTTPServer):
+    '''
+    Local HTTP server answering Resource Graph queries with canned pages, chained by $skipToken.
+    '''
+    def __init__(self, pages):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), ResourceGraphHandler)
+        self.pages = pages
+        self.requests = []
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{0}'.format(self.server_address[1])
+
+
+class ResourceGraphHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        self.server.requests.append(dict(path=self.path, body=body))
+        skip_token = body['options'].get('$skipToken')
+        index = int(skip_token) if skip_token else 0
+        page = dict(data=self.server.pages[index], count=len(self.server.pages[index]))
+        if index + 1 < len(self.server.pages):
+            page['$skipToken'] = str(index + 1)
+        payload = json.dumps(page).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(pages):
+        server = ResourceGraphStub(pages)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def client(server):
+    return GenericRestClient(BasicTokenAuthentication(dict(access_token='token')), 'xxxx', base_url=server.url)
+
+
+def test_iter_resource_graph_follows_skip_token(stub):
+    server = stub([[dict(id='a'), dict(id='b')], [dict(id='c')], [dict(id='d')]])
+    query = resource_graph_query('Microsoft.Network/networkInterfaces')
+
+    rows = list(client(server).iter_resource_graph(query, ['xxxx'], page_size=2))
+
+    assert [row['id'] for row in rows] == ['a', 'b', 'c', 'd']
+    assert [request['body']['options'].get('$skipToken') for request in server.requests] == [None, '1', '2']
+    for request in server.requests:
+        url = urlparse(request['path'])
+        assert url.path == '/providers/Microsoft.ResourceGraph/resources'
+        assert parse_qs(url.query)['api-version'] == ['2019-04-01']
+        assert request['body']['subscriptions'] == ['xxxx']
+        assert request['body']['query'] == query
+        assert request['body']['options']['$top'] == 2
+
+
+def test_iter_resource_graph_is_lazy(stub):
+    server = stub([[dict(id='a')], [dict(id='b')]])
+
+    rows = client(server).iter_resource_graph('Resources', ['xxxx'])
+
+    assert next(rows)['id'] == 'a'
+    assert len(server.requests) == 1
+    rows.close()
+
+
+def test_iter_resource_graph_empty_page(stub):
+    server = stub([[]])
+
+    assert list(client(server).iter_resource_graph('Resources', ['xxxx'])) == []
+
+
+def test_kql_string_escapes_quotes_and_backslashes():
+    assert kql_string('plain') == "'plain'"
+    assert kql_string("it's") == "'it\\'s'"
+    assert kql_string('C:\\dir\\') == "'C:\\\\dir\\\\'"
+    assert kql_string("\\'") == "'\\\\\\''"
+
+
+def test_resource_graph_query_type_and_resource_group():
+    assert resource_graph_query('Microsoft.Compute/virtualMachines', resource_group="my'rg") == \
+        "Resources | where type =~ 'Microsoft.Compute/virtualMachines' and resourceGroup =~ 'my\\'rg' | order by id asc"
+
+
+def test_resource_graph_query_tags():
+    query = resource_graph_query('Microsoft.Compute/disks', tags=['env:prod', 'owner', "team's:a:b"])
+
+    assert query == ("Resources | where type =~ 'Microsoft.Compute/disks'"
+                     " and tostring(tags['env']) == 'prod'"
+                     " and isnotempty(tags['owner'])"
+                     " and tostring(tags['team\\'s']) == 'a:b'"
+                     " | order by id asc")
+
+
+def test_resource_graph_query_tag_with_empty_value_requires_the_tag():
+    assert resource_graph_query('Microsoft.Compute/disks', tags=['owner:']) == \
+        resource_graph_query('Microsoft.Compute/disks', tags=['owner'])